@@ -9,14 +9,21 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import csv
-import os
 from collections import defaultdict
 
+from data_sources import CSVDataSource
+
 class AnalyticsEngine:
     """Main analytics engine for processing sensor data"""
+
+    METRICS = ['soil_moisture', 'ph', 'temperature', 'humidity']
     
-    def __init__(self, csv_file: str = "crop_data.csv"):
+    def __init__(self, csv_file: str = "crop_data.csv", rollups=None, data_source=None,
+                 latest=None):
         self.csv_file = csv_file
+        self.rollups = rollups  # Optional RollupStore with pre-aggregated buckets
+        self.data_source = data_source or CSVDataSource(csv_file)
+        self.latest = latest  # Optional LatestReadingsCache: sensor list and current values
         self.optimal_ranges = {
             'soil_moisture': {'min': 40, 'max': 70},  # Percentage
             'ph': {'min': 6.0, 'max': 7.5},           # pH scale
@@ -24,93 +31,96 @@ class AnalyticsEngine:
             'humidity': {'min': 50, 'max': 80}         # Percentage
         }
         
-    def load_data(self) -> pd.DataFrame:
-        """Load and clean sensor data from CSV"""
-        if not os.path.exists(self.csv_file):
-            return pd.DataFrame()
-        
+    def load_data(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  sensor_ids: Optional[List[str]] = None,
+                  columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load and clean sensor data, filtered by time window, sensors and columns"""
         try:
-            df = pd.read_csv(self.csv_file)
-            
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # Replace error values (-999) with NaN
-            numeric_columns = ['soil_moisture', 'ph', 'temperature', 'humidity']
-            for col in numeric_columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                df[col] = df[col].replace(-999, np.nan)
-            
-            # Sort by timestamp
-            df = df.sort_values('timestamp')
-            
-            return df
+            return self.data_source.load(start=start, end=end, sensor_ids=sensor_ids, columns=columns)
         except Exception as e:
             print(f"Error loading data: {e}")
             return pd.DataFrame()
+
+    def sensor_ids(self) -> List[str]:
+        """All sensors with stored readings"""
+        if self.latest is not None and self.latest.seeded:
+            return self.latest.sensor_ids()
+        try:
+            return self.data_source.sensor_ids()
+        except Exception as e:
+            print(f"Error loading sensor list: {e}")
+            return []
     
     def calculate_daily_averages(self, days: int = 30) -> Dict:
         """Calculate daily averages for each sensor over the last N days"""
-        df = self.load_data()
+        if self.rollups is not None and self.rollups.is_ready('day'):
+            return self._daily_averages_from_rollups(days)
+
+        # Load only the last N days, from midnight so the first day is complete
+        # (as in the day buckets)
+        cutoff_date = self._daily_cutoff(days)
+        df = self.load_data(start=cutoff_date, columns=self.METRICS)
         if df.empty:
             return {}
         
-        # Filter to last N days
-        cutoff_date = datetime.now() - timedelta(days=days)
-        df = df[df['timestamp'] >= cutoff_date]
-        
-        # Group by date and sensor_id
+        # Single pass over (sensor, date) groups
         df['date'] = df['timestamp'].dt.date
-        
-        daily_averages = {}
-        for sensor_id in df['sensor_id'].unique():
-            sensor_data = df[df['sensor_id'] == sensor_id]
-            
-            daily_avg = sensor_data.groupby('date').agg({
-                'soil_moisture': 'mean',
-                'ph': 'mean',
-                'temperature': 'mean',
-                'humidity': 'mean'
-            }).round(2)
-            
-            daily_averages[sensor_id] = [
-                {
-                    'date': str(date),
-                    'soil_moisture': row['soil_moisture'] if not pd.isna(row['soil_moisture']) else None,
-                    'ph': row['ph'] if not pd.isna(row['ph']) else None,
-                    'temperature': row['temperature'] if not pd.isna(row['temperature']) else None,
-                    'humidity': row['humidity'] if not pd.isna(row['humidity']) else None,
-                    'readings_count': int(sensor_data[sensor_data['date'] == date].shape[0])
-                }
-                for date, row in daily_avg.iterrows()
-            ]
-        
-        return daily_averages
+        grouped = df.groupby(['sensor_id', 'date'], sort=False)
+        daily_avg = grouped[self.METRICS].mean().round(2)
+        counts = grouped.size()
+        
+        values = daily_avg.to_numpy(dtype=float)
+        daily_averages = defaultdict(list)
+        for (sensor_id, date), row, count in zip(daily_avg.index, values, counts.to_numpy()):
+            entry = {'date': str(date)}
+            for metric, value in zip(self.METRICS, row):
+                entry[metric] = None if np.isnan(value) else value
+            entry['readings_count'] = int(count)
+            daily_averages[sensor_id].append(entry)
+        
+        return dict(daily_averages)
+
+    def _daily_cutoff(self, days: int) -> datetime:
+        """Start of the daily averages window: midnight of the day N days ago"""
+        return (datetime.now() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _daily_averages_from_rollups(self, days: int) -> Dict:
+        """Daily averages read from the day buckets (one document per sensor per day)"""
+        cutoff_date = self._daily_cutoff(days)
+
+        daily_averages = defaultdict(list)
+        for bucket in self.rollups.query('day', start=cutoff_date):
+            entry = {'date': bucket['bucket'].strftime('%Y-%m-%d')}
+            for metric in ['soil_moisture', 'ph', 'temperature', 'humidity']:
+                summary = bucket['metrics'][metric]
+                entry[metric] = round(summary['mean'], 2) if summary else None
+            entry['readings_count'] = bucket['count']
+            daily_averages[bucket['sensor_id']].append(entry)
+
+        return dict(daily_averages)
     
     def calculate_trend_summary(self) -> Dict:
         """Calculate trend summaries comparing last 7 days vs previous 7 days"""
-        df = self.load_data()
-        if df.empty:
+        now = datetime.now()
+        df = self.load_data(start=now - timedelta(days=14), columns=self.METRICS)
+        sensor_ids = self.sensor_ids()
+        if not sensor_ids:
             return {}
+        if df.empty:
+            df = pd.DataFrame(columns=['timestamp', 'sensor_id'] + self.METRICS)
         
-        now = datetime.now()
-        last_7_days = df[df['timestamp'] >= (now - timedelta(days=7))]
-        previous_7_days = df[
-            (df['timestamp'] >= (now - timedelta(days=14))) & 
-            (df['timestamp'] < (now - timedelta(days=7)))
-        ]
+        # Label each reading with its week and average per (sensor, week) in one groupby
+        week = np.where(df['timestamp'] >= (now - timedelta(days=7)), 'last', 'prev')
+        weekly = df.groupby([df['sensor_id'], week])[self.METRICS].mean()
         
         trends = {}
         
-        for sensor_id in df['sensor_id'].unique():
-            last_week = last_7_days[last_7_days['sensor_id'] == sensor_id]
-            prev_week = previous_7_days[previous_7_days['sensor_id'] == sensor_id]
-            
+        for sensor_id in sensor_ids:
             sensor_trends = {}
             
-            for metric in ['soil_moisture', 'ph', 'temperature', 'humidity']:
-                last_avg = last_week[metric].mean()
-                prev_avg = prev_week[metric].mean()
+            for metric in self.METRICS:
+                last_avg = weekly[metric].get((sensor_id, 'last'), np.nan)
+                prev_avg = weekly[metric].get((sensor_id, 'prev'), np.nan)
                 
                 if pd.isna(last_avg) or pd.isna(prev_avg):
                     change = None
@@ -137,34 +147,41 @@ class AnalyticsEngine:
     
     def get_sensor_statistics(self) -> Dict:
         """Get comprehensive statistics for each sensor"""
-        df = self.load_data()
+        if self.rollups is not None and self.rollups.is_ready('day') and self.latest is not None:
+            return self._sensor_statistics_from_rollups()
+
+        df = self.load_data(columns=self.METRICS)
         if df.empty:
             return {}
         
+        # One groupby computes every per-sensor aggregate
+        grouped = df.groupby('sensor_id', sort=False)
+        sizes = grouped.size()
+        first_seen = grouped['timestamp'].min()
+        last_seen = grouped['timestamp'].max()
+        aggregates = grouped[self.METRICS].agg(['count', 'last', 'mean', 'min', 'max', 'std'])
+        
         stats = {}
         
-        for sensor_id in df['sensor_id'].unique():
-            sensor_data = df[df['sensor_id'] == sensor_id]
-            
+        for sensor_id in sizes.index:
+            row = aggregates.loc[sensor_id]
             sensor_stats = {
-                'total_readings': len(sensor_data),
+                'total_readings': int(sizes[sensor_id]),
                 'date_range': {
-                    'start': sensor_data['timestamp'].min().strftime('%Y-%m-%d'),
-                    'end': sensor_data['timestamp'].max().strftime('%Y-%m-%d')
+                    'start': first_seen[sensor_id].strftime('%Y-%m-%d'),
+                    'end': last_seen[sensor_id].strftime('%Y-%m-%d')
                 },
                 'metrics': {}
             }
             
-            for metric in ['soil_moisture', 'ph', 'temperature', 'humidity']:
-                metric_data = sensor_data[metric].dropna()
-                
-                if len(metric_data) > 0:
+            for metric in self.METRICS:
+                if row[(metric, 'count')] > 0:
                     sensor_stats['metrics'][metric] = {
-                        'current': round(metric_data.iloc[-1], 2),
-                        'average': round(metric_data.mean(), 2),
-                        'min': round(metric_data.min(), 2),
-                        'max': round(metric_data.max(), 2),
-                        'std': round(metric_data.std(), 2)
+                        'current': round(row[(metric, 'last')], 2),
+                        'average': round(row[(metric, 'mean')], 2),
+                        'min': round(row[(metric, 'min')], 2),
+                        'max': round(row[(metric, 'max')], 2),
+                        'std': round(row[(metric, 'std')], 2)
                     }
                 else:
                     sensor_stats['metrics'][metric] = None
@@ -173,6 +190,52 @@ class AnalyticsEngine:
         
         return stats
 
+    def _sensor_statistics_from_rollups(self) -> Dict:
+        """All-time statistics combined from the day buckets, current values from the latest readings"""
+        stats = {}
+        for summary in self.rollups.sensor_summaries('day'):
+            latest = self.latest.get(summary['sensor_id']) or {}
+            sensor_stats = {
+                'total_readings': summary['count'],
+                'date_range': {
+                    'start': summary['first_bucket'].strftime('%Y-%m-%d'),
+                    'end': summary['last_bucket'].strftime('%Y-%m-%d')
+                },
+                'metrics': {}
+            }
+
+            for metric in self.METRICS:
+                m = summary['metrics'][metric]
+                if m is None:
+                    sensor_stats['metrics'][metric] = None
+                    continue
+                current = latest.get(metric)
+                if current is None or current == -999:
+                    # The newest reading has no value: last one that did, as in the raw path
+                    current = self._last_value(summary['sensor_id'], metric)
+                sensor_stats['metrics'][metric] = {
+                    'current': round(current, 2) if current is not None else None,
+                    'average': round(m['mean'], 2),
+                    'min': round(m['min'], 2),
+                    'max': round(m['max'], 2),
+                    'std': round(m['std'], 2) if m['std'] is not None else None
+                }
+
+            stats[summary['sensor_id']] = sensor_stats
+
+        return stats
+
+    def _last_value(self, sensor_id: str, metric: str) -> Optional[float]:
+        """Most recent stored value of a metric, read from the newest day bucket that has one"""
+        day = self.rollups.last_bucket('day', sensor_id, metric)
+        if day is None:
+            return None
+        df = self.load_data(start=day, end=day + timedelta(days=1), sensor_ids=[sensor_id], columns=[metric])
+        if df.empty or metric not in df:
+            return None
+        values = df[metric].dropna()
+        return float(values.iloc[-1]) if len(values) else None
+
 class YieldEstimator:
     """Rule-based yield estimation system"""
     
@@ -184,49 +247,71 @@ class YieldEstimator:
         self.moisture_threshold = 30  # Below this for 3+ days reduces yield
         self.consecutive_days_threshold = 3
         
-    def calculate_yield_score(self, sensor_id: str) -> Dict:
-        """Calculate yield score for a specific sensor based on recent conditions"""
-        df = self.analytics.load_data()
-        if df.empty:
-            return {'score': 0, 'factors': [], 'recommendations': []}
-        
-        # Filter to last 14 days for analysis
-        cutoff_date = datetime.now() - timedelta(days=14)
-        sensor_data = df[
-            (df['sensor_id'] == sensor_id) & 
-            (df['timestamp'] >= cutoff_date)
-        ].copy()
+    def calculate_yield_score(self, sensor_id: str,
+                              sensor_data: Optional[pd.DataFrame] = None) -> Dict:
+        """
+        Calculate yield score for a specific sensor based on recent conditions
+        
+        sensor_data may be passed in when the caller already loaded the last
+        14 days for this sensor; otherwise only that window is loaded.
+        """
+        if sensor_data is None:
+            # Load only the last 14 days of this sensor for analysis
+            cutoff_date = datetime.now() - timedelta(days=14)
+            sensor_data = self.analytics.load_data(
+                start=cutoff_date, sensor_ids=[sensor_id], columns=self.analytics.METRICS
+            )
+            if sensor_data.empty and not self.analytics.sensor_ids():
+                return {'score': 0, 'factors': [], 'recommendations': []}
         
         if sensor_data.empty:
             return {'score': 0, 'factors': ['No recent data'], 'recommendations': ['Check sensor connectivity']}
         
+        # Daily mean moisture, oldest first, for the consecutive-day check
+        sensor_data['date'] = sensor_data['timestamp'].dt.date
+        daily_moisture = sensor_data.groupby('date')['soil_moisture'].mean()
+        
+        moisture = sensor_data['soil_moisture'].dropna()
+        temperature = sensor_data['temperature'].dropna()
+        ph = sensor_data['ph'].dropna()
+        humidity = sensor_data['humidity'].dropna()
+        
+        return self._score({
+            'moisture_count': len(moisture),
+            'moisture_current': moisture.iloc[-1] if len(moisture) else None,
+            'max_consecutive_low': self._max_consecutive_low(daily_moisture.to_numpy()),
+            'temperature_count': len(temperature),
+            'temperature_mean': temperature.mean(),
+            'temperature_max': temperature.max(),
+            'temperature_min': temperature.min(),
+            'ph_count': len(ph),
+            'ph_mean': ph.mean(),
+            'humidity_count': len(humidity),
+            'humidity_mean': humidity.mean()
+        })
+    
+    def _max_consecutive_low(self, daily_moisture: np.ndarray) -> int:
+        """Longest run of consecutive days with mean moisture below the threshold"""
+        low = daily_moisture < self.moisture_threshold
+        if not low.any():
+            return 0
+        # Run length at each day = lows so far minus lows at the last non-low day
+        cumulative = np.cumsum(low)
+        at_reset = np.maximum.accumulate(np.where(low, 0, cumulative))
+        return int((cumulative - at_reset).max())
+    
+    def _score(self, aggregates: Dict) -> Dict:
+        """Apply the yield rules to one sensor's aggregates"""
         yield_score = self.base_yield_score
         factors = []
         recommendations = []
         
-        # Check soil moisture patterns
-        moisture_impact, moisture_factors, moisture_recs = self._analyze_moisture_pattern(sensor_data)
-        yield_score += moisture_impact
-        factors.extend(moisture_factors)
-        recommendations.extend(moisture_recs)
-        
-        # Check temperature patterns
-        temp_impact, temp_factors, temp_recs = self._analyze_temperature_pattern(sensor_data)
-        yield_score += temp_impact
-        factors.extend(temp_factors)
-        recommendations.extend(temp_recs)
-        
-        # Check pH patterns
-        ph_impact, ph_factors, ph_recs = self._analyze_ph_pattern(sensor_data)
-        yield_score += ph_impact
-        factors.extend(ph_factors)
-        recommendations.extend(ph_recs)
-        
-        # Check humidity patterns
-        humidity_impact, humidity_factors, humidity_recs = self._analyze_humidity_pattern(sensor_data)
-        yield_score += humidity_impact
-        factors.extend(humidity_factors)
-        recommendations.extend(humidity_recs)
+        for analyze in (self._analyze_moisture_pattern, self._analyze_temperature_pattern,
+                        self._analyze_ph_pattern, self._analyze_humidity_pattern):
+            impact, rule_factors, rule_recs = analyze(aggregates)
+            yield_score += impact
+            factors.extend(rule_factors)
+            recommendations.extend(rule_recs)
         
         # Ensure score stays within bounds
         yield_score = max(0, min(100, yield_score))
@@ -238,29 +323,17 @@ class YieldEstimator:
             'grade': self._get_yield_grade(yield_score)
         }
     
-    def _analyze_moisture_pattern(self, sensor_data: pd.DataFrame) -> Tuple[float, List[str], List[str]]:
+    def _analyze_moisture_pattern(self, aggregates: Dict) -> Tuple[float, List[str], List[str]]:
         """Analyze soil moisture patterns for yield impact"""
         impact = 0
         factors = []
         recommendations = []
         
-        moisture_data = sensor_data['soil_moisture'].dropna()
-        if len(moisture_data) == 0:
+        if aggregates['moisture_count'] == 0:
             return 0, ['No moisture data'], ['Install soil moisture sensor']
         
         # Check for consecutive low moisture days
-        sensor_data['date'] = sensor_data['timestamp'].dt.date
-        daily_avg = sensor_data.groupby('date')['soil_moisture'].mean()
-        
-        consecutive_low_days = 0
-        max_consecutive_low = 0
-        
-        for moisture in daily_avg:
-            if moisture < self.moisture_threshold:
-                consecutive_low_days += 1
-                max_consecutive_low = max(max_consecutive_low, consecutive_low_days)
-            else:
-                consecutive_low_days = 0
+        max_consecutive_low = aggregates['max_consecutive_low']
         
         if max_consecutive_low >= self.consecutive_days_threshold:
             impact -= 15 * (max_consecutive_low - self.consecutive_days_threshold + 1)
@@ -268,7 +341,7 @@ class YieldEstimator:
             recommendations.append("Increase irrigation frequency")
         
         # Check current moisture level
-        current_moisture = moisture_data.iloc[-1]
+        current_moisture = aggregates['moisture_current']
         optimal_range = self.analytics.optimal_ranges['soil_moisture']
         
         if current_moisture < optimal_range['min']:
@@ -284,17 +357,16 @@ class YieldEstimator:
         
         return impact, factors, recommendations
     
-    def _analyze_temperature_pattern(self, sensor_data: pd.DataFrame) -> Tuple[float, List[str], List[str]]:
+    def _analyze_temperature_pattern(self, aggregates: Dict) -> Tuple[float, List[str], List[str]]:
         """Analyze temperature patterns for yield impact"""
         impact = 0
         factors = []
         recommendations = []
         
-        temp_data = sensor_data['temperature'].dropna()
-        if len(temp_data) == 0:
+        if aggregates['temperature_count'] == 0:
             return 0, ['No temperature data'], ['Install temperature sensor']
         
-        avg_temp = temp_data.mean()
+        avg_temp = aggregates['temperature_mean']
         optimal_range = self.analytics.optimal_ranges['temperature']
         
         if avg_temp < optimal_range['min']:
@@ -309,8 +381,8 @@ class YieldEstimator:
             factors.append(f"Temperature in optimal range ({avg_temp:.1f}°C)")
         
         # Check for extreme temperatures
-        max_temp = temp_data.max()
-        min_temp = temp_data.min()
+        max_temp = aggregates['temperature_max']
+        min_temp = aggregates['temperature_min']
         
         if max_temp > 35:
             impact -= 5
@@ -324,17 +396,16 @@ class YieldEstimator:
         
         return impact, factors, recommendations
     
-    def _analyze_ph_pattern(self, sensor_data: pd.DataFrame) -> Tuple[float, List[str], List[str]]:
+    def _analyze_ph_pattern(self, aggregates: Dict) -> Tuple[float, List[str], List[str]]:
         """Analyze pH patterns for yield impact"""
         impact = 0
         factors = []
         recommendations = []
         
-        ph_data = sensor_data['ph'].dropna()
-        if len(ph_data) == 0:
+        if aggregates['ph_count'] == 0:
             return 0, ['No pH data'], ['Install pH sensor']
         
-        avg_ph = ph_data.mean()
+        avg_ph = aggregates['ph_mean']
         optimal_range = self.analytics.optimal_ranges['ph']
         
         if avg_ph < optimal_range['min']:
@@ -350,17 +421,16 @@ class YieldEstimator:
         
         return impact, factors, recommendations
     
-    def _analyze_humidity_pattern(self, sensor_data: pd.DataFrame) -> Tuple[float, List[str], List[str]]:
+    def _analyze_humidity_pattern(self, aggregates: Dict) -> Tuple[float, List[str], List[str]]:
         """Analyze humidity patterns for yield impact"""
         impact = 0
         factors = []
         recommendations = []
         
-        humidity_data = sensor_data['humidity'].dropna()
-        if len(humidity_data) == 0:
+        if aggregates['humidity_count'] == 0:
             return 0, ['No humidity data'], ['Install humidity sensor']
         
-        avg_humidity = humidity_data.mean()
+        avg_humidity = aggregates['humidity_mean']
         optimal_range = self.analytics.optimal_ranges['humidity']
         
         if avg_humidity < optimal_range['min']:
@@ -390,21 +460,68 @@ class YieldEstimator:
             return "F"
     
     def get_all_sensor_yields(self) -> Dict:
-        """Get yield estimates for all sensors"""
-        df = self.analytics.load_data()
-        if df.empty:
+        """Get yield estimates for all sensors, aggregated from one grouped frame"""
+        sensor_ids = self.analytics.sensor_ids()
+        if not sensor_ids:
             return {}
         
+        cutoff_date = datetime.now() - timedelta(days=14)
+        df = self.analytics.load_data(start=cutoff_date, columns=self.analytics.METRICS)
+        
         yields = {}
-        for sensor_id in df['sensor_id'].unique():
-            yields[sensor_id] = self.calculate_yield_score(sensor_id)
+        if not df.empty:
+            for sensor_id, aggregates in self._batch_aggregates(df).items():
+                yields[sensor_id] = self._score(aggregates)
+        
+        for sensor_id in sensor_ids:
+            if sensor_id not in yields:
+                yields[sensor_id] = {'score': 0, 'factors': ['No recent data'],
+                                     'recommendations': ['Check sensor connectivity']}
+        
+        return {sensor_id: yields[sensor_id] for sensor_id in sensor_ids}
+    
+    def _batch_aggregates(self, df: pd.DataFrame) -> Dict[str, Dict]:
+        """Per-sensor rule inputs for every sensor in one pass"""
+        grouped = df.groupby('sensor_id', sort=False)
+        per_sensor = grouped[self.analytics.METRICS].agg(['count', 'last', 'mean', 'min', 'max'])
+        
+        # Daily mean moisture per (sensor, date), then the longest low run per sensor:
+        # a new block starts at every non-low day and at every sensor boundary, and the
+        # run length is the running count of low days inside the block
+        daily = df.groupby(['sensor_id', df['timestamp'].dt.date])['soil_moisture'].mean()
+        sensors = daily.index.get_level_values(0)
+        low = pd.Series(daily.to_numpy() < self.moisture_threshold)
+        new_block = ~low | pd.Series(sensors != np.roll(sensors, 1))
+        run_length = low.astype(int).groupby(new_block.cumsum()).cumsum()
+        max_consecutive_low = run_length.groupby(sensors).max()
+        
+        # Column-wise lookups keep each column's dtype (integer readings stay integers)
+        def value(sensor_id, metric, stat):
+            return per_sensor.at[sensor_id, (metric, stat)]
+        
+        aggregates = {}
+        for sensor_id in per_sensor.index:
+            aggregates[sensor_id] = {
+                'moisture_count': value(sensor_id, 'soil_moisture', 'count'),
+                'moisture_current': value(sensor_id, 'soil_moisture', 'last'),
+                'max_consecutive_low': int(max_consecutive_low[sensor_id]),
+                'temperature_count': value(sensor_id, 'temperature', 'count'),
+                'temperature_mean': value(sensor_id, 'temperature', 'mean'),
+                'temperature_max': value(sensor_id, 'temperature', 'max'),
+                'temperature_min': value(sensor_id, 'temperature', 'min'),
+                'ph_count': value(sensor_id, 'ph', 'count'),
+                'ph_mean': value(sensor_id, 'ph', 'mean'),
+                'humidity_count': value(sensor_id, 'humidity', 'count'),
+                'humidity_mean': value(sensor_id, 'humidity', 'mean')
+            }
         
-        return yields
+        return aggregates
 
 # Factory function for easy instantiation
-def create_analytics_system(csv_file: str = "crop_data.csv"):
+def create_analytics_system(csv_file: str = "crop_data.csv", rollups=None, data_source=None,
+                            latest=None):
     """Create analytics engine and yield estimator"""
-    analytics = AnalyticsEngine(csv_file)
+    analytics = AnalyticsEngine(csv_file, rollups=rollups, data_source=data_source, latest=latest)
     yield_estimator = YieldEstimator(analytics)
     
     return analytics, yield_estimator
@@ -6,18 +6,19 @@ Runs on port 5000
 Now with MongoDB support!
 """
 
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
+import atexit
 import csv
-import json
 import os
 import sys
+import tempfile
 from datetime import datetime, timedelta
 from collections import defaultdict
 from typing import Dict, Optional, List
 import logging
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import ConnectionFailure, PyMongoError
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
 from dotenv import load_dotenv
 import numpy as np  # Added numpy import for type conversion
 
@@ -34,7 +35,22 @@ load_dotenv()
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from analytics import create_analytics_system
-from chart_generator import ChartGenerator
+from data_sources import CSVDataSource, MongoDataSource, ParquetDataSource, SnapshotDataSource
+from ingest_buffer import IngestBuffer, document_to_csv_row
+from readings import build_document, parse_ndjson, parse_reading_timestamp, validate_reading, validate_readings
+from latest_cache import LatestReadingsCache, format_reading
+from live_stream import EVENT_TYPES, CollectionTailer, LiveStreamHub
+from shared_state import acquire_leader, get_counters, is_multi_worker
+from subsystems import LOADING, PENDING, SubsystemRegistry
+import mongo_registry
+from rollups import RollupStore, raw_totals
+from archive import ParquetArchive, ARCHIVE_AVAILABLE
+from mongo_reader import READING_FIELDS, columns_to_rows, read_page
+from pagination import KEYSET_SORT, encode_cursor, keyset_filter
+from response_cache import ResponseCache, cached_response
+from downsampling import DOWNSAMPLING_METHODS, downsample
+from exports import (EXPORT_FORMATS, ENCODERS, PARQUET_EXPORT_AVAILABLE, gzip_stream,
+                     iter_archive_frames, iter_csv_frames, iter_mongodb_frames)
 
 def convert_to_json_serializable(obj):
     """
@@ -55,14 +71,18 @@ def convert_to_json_serializable(obj):
     else:
         return obj
 
+def date_range_error(start_date, end_date) -> Optional[str]:
+    """Why a startDate/endDate pair cannot be served (None when both are YYYY-MM-DD days)"""
+    for name, value in (('startDate', start_date), ('endDate', end_date)):
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return f'{name} must be a date in YYYY-MM-DD format'
+    return None
+
+# detect (ultralytics) is imported by the disease_detection subsystem, see load_disease_detection()
 sys.path.append(os.path.join(os.path.dirname(__file__), 'disease_detection'))
-try:
-    from detect import TobaccoDiseaseDetector
-    DISEASE_DETECTION_AVAILABLE = True
-    logger.info("✓ Disease detection module loaded")
-except ImportError as e:
-    DISEASE_DETECTION_AVAILABLE = False
-    logger.warning(f"⚠ Disease detection module not available: {e}")
+DISEASE_DETECTION_AVAILABLE = False
 
 # Configuration
 CSV_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "crop_data.csv")
@@ -72,6 +92,68 @@ MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 MONGODB_DATABASE = os.getenv('MONGODB_DATABASE', 'cropiot')
 MONGODB_COLLECTION = os.getenv('MONGODB_COLLECTION', 'sensor_data')
 
+# Buffered ingestion: readings are written in batches by a background thread
+INGEST_BUFFER_ENABLED = os.getenv('INGEST_BUFFER_ENABLED', 'true').lower() == 'true'
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '500'))
+INGEST_FLUSH_INTERVAL = float(os.getenv('INGEST_FLUSH_INTERVAL', '1.0'))
+INGEST_MAX_QUEUE = int(os.getenv('INGEST_MAX_QUEUE', '50000'))
+# Batches MongoDB cannot take are retried, then appended to the CSV file
+INGEST_RETRY_ATTEMPTS = int(os.getenv('INGEST_RETRY_ATTEMPTS', '5'))
+INGEST_RETRY_BACKOFF = float(os.getenv('INGEST_RETRY_BACKOFF', '1.0'))
+BULK_MAX_READINGS = int(os.getenv('BULK_MAX_READINGS', '5000'))
+
+# Pre-aggregated time-bucket rollups (MongoDB only)
+ROLLUPS_ENABLED = os.getenv('ROLLUPS_ENABLED', 'true').lower() == 'true'
+ROLLUP_GRANULARITIES = [g.strip() for g in os.getenv('ROLLUP_GRANULARITIES', 'hour,day').split(',') if g.strip()]
+# Seconds between passes that recompute rollup buckets whose live update failed
+ROLLUP_REPAIR_INTERVAL = float(os.getenv('ROLLUP_REPAIR_INTERVAL', '60'))
+
+# Shared in-memory DataFrame snapshot for the analytics endpoints
+ANALYTICS_SNAPSHOT_ENABLED = os.getenv('ANALYTICS_SNAPSHOT_ENABLED', 'true').lower() == 'true'
+ANALYTICS_SNAPSHOT_TTL = float(os.getenv('ANALYTICS_SNAPSHOT_TTL', '0'))  # seconds between full reloads, 0 never
+ANALYTICS_SNAPSHOT_DAYS = int(os.getenv('ANALYTICS_SNAPSHOT_DAYS', '90'))  # days held in memory, 0 keeps all history
+
+# Partitioned Parquet archive (cold store written by the ingest path)
+ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'true').lower() == 'true'
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'archive'))
+ARCHIVE_FLUSH_ROWS = int(os.getenv('ARCHIVE_FLUSH_ROWS', '5000'))
+ARCHIVE_FLUSH_INTERVAL = float(os.getenv('ARCHIVE_FLUSH_INTERVAL', '60'))
+
+# Response cache for polled GET endpoints
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '30'))
+
+# Live push channel (/api/stream)
+LIVE_STREAM_ENABLED = os.getenv('LIVE_STREAM_ENABLED', 'true').lower() == 'true'
+LIVE_STREAM_MAX_CLIENTS = int(os.getenv('LIVE_STREAM_MAX_CLIENTS', '100'))
+LIVE_STREAM_QUEUE = int(os.getenv('LIVE_STREAM_QUEUE', '500'))  # pending events per client
+LIVE_STREAM_HEARTBEAT = float(os.getenv('LIVE_STREAM_HEARTBEAT', '15'))
+# Multi-worker mode: how often each worker picks up readings stored by the others
+SHARED_POLL_INTERVAL = float(os.getenv('SHARED_POLL_INTERVAL', '1.0'))
+# Also follow the collection when another process (async_ingest.py) stores readings
+FOLLOW_EXTERNAL_WRITES = os.getenv('FOLLOW_EXTERNAL_WRITES', 'false').lower() == 'true'
+LEADER_LOCK_FILE = os.getenv('LEADER_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'cropiot-api-leader.lock'))
+
+# Startup: 'background' initializes subsystems (storage, models, Earth Engine) on
+# threads so /health answers at once; 'eager' loads everything during import
+STARTUP_MODE = os.getenv('STARTUP_MODE', 'background')
+STARTUP_WAIT_TIMEOUT = float(os.getenv('STARTUP_WAIT_TIMEOUT', '30'))  # requests wait this long for storage
+SUBSYSTEM_WAIT_TIMEOUT = float(os.getenv('SUBSYSTEM_WAIT_TIMEOUT', '5'))  # ...and for models / water balance
+
+# Plots per /api/water-balance/batch request (all fetched in one Earth Engine request per product)
+WATER_BALANCE_BATCH_MAX_PLOTS = int(os.getenv('WATER_BALANCE_BATCH_MAX_PLOTS', '500'))
+
+# MongoDB read bounds: readings per request without a cursor / at most / per round-trip
+READ_DEFAULT_LIMIT = int(os.getenv('READ_DEFAULT_LIMIT', '1000'))
+READ_MAX_LIMIT = int(os.getenv('READ_MAX_LIMIT', '10000'))
+READ_BATCH_SIZE = int(os.getenv('READ_BATCH_SIZE', '1000'))
+
+# Chart payload bound: points per sensor series returned by /api/chart-data
+CHART_MAX_POINTS = int(os.getenv('CHART_MAX_POINTS', '1000'))  # 0 returns every reading
+CHART_METRICS = ['soil_moisture', 'ph', 'temperature', 'humidity']
+
 DISEASE_MODEL_PATH = os.getenv('DISEASE_MODEL_PATH', './disease_detection/runs/train/disease_detection/weights/best.pt')
 DISEASE_CONFIDENCE_THRESHOLD = float(os.getenv('DISEASE_CONFIDENCE_THRESHOLD', '0.25'))
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
@@ -90,7 +172,11 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app)  # Enable CORS for Next.js frontend
+CORS(app, expose_headers=['X-Next-Cursor'])  # Enable CORS for Next.js frontend
+
+# Deferred initialization; every subsystem is registered next to its loader
+# and started at the end of this module
+subsystems = SubsystemRegistry(background=STARTUP_MODE != 'eager')
 
 mongo_client = None
 mongo_db = None
@@ -99,29 +185,44 @@ mongo_collection = None
 disease_collection = None
 disease_detector = None
 
+
+def load_disease_detection():
+    """Import the YOLO detector (ultralytics) and load the trained model"""
+    global DISEASE_DETECTION_AVAILABLE, disease_detector
+
+    try:
+        from detect import TobaccoDiseaseDetector
+    except ImportError as e:
+        logger.warning(f"⚠ Disease detection module not available: {e}")
+        return False
+
+    DISEASE_DETECTION_AVAILABLE = True
+    logger.info("✓ Disease detection module loaded")
+
+    if not os.path.exists(DISEASE_MODEL_PATH):
+        logger.warning(f"⚠ Disease model not found at {DISEASE_MODEL_PATH}. Train it first.")
+        return False
+
+    disease_detector = TobaccoDiseaseDetector(DISEASE_MODEL_PATH, conf_threshold=DISEASE_CONFIDENCE_THRESHOLD)
+
+
+subsystems.add('disease_detection', load_disease_detection)
+
+
 def init_mongodb():
     """Initialize MongoDB connection"""
     global mongo_client, mongo_db, mongo_collection, disease_collection
     
     try:
-        mongo_client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-        # Test connection
-        mongo_client.admin.command('ping')
+        # Shared client (pool, timeouts, compression from MONGODB_* settings);
+        # the water balance API and predictors reuse it
+        mongo_client = mongo_registry.ping(MONGODB_URI)
         
         mongo_db = mongo_client[MONGODB_DATABASE]
         mongo_collection = mongo_db[MONGODB_COLLECTION]
         
         disease_collection = mongo_db['disease_detections']
         
-        # Create indexes for better query performance
-        mongo_collection.create_index([('timestamp', DESCENDING)])
-        mongo_collection.create_index([('sensor_id', ASCENDING)])
-        mongo_collection.create_index([('sensor_id', ASCENDING), ('timestamp', DESCENDING)])
-        
-        disease_collection.create_index([('timestamp', DESCENDING)])
-        disease_collection.create_index([('disease_type', ASCENDING)])
-        disease_collection.create_index([('timestamp', DESCENDING), ('disease_type', ASCENDING)])
-        
         logger.info(f"✓ Connected to MongoDB: {MONGODB_DATABASE}.{MONGODB_COLLECTION}")
         logger.info(f"✓ Disease collection: {MONGODB_DATABASE}.disease_detections")
         logger.info(f"✓ MongoDB URI: {MONGODB_URI.split('@')[-1] if '@' in MONGODB_URI else MONGODB_URI}")
@@ -136,12 +237,48 @@ def init_mongodb():
         logger.warning("⚠ Falling back to CSV storage")
         return False
 
-# Initialize MongoDB on startup
-mongodb_available = init_mongodb()
+def create_mongodb_indexes():
+    """Create indexes for better query performance (no-op when they exist)"""
+    if not mongodb_available:
+        return False
+
+    mongo_collection.create_index([('timestamp', DESCENDING)])
+    mongo_collection.create_index([('sensor_id', ASCENDING)])
+    mongo_collection.create_index([('sensor_id', ASCENDING), ('timestamp', DESCENDING)])
+    # Keyset pagination order (newest first, _id breaks timestamp ties)
+    mongo_collection.create_index([('timestamp', DESCENDING), ('_id', DESCENDING)])
+    mongo_collection.create_index([('sensor_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)])
+
+    disease_collection.create_index([('timestamp', DESCENDING)])
+    disease_collection.create_index([('disease_type', ASCENDING)])
+    disease_collection.create_index([('timestamp', DESCENDING), ('disease_type', ASCENDING)])
+    disease_collection.create_index([('timestamp', DESCENDING), ('_id', DESCENDING)])
+    logger.info("✓ MongoDB indexes ensured")
+
+# Storage stack, set up by init_storage() when the 'storage' subsystem loads
+mongodb_available = False
+is_leader = True
+follow_shared_writes = False
+parquet_archive = None
+CSV_BACKUP_ENABLED = True
+rollup_store = None
+analytics_source = None
+analytics_engine = None
+yield_estimator = None
+chart_generator = None
+data_collector = None
+collection_tailers = []
+
+# Latest reading per sensor, seeded once and then kept current by the DataCollector
+latest_cache = LatestReadingsCache()
+live_hub = LiveStreamHub(
+    max_clients=LIVE_STREAM_MAX_CLIENTS,
+    max_queue=LIVE_STREAM_QUEUE,
+    heartbeat=LIVE_STREAM_HEARTBEAT
+) if LIVE_STREAM_ENABLED else None
+if live_hub is not None:
+    atexit.register(live_hub.close)
 
-# Initialize analytics (still uses CSV for now, can be migrated later)
-analytics_engine, yield_estimator = create_analytics_system(CSV_FILE)
-chart_generator = ChartGenerator(analytics_engine)
 
 class DataCollector:
     """Collects and processes sensor data from LoRa WiFi Bridge"""
@@ -149,20 +286,51 @@ class DataCollector:
     def __init__(self, csv_file: str, use_mongodb: bool = True):
         self.csv_file = csv_file
         self.use_mongodb = use_mongodb and mongodb_available
+        self.csv_backup = CSV_BACKUP_ENABLED or not self.use_mongodb
         
-        # Ensure CSV exists as backup
+        # Ensure CSV exists as backup (and as the fallback for readings MongoDB rejects)
         self.ensure_csv_exists()
         
         self.stats = {
-            'total_received': 0,
-            'total_saved': 0,
-            'errors': 0,
             'last_sensor_id': None,
             'last_update': None,
             'storage_type': 'mongodb' if self.use_mongodb else 'csv'
         }
-        
-        logger.info(f"✓ DataCollector initialized with {self.stats['storage_type'].upper()} storage")
+
+        # total_received/total_saved/errors plus the generation counters that
+        # caches compare against; shared by all workers under gunicorn
+        self.counters = get_counters()
+
+        self.buffer = None
+        if INGEST_BUFFER_ENABLED:
+            self.buffer = IngestBuffer(
+                collection=mongo_collection if self.use_mongodb else None,
+                csv_file=self.csv_file if self.csv_backup else None,
+                batch_size=INGEST_BATCH_SIZE,
+                flush_interval=INGEST_FLUSH_INTERVAL,
+                max_queue=INGEST_MAX_QUEUE,
+                fallback_file=self.csv_file,
+                retry_attempts=INGEST_RETRY_ATTEMPTS,
+                retry_backoff=INGEST_RETRY_BACKOFF
+            )
+            self.buffer.add_listener(self._on_batch_written)
+            # The archive gets every queued reading, so it backs up the ingest
+            # path even when MongoDB rejects or loses a batch
+            self.buffer.add_backup(self.archive)
+            self.buffer.start()
+
+        logger.info(f"✓ DataCollector initialized with {self.stats['storage_type'].upper()} storage"
+                    f"{' (buffered)' if self.buffer else ''}")
+
+    @property
+    def generation(self) -> int:
+        """Incremented whenever new readings are stored"""
+        return self.counters.get('generation')
+
+    @property
+    def disease_generation(self) -> int:
+        """Incremented whenever a disease detection is stored"""
+        return self.counters.get('disease_generation')
     
     def ensure_csv_exists(self):
         """Create CSV file with headers if it doesn't exist (backup storage)"""
@@ -177,35 +345,44 @@ class DataCollector:
     
     def validate_sensor_data(self, data: Dict) -> tuple[bool, Optional[str]]:
         """Validate sensor data structure and required fields"""
-        if 'id' not in data:
-            return False, "Missing required 'id' field"
-        
-        if not data['id'] or str(data['id']).strip() == '':
-            return False, "Sensor ID cannot be empty"
-        
-        return True, None
-    
-    def save_to_mongodb(self, data: Dict) -> bool:
-        """Save sensor data to MongoDB"""
+        return validate_reading(data)
+
+    def validate_sensor_batch(self, items: List) -> tuple[List[tuple[bool, Optional[str]]], List[Optional[datetime]]]:
+        """Validate a list of readings, returning (is_valid, error) and the parsed timestamp per item"""
+        return validate_readings(items)
+
+    def build_document(self, data: Dict, timestamp: Optional[datetime] = None) -> Dict:
+        """Build the storage document for a validated reading"""
+        return build_document(data, timestamp)
+
+    def archive(self, documents: List[Dict]):
+        """Hand readings to the Parquet archive"""
+        if parquet_archive is not None:
+            parquet_archive.append(documents)
+
+    def _on_batch_written(self, documents: List[Dict]):
+        """Update statistics after the ingest buffer has written a batch"""
+        latest_cache.update(documents)
+        if rollup_store is not None:
+            rollup_store.update(documents)
+        self.counters.incr('generation')
+
+        last = documents[-1]
+        self.counters.incr('total_saved', len(documents))
+        self.stats['last_sensor_id'] = last['sensor_id']
+        self.stats['last_update'] = last['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
+
+    def save_to_mongodb(self, data: Dict, document: Optional[Dict] = None) -> bool:
+        """Save sensor data to MongoDB (the given document when it is already built)"""
         try:
-            timestamp = datetime.now()
-            
-            document = {
-                'timestamp': timestamp,
-                'sensor_id': data.get('id', 'Unknown'),
-                'soil_moisture': data.get('soil_moisture', None),
-                'ph': data.get('ph', None),
-                'temperature': data.get('temperature', None),
-                'humidity': data.get('humidity', None),
-                'rssi': data.get('rssi', 0),
-                'snr': data.get('snr', 0),
-                'created_at': timestamp
-            }
-            
+            if document is None:
+                document = self.build_document(data)
+            timestamp = document['timestamp']
+
             result = mongo_collection.insert_one(document)
             
             if result.inserted_id:
-                self.stats['total_saved'] += 1
+                self.counters.incr('total_saved')
                 self.stats['last_sensor_id'] = data.get('id')
                 self.stats['last_update'] = timestamp.strftime('%Y-%m-%d %H:%M:%S')
                 
@@ -225,25 +402,18 @@ class DataCollector:
             logger.error(f"✗ Error saving to MongoDB: {e}")
             return False
     
-    def save_to_csv(self, data: Dict) -> bool:
+    def save_to_csv(self, data: Dict, document: Optional[Dict] = None) -> bool:
         """Save sensor data to CSV file (backup or fallback storage)"""
         try:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            if document is None:
+                document = self.build_document(data)
+            timestamp = document['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
             
             with open(self.csv_file, 'a', newline='') as file:
                 writer = csv.writer(file)
-                writer.writerow([
-                    timestamp,
-                    data.get('id', 'Unknown'),
-                    data.get('soil_moisture', -999),
-                    data.get('ph', -999),
-                    data.get('temperature', -999),
-                    data.get('humidity', -999),
-                    data.get('rssi', 0),
-                    data.get('snr', 0)
-                ])
+                writer.writerow(document_to_csv_row(document))
             
-            self.stats['total_saved'] += 1
+            self.counters.incr('total_saved')
             self.stats['last_sensor_id'] = data.get('id')
             self.stats['last_update'] = timestamp
             
@@ -264,7 +434,7 @@ class DataCollector:
             # Validate data
             is_valid, error_msg = self.validate_sensor_data(data)
             if not is_valid:
-                self.stats['errors'] += 1
+                self.counters.incr('errors')
                 logger.warning(f"✗ Invalid data received: {error_msg}")
                 return False, error_msg
             
@@ -274,44 +444,337 @@ class DataCollector:
                        f"Humidity={data.get('humidity', 'N/A')}%, "
                        f"Soil={data.get('soil_moisture', 'N/A')}%, "
                        f"pH={data.get('ph', 'N/A')}")
-            
-            # Save to primary storage (MongoDB or CSV)
+
+            document = self.build_document(data)
+
+            # Hand the reading to the write buffer; it is stored with the next batch
+            if self.buffer is not None and self.buffer.put(document):
+                self.counters.incr('total_received')
+                self.publish([document])
+                return True, "Data received and queued for storage"
+
+            if self.buffer is not None:
+                logger.warning("⚠ Ingest buffer full, writing reading synchronously")
+
+            # Save the same document to primary storage (MongoDB or CSV), so caches,
+            # rollups, the archive and the live stream see exactly what was stored
             if self.use_mongodb:
-                success = self.save_to_mongodb(data)
+                success = self.save_to_mongodb(data, document)
                 # Also save to CSV as backup
-                self.save_to_csv(data)
+                if self.csv_backup:
+                    self.save_to_csv(data, document)
             else:
-                success = self.save_to_csv(data)
+                success = self.save_to_csv(data, document)
             
             if success:
-                self.stats['total_received'] += 1
+                self.counters.incr('total_received')
+                latest_cache.update([document])
+                if rollup_store is not None and self.use_mongodb:
+                    rollup_store.update([document])
+                self.archive([document])
+                self.counters.incr('generation')
+                self.publish([document])
                 return True, "Data received and saved successfully"
             else:
-                self.stats['errors'] += 1
+                self.counters.incr('errors')
                 return False, "Failed to save data"
             
         except Exception as e:
-            self.stats['errors'] += 1
+            self.counters.incr('errors')
             logger.error(f"✗ Error processing sensor data: {e}")
             return False, str(e)
     
+    def save_batch(self, documents: List[Dict]) -> Dict[int, str]:
+        """
+        Save a batch of documents synchronously (one insert_many, one CSV append)
+
+        Returns the error of each document that was not stored, by index; an
+        unordered insert stores the rest even when some documents fail.
+        """
+        failed = {}
+        if self.use_mongodb:
+            try:
+                mongo_collection.insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                failed = {err['index']: "Failed to save data" for err in e.details.get('writeErrors', [])}
+                logger.error(f"✗ MongoDB batch error: {len(failed)} of {len(documents)} readings failed")
+            except PyMongoError as e:
+                logger.error(f"✗ MongoDB batch error: {e}")
+                return {index: "Failed to save data" for index in range(len(documents))}
+
+        stored = [doc for index, doc in enumerate(documents) if index not in failed]
+
+        if self.csv_backup and stored:
+            try:
+                with open(self.csv_file, 'a', newline='') as file:
+                    csv.writer(file).writerows(document_to_csv_row(doc) for doc in stored)
+            except Exception as e:
+                if not self.use_mongodb:
+                    # The CSV file is the only store
+                    logger.error(f"✗ Error saving batch: {e}")
+                    return {index: "Failed to save data" for index in range(len(documents))}
+                # MongoDB has the readings; only the backup copy is missing
+                logger.warning(f"⚠ CSV backup append failed for {len(stored)} readings: {e}")
+
+        if stored:
+            self.archive(stored)
+            self._on_batch_written(stored)
+        return failed
+
+    def process_sensor_batch(self, items: List) -> List[Dict]:
+        """Validate and store many readings at once, returning a status per item"""
+        validation, timestamps = self.validate_sensor_batch(items)
+
+        results = []
+        accepted = []
+        documents = []
+        received_at = datetime.now()
+
+        for index, (item, (is_valid, error_msg), timestamp) in enumerate(zip(items, validation, timestamps)):
+            if not is_valid:
+                results.append({'index': index, 'status': 'error', 'message': error_msg})
+                continue
+
+            documents.append(self.build_document(item, timestamp or received_at))
+            accepted.append({'index': index, 'status': 'ok', 'sensor_id': item.get('id')})
+            results.append(accepted[-1])
+
+        rejected = len(items) - len(documents)
+        if rejected:
+            self.counters.incr('errors', rejected)
+            logger.warning(f"✗ Rejected {rejected} of {len(items)} readings in bulk upload")
+
+        if not documents:
+            return results
+
+        logger.info(f"← Received bulk upload: {len(documents)} readings from "
+                    f"{len({doc['sensor_id'] for doc in documents})} sensors")
+
+        # Queue the readings; anything the buffer cannot take is written synchronously
+        queued = 0
+        if self.buffer is not None:
+            for document in documents:
+                if not self.buffer.put(document):
+                    break
+                queued += 1
+
+        failed = {}
+        if queued < len(documents):
+            failed = {queued + index: message
+                      for index, message in self.save_batch(documents[queued:]).items()}
+
+        stored = [doc for index, doc in enumerate(documents) if index not in failed]
+        self.counters.incr('total_received', len(stored))
+        self.publish(stored)
+
+        if failed:
+            self.counters.incr('errors', len(failed))
+            for index, message in failed.items():
+                accepted[index]['status'] = 'error'
+                accepted[index]['message'] = message
+
+        return results
+
+    def publish(self, documents: List[Dict]):
+        """Push accepted readings to live stream subscribers (tailers do it across workers)"""
+        if live_hub is not None and documents and not follow_shared_writes:
+            live_hub.publish_readings(format_reading(doc) for doc in documents)
+
     def get_stats(self) -> Dict:
         """Get collector statistics"""
         stats = {
             **self.stats,
+            **self.counters.as_dict(),
             'csv_file': self.csv_file,
-            'mongodb_connected': mongodb_available
+            'mongodb_connected': mongodb_available,
+            'csv_backup': self.csv_backup,
+            'workers_shared': self.counters.shared
         }
         
+        if self.buffer is not None:
+            stats['buffer'] = self.buffer.get_stats()
+
         if mongodb_available:
             try:
-                stats['mongodb_count'] = mongo_collection.count_documents({})
+                stats['mongodb_count'] = mongo_collection.estimated_document_count()
             except:
                 stats['mongodb_count'] = 'error'
-        
+
         return stats
 
-data_collector = DataCollector(CSV_FILE, use_mongodb=True)
+    def close(self):
+        """Flush buffered readings, release the CSV writer and write pending archive rows"""
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if parquet_archive is not None:
+            parquet_archive.close()
+
+
+def format_detection(doc: Dict) -> Dict:
+    """Stored disease detection in the /api/detect-disease response layout"""
+    return {
+        'timestamp': doc['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+        'sensor_id': doc.get('sensor_id', 'unknown'),
+        'disease_type': doc.get('disease_type'),
+        'confidence': doc.get('confidence'),
+        'num_detections': doc.get('num_detections'),
+        'detections': doc.get('detections', []),
+        'image_filename': doc.get('image_filename'),
+        'annotated_image_path': doc.get('annotated_image_path')
+    }
+
+
+def on_shared_readings(documents: List[Dict]):
+    """Readings stored by any worker: keep the latest cache and live stream complete"""
+    if not documents:
+        return
+    latest_cache.update(documents)
+    # Readings from outside the DataCollector (the async ingest service) must still
+    # refresh the analytics snapshot and the cached responses; under gunicorn the
+    # storing worker already bumped the shared counter, one more bump is harmless
+    data_collector.counters.incr('generation')
+    if live_hub is not None:
+        live_hub.publish_readings(format_reading(doc) for doc in documents)
+
+
+def on_shared_detections(documents: List[Dict]):
+    """Disease detections stored by any worker"""
+    for doc in documents:
+        live_hub.publish('disease', doc.get('sensor_id'), format_detection(doc))
+
+
+def init_storage():
+    """
+    Connect the storage stack: MongoDB (or the CSV fallback), archive,
+    caches, rollups, analytics and the DataCollector
+
+    Runs as the 'storage' subsystem; requests other than /health wait for it.
+    """
+    global mongodb_available, is_leader, follow_shared_writes, parquet_archive, CSV_BACKUP_ENABLED
+    global rollup_store, analytics_source, analytics_engine, yield_estimator, chart_generator
+    global data_collector
+
+    mongodb_available = init_mongodb()
+
+    # Before anything below queries the collections: the latest-reading seed hints
+    # the (sensor_id, timestamp) index, pagination and rollups rely on the others
+    if mongodb_available:
+        try:
+            create_mongodb_indexes()
+        except PyMongoError as e:
+            logger.error(f"✗ Failed to create MongoDB indexes: {e}")
+
+    # Under gunicorn every worker runs this module. Maintenance that must not run
+    # twice (CSV import, archive compaction, rollup backfill) is left to the worker
+    # holding the leader lock; a single process is always the leader.
+    is_leader = acquire_leader(LEADER_LOCK_FILE)
+
+    # Workers learn about each other's writes by following the shared collection
+    follow_shared_writes = (is_multi_worker() or FOLLOW_EXTERNAL_WRITES) and mongodb_available
+
+    # Parquet archive; on first start it is backfilled from the CSV file in the
+    # background, so a large file does not hold up startup
+    parquet_archive = None
+    if ARCHIVE_ENABLED and ARCHIVE_AVAILABLE:
+        try:
+            parquet_archive = ParquetArchive(ARCHIVE_DIR, flush_rows=ARCHIVE_FLUSH_ROWS,
+                                             flush_interval=ARCHIVE_FLUSH_INTERVAL, compaction=is_leader)
+            if is_leader:
+                # No-op once an import has finished; an interrupted one resumes
+                parquet_archive.start_import(CSV_FILE)
+            parquet_archive.start()
+        except Exception as e:
+            logger.error(f"✗ Parquet archive unavailable: {e}")
+            parquet_archive = None
+    elif ARCHIVE_ENABLED:
+        logger.warning("⚠ pyarrow not installed, Parquet archive disabled")
+
+    # The CSV file stays the primary store without MongoDB; next to MongoDB and the
+    # archive (which the ingest buffer feeds with every queued reading) it is an
+    # optional extra backup. Without the buffer the archive only holds stored
+    # readings, so the CSV backup stays on.
+    archive_backs_up_ingest = parquet_archive is not None and INGEST_BUFFER_ENABLED
+    CSV_BACKUP_ENABLED = os.getenv('CSV_BACKUP_ENABLED',
+                                   'false' if archive_backs_up_ingest else 'true').lower() == 'true'
+
+    # Latest reading per sensor, seeded once and then kept current by the DataCollector
+    if mongodb_available:
+        latest_cache.seed_from_mongodb(mongo_collection)
+    else:
+        latest_cache.seed_from_csv(CSV_FILE)
+
+    # Per-sensor hour/day buckets, updated with every stored batch
+    rollup_store = None
+    if mongodb_available and ROLLUPS_ENABLED:
+        try:
+            rollup_store = RollupStore(mongo_db, ROLLUP_GRANULARITIES, repair_interval=ROLLUP_REPAIR_INTERVAL)
+            rollup_store.start(mongo_collection, rebuild=is_leader)
+        except (PyMongoError, ValueError) as e:
+            logger.error(f"✗ Sensor rollups unavailable: {e}")
+            rollup_store = None
+
+    # Initialize analytics: raw readings come from the primary store with filters pushed
+    # down, long-window aggregates from rollups
+    if mongodb_available:
+        analytics_source = MongoDataSource(mongo_collection)
+    elif parquet_archive is not None:
+        analytics_source = ParquetDataSource(parquet_archive)
+    else:
+        analytics_source = CSVDataSource(CSV_FILE)
+
+    if ANALYTICS_SNAPSHOT_ENABLED:
+        # One cached frame shared by all analytics endpoints; new batches bump the
+        # DataCollector generation (or the archive's own counter when reading the
+        # archive), which triggers an incremental append
+        analytics_source = SnapshotDataSource(
+            analytics_source,
+            ttl=ANALYTICS_SNAPSHOT_TTL,
+            horizon_days=ANALYTICS_SNAPSHOT_DAYS or None,
+            version_fn=None if isinstance(analytics_source, ParquetDataSource) else lambda: data_collector.generation
+        )
+    analytics_engine, yield_estimator = create_analytics_system(
+        CSV_FILE, rollups=rollup_store, data_source=analytics_source, latest=latest_cache
+    )
+
+    # matplotlib is only imported here, off the import path
+    from chart_generator import ChartGenerator
+    chart_generator = ChartGenerator(analytics_engine)
+
+    data_collector = DataCollector(CSV_FILE, use_mongodb=True)
+    atexit.register(data_collector.close)
+
+    if follow_shared_writes:
+        collection_tailers.append(CollectionTailer(mongo_collection, on_shared_readings,
+                                                   interval=SHARED_POLL_INTERVAL, name='readings-tailer'))
+        if live_hub is not None:
+            collection_tailers.append(CollectionTailer(disease_collection, on_shared_detections,
+                                                       interval=SHARED_POLL_INTERVAL, name='detections-tailer'))
+        for tailer in collection_tailers:
+            tailer.start()
+            atexit.register(tailer.close)
+    elif is_multi_worker():
+        logger.warning("⚠ Multiple workers without MongoDB: each worker only sees the readings it "
+                       "received itself; run a single worker for CSV storage")
+
+
+subsystems.add('storage', init_storage)
+
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    ttl=RESPONSE_CACHE_TTL
+) if RESPONSE_CACHE_ENABLED else None
+
+
+def readings_generation():
+    """Changes whenever sensor readings are stored"""
+    return data_collector.generation
+
+
+def disease_generation():
+    """Changes whenever a disease detection is stored"""
+    return data_collector.disease_generation
 
 class DataHandler:
     """Handles data processing for API endpoints"""
@@ -320,52 +783,62 @@ class DataHandler:
     def read_from_mongodb(limit: Optional[int] = None, 
                          hours: Optional[int] = None,
                          sensor_id: Optional[str] = None) -> List[Dict]:
-        """Read data from MongoDB with optional filters"""
+        """Read the newest readings from MongoDB with optional filters (at most READ_MAX_LIMIT)"""
+        rows, _ = DataHandler.read_page_from_mongodb(limit=limit, hours=hours, sensor_id=sensor_id)
+        return rows
+
+    @staticmethod
+    def read_page_from_mongodb(limit: Optional[int] = None,
+                               hours: Optional[int] = None,
+                               sensor_id: Optional[str] = None,
+                               cursor: Optional[str] = None,
+                               fields: Optional[List[str]] = None) -> tuple:
+        """
+        Read one newest-first page of readings from MongoDB
+
+        Every read is bounded: limit defaults to READ_DEFAULT_LIMIT and is capped
+        at READ_MAX_LIMIT; older readings are reached with the returned cursor.
+
+        Returns:
+            (rows, next cursor token or None)
+
+        Raises:
+            ValueError: If cursor is malformed
+        """
         if not mongodb_available:
-            return []
-        
+            return [], None
+
+        limit = max(1, min(limit or READ_DEFAULT_LIMIT, READ_MAX_LIMIT))
+        fields = fields or READING_FIELDS
+
+        query = {}
+        if hours:
+            query['timestamp'] = {'$gte': datetime.now() - timedelta(hours=hours)}
+        if sensor_id:
+            query['sensor_id'] = sensor_id
+
         try:
-            query = {}
-            
-            # Filter by time if specified
-            if hours:
-                cutoff_time = datetime.now() - timedelta(hours=hours)
-                query['timestamp'] = {'$gte': cutoff_time}
-            
-            # Filter by sensor_id if specified
-            if sensor_id:
-                query['sensor_id'] = sensor_id
-            
-            # Query MongoDB
-            cursor = mongo_collection.find(query).sort('timestamp', DESCENDING)
-            
-            if limit:
-                cursor = cursor.limit(limit)
-            
-            data = []
-            for doc in cursor:
-                # Convert MongoDB document to dict format matching CSV structure
-                row = {
-                    'timestamp': doc['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
-                    'sensor_id': doc['sensor_id'],
-                    'soil_moisture': doc.get('soil_moisture'),
-                    'ph': doc.get('ph'),
-                    'temperature': doc.get('temperature'),
-                    'humidity': doc.get('humidity'),
-                    'rssi': doc.get('rssi', 0),
-                    'snr': doc.get('snr', 0)
-                }
-                data.append(row)
-            
-            return data
-            
+            columns, next_cursor = read_page(mongo_collection, query, limit, cursor=cursor,
+                                             fields=fields, batch_size=READ_BATCH_SIZE)
+            return columns_to_rows(columns, fields), next_cursor
+
         except PyMongoError as e:
             logger.error(f"✗ MongoDB read error: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"✗ Error reading from MongoDB: {e}")
-            return []
-    
+            return [], None
+
+    @staticmethod
+    def get_sensor_totals(sensor_id: str, hours: int) -> Dict:
+        """
+        Reading count and per-metric count/sum for one sensor over the last N hours
+
+        Served from the hourly rollups (plus the partial first hour from raw
+        readings) when they are ready, otherwise from one aggregation.
+        """
+        cutoff_time = datetime.now() - timedelta(hours=hours)
+        if rollup_store is not None and rollup_store.is_ready('hour'):
+            return rollup_store.window_totals(mongo_collection, cutoff_time, sensor_id=sensor_id)
+        return raw_totals(mongo_collection, start=cutoff_time, sensor_id=sensor_id)
+
     @staticmethod
     def read_csv_data():
         """Read and parse CSV data (fallback method)"""
@@ -392,7 +865,7 @@ class DataHandler:
     
     @staticmethod
     def read_data():
-        """Read data from primary storage (MongoDB or CSV)"""
+        """Read data from primary storage (MongoDB: newest READ_DEFAULT_LIMIT readings, or CSV)"""
         if mongodb_available:
             return DataHandler.read_from_mongodb()
         else:
@@ -401,6 +874,9 @@ class DataHandler:
     @staticmethod
     def get_latest_readings():
         """Get the most recent reading from each sensor"""
+        if latest_cache.seeded:
+            return latest_cache.get_latest()
+
         if mongodb_available:
             try:
                 # Use MongoDB aggregation for efficient latest reading per sensor
@@ -466,68 +942,95 @@ class DataHandler:
             return list(latest_by_sensor.values())
     
     @staticmethod
-    def get_chart_data(hours=24):
-        """Get data for charts (last N hours)"""
-        if mongodb_available:
-            data = DataHandler.read_from_mongodb(hours=hours)
-        else:
-            # Filter CSV data by time
-            all_data = DataHandler.read_csv_data()
-            cutoff_time = datetime.now() - timedelta(hours=hours)
-            data = []
-            
-            for row in all_data:
-                try:
-                    row_time = datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S')
-                    if row_time >= cutoff_time:
-                        data.append(row)
-                except ValueError:
-                    continue
-        
-        if not data:
+    def get_chart_data(hours=24, resolution=None, max_points=None, method='lttb'):
+        """
+        Get data for charts (last N hours), optionally as hour/day bucket means
+
+        Each sensor series is downsampled to at most max_points points
+        (None or 0 returns every reading)
+        """
+        if resolution and rollup_store is not None and rollup_store.is_ready(resolution):
+            return DataHandler.get_rollup_chart_data(hours, resolution, max_points, method)
+
+        cutoff_time = datetime.now() - timedelta(hours=hours)
+        df = analytics_source.load(start=cutoff_time, columns=CHART_METRICS)
+        if df.empty:
             return {}
-        
-        # Group by sensor
-        chart_data = defaultdict(lambda: {
-            'timestamps': [],
-            'soil_moisture': [],
-            'ph': [],
-            'temperature': [],
-            'humidity': []
-        })
-        
-        for row in data:
-            if 'sensor_id' not in row:
-                continue
-                
-            sensor_id = row['sensor_id']
-            chart_data[sensor_id]['timestamps'].append(row['timestamp'])
-            chart_data[sensor_id]['soil_moisture'].append(row['soil_moisture'])
-            chart_data[sensor_id]['ph'].append(row['ph'])
-            chart_data[sensor_id]['temperature'].append(row['temperature'])
-            chart_data[sensor_id]['humidity'].append(row['humidity'])
-        
-        return dict(chart_data)
+
+        chart_data = {}
+        for sensor_id, group in df.groupby('sensor_id', sort=False):
+            chart_data[sensor_id] = DataHandler._chart_series(
+                group['timestamp'].to_numpy(dtype='datetime64[ns]'),
+                group[CHART_METRICS].to_numpy(dtype=float),
+                max_points, method
+            )
+
+        return chart_data
+
+    @staticmethod
+    def get_rollup_chart_data(hours, resolution, max_points=None, method='lttb'):
+        """Chart series built from rollup buckets: one point per sensor per bucket"""
+        cutoff_time = datetime.now() - timedelta(hours=hours)
+
+        buckets_by_sensor = defaultdict(lambda: ([], []))
+        for bucket in rollup_store.query(resolution, start=cutoff_time):
+            timestamps, values = buckets_by_sensor[bucket['sensor_id']]
+            timestamps.append(bucket['bucket'])
+            values.append([
+                bucket['metrics'][metric]['mean'] if bucket['metrics'][metric] else np.nan
+                for metric in CHART_METRICS
+            ])
+
+        return {
+            sensor_id: DataHandler._chart_series(
+                np.array(timestamps, dtype='datetime64[ns]'),
+                np.round(np.array(values, dtype=float), 2),
+                max_points, method
+            )
+            for sensor_id, (timestamps, values) in buckets_by_sensor.items()
+        }
+
+    @staticmethod
+    def _chart_series(timestamps: np.ndarray, values: np.ndarray,
+                      max_points: Optional[int], method: str) -> Dict:
+        """Downsample one sensor series and convert it to JSON lists (NaN -> None)"""
+        x, ys = downsample(timestamps.astype('int64'), values, max_points, method)
+        if method == 'mean' and len(x) < len(timestamps):
+            ys = np.round(ys, 2)
+
+        timestamps = np.datetime_as_string(x.astype('datetime64[ns]'), unit='s')
+        series = {'timestamps': np.char.replace(timestamps, 'T', ' ').tolist()}
+        for i, metric in enumerate(CHART_METRICS):
+            column = ys[:, i].astype(object)
+            column[np.isnan(ys[:, i])] = None
+            series[metric] = column.tolist()
+
+        return series
     
     @staticmethod
     def get_statistics():
         """Get basic statistics about the data"""
         if mongodb_available:
             try:
-                total_readings = mongo_collection.count_documents({})
-                
-                # Get unique sensors
-                sensors = mongo_collection.distinct('sensor_id')
+                # Collection metadata count: no scan, exact after a clean shutdown
+                total_readings = mongo_collection.estimated_document_count()
                 
-                # Get latest timestamp
-                latest_doc = mongo_collection.find_one(sort=[('timestamp', DESCENDING)])
-                last_update = latest_doc['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if latest_doc else 'Never'
+                if latest_cache.seeded:
+                    # Sensors and time range are maintained by the ingest path
+                    sensors = latest_cache.sensor_ids()
+                    newest = latest_cache.last_update()
+                    oldest = latest_cache.oldest()
+                else:
+                    sensors = mongo_collection.distinct('sensor_id')
+                    latest_doc = mongo_collection.find_one(sort=[('timestamp', DESCENDING)])
+                    oldest_doc = mongo_collection.find_one(sort=[('timestamp', ASCENDING)])
+                    newest = latest_doc['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if latest_doc else None
+                    oldest = oldest_doc['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if oldest_doc else None
                 
-                # Get oldest timestamp
-                oldest_doc = mongo_collection.find_one(sort=[('timestamp', ASCENDING)])
+                last_update = newest or 'Never'
                 
-                if oldest_doc and latest_doc:
-                    data_range = f"{oldest_doc['timestamp'].strftime('%Y-%m-%d')} to {latest_doc['timestamp'].strftime('%Y-%m-%d')}"
+                if oldest and newest:
+                    data_range = f"{oldest[:10]} to {newest[:10]}"
                 else:
                     data_range = 'No data'
                 
@@ -591,19 +1094,44 @@ class DataHandler:
 
 # API Routes
 
+# Endpoints that answer while the storage subsystem is still loading
+STARTUP_EXEMPT_ENDPOINTS = {'health_check', 'get_model_status'}
+
+
+@app.before_request
+def wait_for_storage():
+    """Hold requests until storage is connected (503 after STARTUP_WAIT_TIMEOUT)"""
+    if request.method == 'OPTIONS' or request.endpoint in STARTUP_EXEMPT_ENDPOINTS:
+        return None
+    if subsystems.wait('storage', STARTUP_WAIT_TIMEOUT):
+        return None
+
+    response = jsonify({
+        'error': 'Server is still starting' if subsystems.state('storage') == LOADING else 'Storage unavailable',
+        'subsystems': subsystems.get_stats()
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint; answers during startup with per-subsystem readiness"""
+    ready = subsystems.is_ready('storage')
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if ready else 'starting',
+        'ready': ready,
         'service': 'CropIoT API Server',
         'version': '3.0',
         'storage': 'mongodb' if mongodb_available else 'csv',
         'mongodb_connected': mongodb_available,
-        'collector_stats': data_collector.get_stats()
+        'subsystems': subsystems.get_stats(),
+        'collector_stats': data_collector.get_stats() if ready else None
     })
 
 @app.route('/api/latest', methods=['GET'])
+@cached_response(response_cache, readings_generation)
 def api_latest():
     """Get latest sensor readings"""
     try:
@@ -614,6 +1142,7 @@ def api_latest():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/stats', methods=['GET'])
+@cached_response(response_cache, readings_generation)
 def api_stats():
     """Get statistics"""
     try:
@@ -625,17 +1154,39 @@ def api_stats():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/chart-data', methods=['GET'])
+@cached_response(response_cache, readings_generation)
 def api_chart_data():
-    """Get chart data"""
+    """
+    Get chart data
+    
+    Query parameters:
+        hours: Window length (default 24)
+        resolution: raw (default), minute, hour or day (rollup bucket means)
+        max_points: Points per sensor series (default CHART_MAX_POINTS, 0 = no limit)
+        method: lttb (default, keeps real readings) or mean (time-bucket averages)
+    """
     try:
         hours = request.args.get('hours', 24, type=int)
-        chart_data = DataHandler.get_chart_data(hours)
+        resolution = request.args.get('resolution', 'raw')
+        if resolution not in ('raw', 'minute', 'hour', 'day'):
+            return jsonify({'error': "resolution must be one of raw, minute, hour, day"}), 400
+
+        max_points = request.args.get('max_points', CHART_MAX_POINTS, type=int)
+        method = request.args.get('method', 'lttb')
+        if method not in DOWNSAMPLING_METHODS:
+            return jsonify({'error': f"method must be one of {', '.join(DOWNSAMPLING_METHODS)}"}), 400
+        if max_points < 0 or 0 < max_points < 3:
+            return jsonify({'error': "max_points must be 0 (no limit) or at least 3"}), 400
+
+        chart_data = DataHandler.get_chart_data(hours, None if resolution == 'raw' else resolution,
+                                                max_points, method)
         return jsonify(chart_data)
     except Exception as e:
         logger.error(f"Error in /api/chart-data: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/analytics/daily-averages', methods=['GET'])
+@cached_response(response_cache, readings_generation)
 def api_daily_averages():
     """Get daily averages"""
     try:
@@ -647,6 +1198,7 @@ def api_daily_averages():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/analytics/trends', methods=['GET'])
+@cached_response(response_cache, readings_generation)
 def api_trends():
     """Get trend summary"""
     try:
@@ -657,6 +1209,7 @@ def api_trends():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/analytics/yield-estimates', methods=['GET'])
+@cached_response(response_cache, readings_generation)
 def api_yield_estimates():
     """Get yield estimates for all sensors"""
     try:
@@ -675,6 +1228,7 @@ def api_yield_estimates():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/analytics/sensor-stats', methods=['GET'])
+@cached_response(response_cache, readings_generation)
 def api_sensor_stats():
     """Get sensor statistics"""
     try:
@@ -732,19 +1286,185 @@ def receive_sensor_data():
             'message': str(e)
         }), 500
 
+@app.route('/api/sensor-data/bulk', methods=['POST'])
+def receive_sensor_data_bulk():
+    """
+    Receive many sensor readings in one request from a LoRa gateway
+
+    Accepts a JSON array of readings, an object with a 'readings' array, or an
+    NDJSON body (Content-Type: application/x-ndjson) with one reading per line.
+    Each reading uses the same fields as /api/sensor-data and may carry an
+    optional 'timestamp' (epoch seconds or ISO 8601) for buffered readings.
+
+    Returns per-item status in the same order as the request.
+    """
+    try:
+        parse_errors = {}
+
+        if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+            items, parse_errors = parse_ndjson(request.get_data(as_text=True))
+        else:
+            payload = request.get_json(silent=True)
+            items = payload.get('readings') if isinstance(payload, dict) else payload
+
+        if not isinstance(items, list) or not items:
+            logger.warning("✗ Received empty bulk upload")
+            return jsonify({
+                'status': 'error',
+                'message': 'Expected a non-empty array of readings'
+            }), 400
+
+        if len(items) > BULK_MAX_READINGS:
+            return jsonify({
+                'status': 'error',
+                'message': f'Too many readings ({len(items)}), maximum is {BULK_MAX_READINGS}'
+            }), 413
+
+        results = data_collector.process_sensor_batch(items)
+        for result in results:
+            if result['index'] in parse_errors:
+                result['message'] = parse_errors[result['index']]
+
+        accepted = sum(1 for result in results if result['status'] == 'ok')
+        rejected = len(results) - accepted
+
+        return jsonify({
+            'status': 'success' if rejected == 0 else ('partial' if accepted else 'error'),
+            'received': len(results),
+            'accepted': accepted,
+            'rejected': rejected,
+            'results': results,
+            'storage': 'mongodb' if mongodb_available else 'csv'
+        }), 200 if accepted else 400
+
+    except Exception as e:
+        logger.error(f"✗ Error in /api/sensor-data/bulk endpoint: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/download', methods=['GET'])
 def download_csv():
-    """Download the CSV data file"""
-    if os.path.exists(CSV_FILE):
-        return send_file(CSV_FILE, as_attachment=True, download_name='crop_data.csv')
-    else:
-        return jsonify({'error': 'No data file available'}), 404
+    """
+    Stream stored readings as a file download
+    
+    Query parameters:
+        format: csv (default), ndjson or parquet
+        sensor_id: Only this sensor
+        start, end: Time window (ISO 8601 or epoch seconds; a date-only end is inclusive)
+        compress: gzip (default, when the client accepts it) or none
+    """
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+        if export_format == 'parquet' and not PARQUET_EXPORT_AVAILABLE:
+            return jsonify({'error': 'Parquet export requires pyarrow'}), 400
+
+        bounds = {}
+        for name in ('start', 'end'):
+            value = request.args.get(name)
+            if value is None:
+                bounds[name] = None
+                continue
+            try:
+                # Epoch seconds (any sign), otherwise an ISO 8601 date or time
+                parsed = parse_reading_timestamp(float(value))
+                date_only = False
+            except ValueError:
+                parsed = parse_reading_timestamp(value)
+                date_only = len(value) == 10 and '-' in value
+            if parsed is None:
+                return jsonify({'error': f"Invalid '{name}' value"}), 400
+            if name == 'end' and date_only:
+                parsed += timedelta(days=1)
+            bounds[name] = parsed
+
+        sensor_id = request.args.get('sensor_id')
+
+        if mongodb_available:
+            frames = iter_mongodb_frames(mongo_collection, bounds['start'], bounds['end'], sensor_id)
+        elif parquet_archive is not None:
+            parquet_archive.flush()
+            frames = iter_archive_frames(parquet_archive, bounds['start'], bounds['end'], sensor_id)
+        else:
+            frames = iter_csv_frames(CSV_FILE, bounds['start'], bounds['end'], sensor_id)
+
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        chunks = ENCODERS[export_format](frames)
+        headers = {'Content-Disposition': f'attachment; filename=crop_data.{extension}'}
+
+        # Parquet pages are already compressed
+        if (export_format != 'parquet' and request.args.get('compress', 'gzip') != 'none'
+                and 'gzip' in request.accept_encodings):
+            chunks = gzip_stream(chunks)
+            headers['Content-Encoding'] = 'gzip'
+            headers['Vary'] = 'Accept-Encoding'
+
+        return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+    except Exception as e:
+        logger.error(f"Error in /api/download: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stream', methods=['GET'])
+def api_stream():
+    """
+    Live stream of new readings and disease detections (Server-Sent Events)
+    
+    Query params:
+        - sensor_id: Comma-separated sensor IDs to receive (default: all)
+        - types: Comma-separated event types, reading and/or disease (default: both)
+    
+    Events: 'reading' (same fields as /api/latest), 'disease' (detection
+    result) and 'overflow' ({dropped: n}) when this client fell behind and
+    should refetch. Reconnecting clients resume from Last-Event-ID.
+    """
+    if live_hub is None:
+        return jsonify({'error': 'Live stream disabled'}), 503
+
+    sensor_ids = [s for s in request.args.get('sensor_id', '').split(',') if s]
+    event_types = [t for t in request.args.get('types', '').split(',') if t]
+    unknown = [t for t in event_types if t not in EVENT_TYPES]
+    if unknown:
+        return jsonify({'error': f"types must be among {', '.join(EVENT_TYPES)}"}), 400
+
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    subscription = live_hub.subscribe(sensor_ids, event_types, last_event_id)
+    if subscription is None:
+        return jsonify({'error': 'Too many live stream clients'}), 503
+
+    return Response(
+        live_hub.stream(subscription),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/collector-stats', methods=['GET'])
 def api_collector_stats():
     """Get data collector statistics"""
     try:
-        return jsonify(data_collector.get_stats())
+        stats = data_collector.get_stats()
+        if isinstance(analytics_source, SnapshotDataSource):
+            stats['analytics_snapshot'] = analytics_source.get_stats()
+        if parquet_archive is not None:
+            stats['archive'] = parquet_archive.get_stats()
+        if response_cache is not None:
+            stats['response_cache'] = response_cache.get_stats()
+        if live_hub is not None:
+            stats['live_stream'] = live_hub.get_stats()
+        if mongodb_available:
+            stats['mongodb_pool'] = mongo_registry.get_stats()
+        if WATER_BALANCE_AVAILABLE and water_balance_api.gee_service and water_balance_api.gee_service.cache:
+            stats['gee_cache'] = water_balance_api.gee_service.cache.get_stats()
+        if WATER_BALANCE_AVAILABLE and water_balance_api.gee_service and water_balance_api.gee_service.source:
+            stats['gee_backend'] = water_balance_api.gee_service.source.get_stats()
+        return jsonify(stats)
     except Exception as e:
         logger.error(f"Error in /api/collector-stats: {e}")
         return jsonify({'error': str(e)}), 500
@@ -767,7 +1487,12 @@ def detect_disease():
     """
     try:
         # Check if disease detection is available
-        if not DISEASE_DETECTION_AVAILABLE or disease_detector is None:
+        if not subsystems.wait('disease_detection', SUBSYSTEM_WAIT_TIMEOUT) or disease_detector is None:
+            if subsystems.state('disease_detection') == LOADING:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Disease detection model is still loading. Retry shortly.'
+                }), 503
             return jsonify({
                 'status': 'error',
                 'message': 'Disease detection not available. Please train a model first.'
@@ -817,6 +1542,7 @@ def detect_disease():
             }
             
             disease_collection.insert_one(detection_record)
+            data_collector.counters.incr('disease_generation')
             logger.info(f"✓ Saved disease detection to MongoDB: {result['primary_disease']} ({result['primary_confidence']:.2%})")
         
         # Prepare response
@@ -834,6 +1560,9 @@ def detect_disease():
         
         logger.info(f"✓ Disease detection complete: {result['primary_disease']} ({result['primary_confidence']:.2%})")
         
+        if live_hub is not None and not follow_shared_writes:
+            live_hub.publish('disease', sensor_id, {k: v for k, v in response.items() if k != 'status'})
+        
         return jsonify(response), 200
         
     except Exception as e:
@@ -853,6 +1582,7 @@ def disease_history():
         - sensor_id: Filter by sensor ID
         - disease_type: Filter by disease type
         - days: Filter by last N days
+        - cursor: X-Next-Cursor header of the previous page to continue with older records
     """
     try:
         if not mongodb_available or disease_collection is None:
@@ -862,10 +1592,11 @@ def disease_history():
             }), 503
         
         # Get query parameters
-        limit = request.args.get('limit', 50, type=int)
+        limit = max(1, min(request.args.get('limit', 50, type=int), READ_MAX_LIMIT))
         sensor_id = request.args.get('sensor_id')
         disease_type = request.args.get('disease_type')
         days = request.args.get('days', type=int)
+        cursor = request.args.get('cursor')
         
         # Build query
         query = {}
@@ -880,12 +1611,23 @@ def disease_history():
             cutoff_date = datetime.now() - timedelta(days=days)
             query['timestamp'] = {'$gte': cutoff_date}
         
-        # Query database
-        cursor = disease_collection.find(query).sort('timestamp', DESCENDING).limit(limit)
+        try:
+            after = keyset_filter(cursor)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        if after:
+            query = {'$and': [query, after]} if query else after
+        
+        # Query database (one extra record tells whether another page exists)
+        docs = list(disease_collection.find(query).sort(KEYSET_SORT).limit(limit + 1))
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]['timestamp'], docs[-1]['_id'])
         
         # Format results
         history = []
-        for doc in cursor:
+        for doc in docs:
             record = {
                 'id': str(doc['_id']),
                 'timestamp': doc['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
@@ -898,13 +1640,17 @@ def disease_history():
             }
             history.append(record)
         
-        return jsonify(history), 200
+        response = jsonify(history)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
         
     except Exception as e:
         logger.error(f"Error in /api/disease-history: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/disease-stats', methods=['GET'])
+@cached_response(response_cache, disease_generation)
 def disease_stats():
     """
     Get disease detection statistics
@@ -922,52 +1668,39 @@ def disease_stats():
                 'message': 'Disease statistics not available (MongoDB not connected)'
             }), 503
         
-        # Total detections
-        total_detections = disease_collection.count_documents({})
-        
-        logger.info(f"[v0] Total detections in database: {total_detections}")
-        
-        # Get all unique disease types for debugging
-        all_disease_types = disease_collection.distinct('disease_type')
-        logger.info(f"[v0] All disease types in database: {all_disease_types}")
-        
-        # Disease distribution
+        # Everything comes from one $group pass over the collection
+        seven_days_ago = datetime.now() - timedelta(days=7)
         pipeline = [
             {'$group': {
                 '_id': '$disease_type',
                 'count': {'$sum': 1},
-                'avg_confidence': {'$avg': '$confidence'}
+                'avg_confidence': {'$avg': '$confidence'},
+                'recent': {'$sum': {'$cond': [{'$gte': ['$timestamp', seven_days_ago]}, 1, 0]}},
+                'last_timestamp': {'$max': '$timestamp'}
             }},
             {'$sort': {'count': -1}}
         ]
         
         disease_distribution = []
+        total_detections = 0
+        healthy_count = 0
+        recent_count = 0
+        latest_timestamp = None
         for doc in disease_collection.aggregate(pipeline):
             disease_distribution.append({
                 'disease_type': doc['_id'],
                 'count': doc['count'],
                 'avg_confidence': round(doc['avg_confidence'], 4)
             })
-        
-        healthy_count = disease_collection.count_documents({
-            'disease_type': {'$regex': '^healthy', '$options': 'i'}
-        })
-        
-        logger.info(f"[v0] Healthy count: {healthy_count}")
+            total_detections += doc['count']
+            recent_count += doc['recent']
+            if isinstance(doc['_id'], str) and doc['_id'].lower().startswith('healthy'):
+                healthy_count += doc['count']
+            if doc['last_timestamp'] and (latest_timestamp is None or doc['last_timestamp'] > latest_timestamp):
+                latest_timestamp = doc['last_timestamp']
         
         diseased_count = total_detections - healthy_count
-        
-        logger.info(f"[v0] Diseased count: {diseased_count}")
-        
-        # Recent detections (last 7 days)
-        seven_days_ago = datetime.now() - timedelta(days=7)
-        recent_count = disease_collection.count_documents({
-            'timestamp': {'$gte': seven_days_ago}
-        })
-        
-        # Latest detection
-        latest_doc = disease_collection.find_one(sort=[('timestamp', DESCENDING)])
-        last_detection = latest_doc['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if latest_doc else 'Never'
+        last_detection = latest_timestamp.strftime('%Y-%m-%d %H:%M:%S') if latest_timestamp else 'Never'
         
         stats = {
             'total_detections': total_detections,
@@ -985,6 +1718,7 @@ def disease_stats():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/disease-trends', methods=['GET'])
+@cached_response(response_cache, disease_generation)
 def disease_trends():
     """
     Get disease detection trends over time
@@ -1038,38 +1772,51 @@ def get_sensor_data(sensor_id):
     
     Query params:
         - hours: Number of hours of history to return (default: 24)
-        - limit: Maximum number of readings (default: 100)
+        - limit: Maximum number of readings per page (default: 100)
+        - cursor: next_cursor from the previous page to continue with older readings
     """
     try:
         hours = request.args.get('hours', 24, type=int)
-        limit = request.args.get('limit', 100, type=int)
+        limit = max(1, min(request.args.get('limit', 100, type=int), READ_MAX_LIMIT))
+        cursor = request.args.get('cursor')
         
-        # Get sensor data
-        sensor_data = DataHandler.read_from_mongodb(
-            limit=limit,
-            hours=hours,
-            sensor_id=sensor_id
-        )
-        
-        if not sensor_data:
+        # Get one page of sensor data
+        try:
+            sensor_data, next_cursor = DataHandler.read_page_from_mongodb(
+                limit=limit,
+                hours=hours,
+                sensor_id=sensor_id,
+                cursor=cursor
+            )
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        
+        if not sensor_data and not cursor:
             return jsonify({
                 'status': 'error',
                 'message': f'No data found for sensor {sensor_id}'
             }), 404
         
-        # Calculate statistics for this sensor
-        temps = [d['temperature'] for d in sensor_data if d['temperature'] is not None]
-        humidities = [d['humidity'] for d in sensor_data if d['humidity'] is not None]
-        soil_moistures = [d['soil_moisture'] for d in sensor_data if d['soil_moisture'] is not None]
+        # Statistics cover the whole window, not just this page
+        totals = DataHandler.get_sensor_totals(sensor_id, hours)
+        
+        def average(metric):
+            m = totals['metrics'][metric]
+            return m['sum'] / m['count'] if m['count'] else None
+        
+        latest_reading = latest_cache.get(sensor_id) if latest_cache.seeded else None
+        if latest_reading is None and not cursor:
+            latest_reading = sensor_data[0]
         
         sensor_stats = {
             'sensor_id': sensor_id,
-            'total_readings': len(sensor_data),
-            'latest_reading': sensor_data[0] if sensor_data else None,
-            'avg_temperature': sum(temps) / len(temps) if temps else None,
-            'avg_humidity': sum(humidities) / len(humidities) if humidities else None,
-            'avg_soil_moisture': sum(soil_moistures) / len(soil_moistures) if soil_moistures else None,
-            'readings': sensor_data
+            'total_readings': totals['count'],
+            'latest_reading': latest_reading,
+            'avg_temperature': average('temperature'),
+            'avg_humidity': average('humidity'),
+            'avg_soil_moisture': average('soil_moisture'),
+            'readings': sensor_data,
+            'next_cursor': next_cursor
         }
         
         return jsonify(sensor_stats), 200
@@ -1082,16 +1829,27 @@ def get_sensor_data(sensor_id):
 # WATER BALANCE & PHYSICS-INFORMED ENDPOINTS
 # ============================================================================
 
-# Initialize water balance API
-try:
-    from water_balance_api import get_water_balance_api
+WATER_BALANCE_AVAILABLE = False
+water_balance_api = None
+
+
+def load_water_balance():
+    """Initialize the water balance API (its own MongoDB client plus Earth Engine)"""
+    global water_balance_api, WATER_BALANCE_AVAILABLE
+
+    try:
+        from water_balance_api import get_water_balance_api
+    except ImportError as e:
+        logger.warning(f"Water Balance API not available: {e}")
+        return False
+
     water_balance_api = get_water_balance_api()
+    water_balance_api.rollups = rollup_store
     WATER_BALANCE_AVAILABLE = True
     logger.info("Water Balance API initialized")
-except ImportError as e:
-    WATER_BALANCE_AVAILABLE = False
-    water_balance_api = None
-    logger.warning(f"Water Balance API not available: {e}")
+
+
+subsystems.add('water_balance', load_water_balance, requires=('storage',))
 
 @app.route('/api/water-balance', methods=['GET'])
 def get_water_balance():
@@ -1113,7 +1871,7 @@ def get_water_balance():
         - Yield stress estimates
         - NDVI, rainfall, ET time series from GEE
     """
-    if not WATER_BALANCE_AVAILABLE:
+    if not subsystems.wait('water_balance', SUBSYSTEM_WAIT_TIMEOUT):
         return jsonify({
             'success': False,
             'error': 'Water Balance API not available'
@@ -1135,6 +1893,10 @@ def get_water_balance():
         ).strftime('%Y-%m-%d')
         sensor_id = request.args.get('sensorId')
         
+        error = date_range_error(start_date, end_date)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        
         result = water_balance_api.calculate_water_balance(
             lat=lat,
             lng=lng,
@@ -1155,6 +1917,76 @@ def get_water_balance():
             'error': str(e)
         }), 500
 
+@app.route('/api/water-balance/batch', methods=['POST'])
+def get_water_balance_batch():
+    """
+    Water balance for many plots in one request
+    
+    JSON body:
+        - plots: [{id, lat, lng, buffer_m}] (id and buffer_m optional)
+        - startDate: Start date YYYY-MM-DD (default: 30 days ago)
+        - endDate: End date YYYY-MM-DD (default: today)
+        - sensorId: Optional sensor ID filter
+    
+    Returns:
+        /api/water-balance results keyed by plot id; satellite data for all
+        plots is fetched with one Earth Engine request per product
+    """
+    if not subsystems.wait('water_balance', SUBSYSTEM_WAIT_TIMEOUT) or not water_balance_api.gee_service:
+        return jsonify({
+            'success': False,
+            'error': 'GEE service not available'
+        }), 503
+    
+    try:
+        body = request.get_json(silent=True) or {}
+        plots = body.get('plots')
+        
+        if not isinstance(plots, list) or not plots:
+            return jsonify({
+                'success': False,
+                'error': 'plots must be a non-empty list'
+            }), 400
+        if len(plots) > WATER_BALANCE_BATCH_MAX_PLOTS:
+            return jsonify({
+                'success': False,
+                'error': f'At most {WATER_BALANCE_BATCH_MAX_PLOTS} plots per request'
+            }), 400
+        
+        end_date = body.get('endDate') or datetime.now().strftime('%Y-%m-%d')
+        start_date = body.get('startDate') or (
+            datetime.now() - timedelta(days=30)
+        ).strftime('%Y-%m-%d')
+        
+        error = date_range_error(start_date, end_date)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        
+        try:
+            from gee_service import make_plots
+            plots = make_plots(plots)
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({
+                'success': False,
+                'error': f'Invalid plots: {e}'
+            }), 400
+        
+        result = water_balance_api.calculate_water_balance_batch(
+            plots=plots,
+            start_date=start_date,
+            end_date=end_date,
+            sensor_id=body.get('sensorId')
+        )
+        
+        return jsonify(convert_to_json_serializable(result)), 200
+        
+    except Exception as e:
+        logger.error(f"Error in /api/water-balance/batch: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/physics/vpd', methods=['GET'])
 def get_vpd_analysis():
     """
@@ -1165,7 +1997,7 @@ def get_vpd_analysis():
         - endDate: End date
         - sensorId: Optional sensor filter
     """
-    if not WATER_BALANCE_AVAILABLE:
+    if not subsystems.wait('water_balance', SUBSYSTEM_WAIT_TIMEOUT):
         return jsonify({'error': 'Water Balance API not available'}), 503
     
     try:
@@ -1175,9 +2007,12 @@ def get_vpd_analysis():
         ).strftime('%Y-%m-%d')
         sensor_id = request.args.get('sensorId')
         
+        error = date_range_error(start_date, end_date)
+        if error:
+            return jsonify({'error': error}), 400
+        
         # Get sensor data
-        sensor_data = water_balance_api.get_sensor_data(start_date, end_date, sensor_id)
-        daily_sensor = water_balance_api._aggregate_daily_sensor_data(sensor_data)
+        daily_sensor, _ = water_balance_api.get_daily_sensor_data(start_date, end_date, sensor_id)
         
         # Calculate VPD analysis
         vpd_analysis = water_balance_api._compute_vpd_analysis(daily_sensor, {})
@@ -1203,7 +2038,7 @@ def get_crop_growth():
         - startDate: Start date
         - endDate: End date
     """
-    if not WATER_BALANCE_AVAILABLE:
+    if not subsystems.wait('water_balance', SUBSYSTEM_WAIT_TIMEOUT):
         return jsonify({'error': 'Water Balance API not available'}), 503
     
     try:
@@ -1214,9 +2049,12 @@ def get_crop_growth():
             datetime.now() - timedelta(days=30)
         ).strftime('%Y-%m-%d')
         
+        error = date_range_error(start_date, end_date)
+        if error:
+            return jsonify({'error': error}), 400
+        
         # Get sensor data
-        sensor_data = water_balance_api.get_sensor_data(start_date, end_date)
-        daily_sensor = water_balance_api._aggregate_daily_sensor_data(sensor_data)
+        daily_sensor, _ = water_balance_api.get_daily_sensor_data(start_date, end_date)
         
         # Get GEE data if coordinates provided
         gee_data = {}
@@ -1252,7 +2090,7 @@ def get_yield_stress():
         - lat, lng: Coordinates
         - startDate, endDate: Date range
     """
-    if not WATER_BALANCE_AVAILABLE:
+    if not subsystems.wait('water_balance', SUBSYSTEM_WAIT_TIMEOUT):
         return jsonify({'error': 'Water Balance API not available'}), 503
     
     try:
@@ -1267,6 +2105,10 @@ def get_yield_stress():
             datetime.now() - timedelta(days=14)
         ).strftime('%Y-%m-%d')
         
+        error = date_range_error(start_date, end_date)
+        if error:
+            return jsonify({'error': error}), 400
+        
         result = water_balance_api.calculate_water_balance(
             lat=lat, lng=lng, start_date=start_date, end_date=end_date
         )
@@ -1292,7 +2134,7 @@ def get_gee_data():
         - startDate, endDate: Date range
         - dataType: Type of data (ndvi, rainfall, et, lst, all)
     """
-    if not WATER_BALANCE_AVAILABLE or not water_balance_api.gee_service:
+    if not subsystems.wait('water_balance', SUBSYSTEM_WAIT_TIMEOUT) or not water_balance_api.gee_service:
         return jsonify({'error': 'GEE service not available'}), 503
     
     try:
@@ -1308,6 +2150,10 @@ def get_gee_data():
         ).strftime('%Y-%m-%d')
         data_type = request.args.get('dataType', 'all')
         
+        error = date_range_error(start_date, end_date)
+        if error:
+            return jsonify({'error': error}), 400
+        
         gee = water_balance_api.gee_service
         
         if data_type == 'all':
@@ -1342,17 +2188,28 @@ def get_gee_data():
 PI_STGNN_AVAILABLE = False
 pi_stgnn_predictor = None
 
-try:
-    from ml_pipeline.predict import load_model_for_prediction
-    _model_path = os.path.join(os.path.dirname(__file__), 'ml_pipeline', 'saved_models', 'physics_stgnn_best.pt')
-    if os.path.exists(_model_path):
-        pi_stgnn_predictor = load_model_for_prediction(_model_path)
-        PI_STGNN_AVAILABLE = True
-        logger.info(f"Physics-Informed ST-GNN loaded from {_model_path}")
-    else:
-        logger.warning(f"PI-STGNN model not found at {_model_path}. Train it first.")
-except Exception as e:
-    logger.warning(f"PI-STGNN not available: {e}")
+
+def load_pi_stgnn():
+    """Load the trained PI-STGNN (imports torch)"""
+    global pi_stgnn_predictor, PI_STGNN_AVAILABLE
+
+    model_path = os.path.join(os.path.dirname(__file__), 'ml_pipeline', 'saved_models', 'physics_stgnn_best.pt')
+    if not os.path.exists(model_path):
+        logger.warning(f"PI-STGNN model not found at {model_path}. Train it first.")
+        return False
+
+    try:
+        from ml_pipeline.predict import load_model_for_prediction
+        pi_stgnn_predictor = load_model_for_prediction(model_path)
+    except Exception as e:
+        logger.warning(f"PI-STGNN not available: {e}")
+        return False
+
+    PI_STGNN_AVAILABLE = True
+    logger.info(f"Physics-Informed ST-GNN loaded from {model_path}")
+
+
+subsystems.add('pi_stgnn', load_pi_stgnn)
 
 @app.route('/api/yield/predict-physics', methods=['GET'])
 def predict_yield_physics():
@@ -1377,9 +2234,18 @@ def predict_yield_physics():
         end_date = datetime.now().strftime('%Y-%m-%d')
         start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
         
+        # Physics features need the water balance subsystem; like the other physics
+        # routes, wait for it instead of answering with heuristics only
+        water_balance_ready = subsystems.wait('water_balance', SUBSYSTEM_WAIT_TIMEOUT)
+        if not water_balance_ready and subsystems.state('water_balance') in (PENDING, LOADING):
+            return jsonify({
+                'success': False,
+                'error': 'Water Balance API is still loading. Retry shortly.'
+            }), 503
+        
         # Get water balance data for physics features
         physics_data = None
-        if WATER_BALANCE_AVAILABLE:
+        if water_balance_ready and WATER_BALANCE_AVAILABLE:
             try:
                 physics_data = water_balance_api.calculate_water_balance(
                     lat=lat, lng=lng,
@@ -1390,10 +2256,10 @@ def predict_yield_physics():
         
         # Get sensor data
         sensor_readings = []
-        if mongodb_available and db is not None:
+        if mongodb_available and mongo_db is not None:
             start_dt = datetime.strptime(start_date, '%Y-%m-%d')
             end_dt = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
-            cursor = db[MONGODB_COLLECTION].find({
+            cursor = mongo_collection.find({
                 'timestamp': {'$gte': start_dt, '$lt': end_dt}
             }).sort('timestamp', 1)
             sensor_readings = list(cursor)
@@ -1497,7 +2363,8 @@ def get_model_status():
         'water_balance_available': WATER_BALANCE_AVAILABLE,
         'gee_available': WATER_BALANCE_AVAILABLE and water_balance_api and water_balance_api.gee_service is not None,
         'model_type': 'Physics-Informed ST-GNN' if PI_STGNN_AVAILABLE else 'Physics-Based Heuristic',
-        'physics_constraints': ['Water Balance (FAO-56)', 'VPD Stress', 'Crop Growth (GDD/LAI)']
+        'physics_constraints': ['Water Balance (FAO-56)', 'VPD Stress', 'Crop Growth (GDD/LAI)'],
+        'loading': [name for name in ('pi_stgnn', 'water_balance') if subsystems.state(name) == LOADING]
     }), 200
 
 
@@ -1509,8 +2376,15 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
+# Begin loading; the module import itself returns right away in background mode
+subsystems.start()
+
+
 def main():
     """Main function"""
+    # Storage decides what is logged below; models keep loading in the background
+    subsystems.wait('storage')
+    
     logger.info("=" * 60)
     logger.info("CropIoT Backend API Server (LoRa Bridge + Dashboard)")
     logger.info("=" * 60)
@@ -1519,13 +2393,18 @@ def main():
     if mongodb_available:
         logger.info(f"MongoDB: {MONGODB_DATABASE}.{MONGODB_COLLECTION}")
         logger.info(f"Disease DB: {MONGODB_DATABASE}.disease_detections")
-    logger.info(f"CSV Backup: {CSV_FILE}")
+    logger.info(f"CSV Backup: {CSV_FILE if data_collector.csv_backup else 'Disabled'}")
+    if parquet_archive is not None:
+        logger.info(f"Parquet Archive: {ARCHIVE_DIR}")
     logger.info(f"CORS enabled for Next.js frontend")
     logger.info(f"Disease Detection: {'Enabled' if disease_detector else 'Disabled (train model first)'}")
     if disease_detector:
         logger.info(f"Disease Model: {DISEASE_MODEL_PATH}")
     logger.info(f"Water Balance API: {'Enabled' if WATER_BALANCE_AVAILABLE else 'Disabled'}")
     logger.info(f"PI-STGNN Model: {'Loaded' if PI_STGNN_AVAILABLE else 'Not trained yet'}")
+    loading = subsystems.pending()
+    if loading:
+        logger.info(f"Still loading in the background: {', '.join(loading)}")
     logger.info("=" * 60)
     logger.info("Data Flow:")
     logger.info(f"  LoRa Bridge → POST /api/sensor-data → {'MongoDB' if mongodb_available else 'CSV'} → Dashboard")
@@ -1533,18 +2412,23 @@ def main():
         logger.info(f"  Image Upload → POST /api/detect-disease → MongoDB → Crop Health Dashboard")
     logger.info("=" * 60)
     
+    logger.info("Development server; for production use: gunicorn -c gunicorn.conf.py wsgi:app")
+    
     try:
-        app.run(host='0.0.0.0', port=PORT, debug=False)
+        app.run(host='0.0.0.0', port=PORT, debug=False, threaded=True)
     except KeyboardInterrupt:
         logger.info("Shutting down API server")
+        # Flush buffered readings before the MongoDB client goes away
+        data_collector.close()
         logger.info(f"Final collector stats: {data_collector.get_stats()}")
         if mongo_client:
-            mongo_client.close()
+            mongo_registry.close_all()
             logger.info("✓ MongoDB connection closed")
     except Exception as e:
         logger.error(f"Fatal error: {e}")
+        data_collector.close()
         if mongo_client:
-            mongo_client.close()
+            mongo_registry.close_all()
 
 if __name__ == "__main__":
     main()
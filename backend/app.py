@@ -9,7 +9,7 @@ import io
 import base64
 import numpy as np
 from datetime import datetime
-from pymongo import MongoClient, DESCENDING
+from pymongo import DESCENDING
 from pymongo.errors import ConnectionFailure, PyMongoError
 from dotenv import load_dotenv
 import sys
@@ -17,6 +17,8 @@ import sys
 # Load environment variables
 load_dotenv()
 
+import mongo_registry
+
 # Add disease_detection directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'disease_detection'))
 try:
@@ -57,9 +59,8 @@ def init_mongodb():
     global mongo_client, mongo_db, disease_collection
     
     try:
-        mongo_client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-        # Test connection
-        mongo_client.admin.command('ping')
+        # Shared client configured by the MONGODB_* settings (see mongo_registry)
+        mongo_client = mongo_registry.ping(MONGODB_URI)
         
         mongo_db = mongo_client[MONGODB_DATABASE]
         disease_collection = mongo_db['disease_detections']
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+CropIoT Parquet Archive
+Columnar cold store for sensor readings, partitioned by date and sensor
+(archive/date=YYYY-MM-DD/sensor_id=<id>/part-*.parquet)
+"""
+
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+    ARCHIVE_AVAILABLE = True
+except ImportError:
+    ARCHIVE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+METRIC_COLUMNS = ['soil_moisture', 'ph', 'temperature', 'humidity', 'rssi', 'snr']
+
+# CSV import state in the archive root: progress of a running (or interrupted)
+# import, and the record of a finished one
+IMPORT_PROGRESS = '_import_progress'
+IMPORT_DONE = '_import_done'
+
+if ARCHIVE_AVAILABLE:
+    # date and sensor_id live in the partition path, not in the files
+    FILE_SCHEMA = pa.schema(
+        [('timestamp', pa.timestamp('us'))] +
+        [(col, pa.float64()) for col in METRIC_COLUMNS]
+    )
+    PARTITIONING = ds.partitioning(
+        pa.schema([('date', pa.string()), ('sensor_id', pa.string())]), flavor='hive'
+    )
+
+
+def _metric(value) -> Optional[float]:
+    """Numeric metric value, None for missing or error (-999) readings"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return None if value == -999 else float(value)
+
+
+class _BoundedFile(io.RawIOBase):
+    """The first `limit` bytes of a binary file, for reading a file that is still growing"""
+
+    def __init__(self, raw, limit: int):
+        self._raw = raw
+        self._left = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._left)
+        if size <= 0:
+            return 0
+        data = self._raw.read(size)
+        buffer[:len(data)] = data
+        self._left -= len(data)
+        return len(data)
+
+
+def _line_boundary(path: str, size: int) -> int:
+    """Offset just after the last complete line within the first `size` bytes"""
+    with open(path, 'rb') as f:
+        start = max(0, size - 65536)
+        f.seek(start)
+        tail = f.read(size - start)
+    newline = tail.rfind(b'\n')
+    return start + newline + 1 if newline >= 0 else start
+
+
+class ParquetArchive:
+    """
+    Partitioned Parquet archive of sensor readings
+
+    Readings handed to append() are buffered and written as one file per
+    (date, sensor) partition every flush_interval seconds or once flush_rows
+    readings are pending. Partitions of past days are compacted into a single
+    file. Reads only open the partitions inside the requested window and
+    sensors, only decode the requested columns, and memory-map the files.
+    """
+
+    def __init__(self, root_dir: str, flush_rows: int = 5000, flush_interval: float = 60.0,
+                 compaction: bool = True):
+        """
+        Args:
+            root_dir: Archive directory
+            flush_rows: Pending readings that trigger an immediate write
+            flush_interval: Maximum age in seconds of a buffered reading
+            compaction: Compact past partitions daily (only one process sharing
+                the directory may do this)
+        """
+        if not ARCHIVE_AVAILABLE:
+            raise RuntimeError("pyarrow is required for the Parquet archive")
+
+        self.root_dir = root_dir
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = max(0.1, flush_interval)
+        self.compaction = compaction
+        os.makedirs(root_dir, exist_ok=True)
+
+        self._pending: List[Dict] = []
+        self._pending_since: Optional[float] = None
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._filesystem = pafs.LocalFileSystem(use_mmap=True)
+        self._compacted_before: Optional[date] = None
+        # Set while a CSV import runs; daily compaction waits, so files of an
+        # interrupted chunk can still be told apart and removed on resume
+        self._importing = False
+
+        # Incremented on every write or compaction; readers use it as a change marker
+        self.generation = 0
+
+        self.stats = {
+            'files_written': 0,
+            'rows_written': 0,
+            'partitions_compacted': 0,
+            'last_flush': None
+        }
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the background flush/compaction thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='parquet-archive', daemon=True)
+        self._thread.start()
+        logger.info(f"✓ Parquet archive started ({self.root_dir})")
+
+    def _run(self):
+        while not self._stop_event.wait(min(self.flush_interval, 5.0)):
+            try:
+                with self._lock:
+                    due = (self._pending_since is not None and
+                           time.monotonic() - self._pending_since >= self.flush_interval)
+                if due:
+                    self.flush()
+                if self.compaction and not self._importing and self._compacted_before != date.today():
+                    self.compact()
+            except Exception as e:
+                logger.error(f"✗ Parquet archive maintenance error: {e}")
+
+    def append(self, documents: List[Dict]):
+        """Buffer stored sensor documents for the next write"""
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.extend(documents)
+            full = len(self._pending) >= self.flush_rows
+
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all buffered readings, one file per (date, sensor) partition"""
+        with self._lock:
+            documents, self._pending = self._pending, []
+            self._pending_since = None
+            if not documents:
+                return 0
+
+            df = pd.DataFrame({
+                'timestamp': [doc['timestamp'] for doc in documents],
+                'sensor_id': [str(doc.get('sensor_id', 'Unknown')) for doc in documents],
+                **{col: [_metric(doc.get(col)) for doc in documents] for col in METRIC_COLUMNS}
+            })
+            self.write_frame(df)
+            return len(documents)
+
+    def write_frame(self, df: pd.DataFrame, prefix: str = 'part'):
+        """
+        Write a frame with timestamp, sensor_id and metric columns
+
+        Metrics must already use NaN (not -999) for missing values; part
+        files are named <prefix>-<time>-<id>.parquet.
+        """
+        with self._lock:
+            df = df.copy()
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            df['date'] = df['timestamp'].dt.strftime('%Y-%m-%d')
+            for col in METRIC_COLUMNS:
+                if col not in df.columns:
+                    df[col] = None
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+            for (day, sensor_id), part in df.groupby(['date', 'sensor_id'], sort=False):
+                table = pa.Table.from_pandas(
+                    part.sort_values('timestamp', kind='mergesort')[FILE_SCHEMA.names],
+                    schema=FILE_SCHEMA, preserve_index=False
+                )
+                self._write_file(self._partition_dir(day, sensor_id), table, prefix)
+                self.stats['rows_written'] += table.num_rows
+
+            self.generation += 1
+            self.stats['last_flush'] = time.strftime('%Y-%m-%d %H:%M:%S')
+
+    def _partition_dir(self, day: str, sensor_id: str) -> str:
+        return os.path.join(self.root_dir, f'date={day}', f'sensor_id={quote(sensor_id, safe="")}')
+
+    def _write_file(self, directory: str, table, prefix: str = 'part') -> str:
+        """Write a part file atomically (readers never see a partial file)"""
+        os.makedirs(directory, exist_ok=True)
+        name = f'{prefix}-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet'
+        tmp_path = os.path.join(directory, f'.{name}.tmp')
+        pq.write_table(table, tmp_path, compression='snappy')
+        path = os.path.join(directory, name)
+        os.replace(tmp_path, path)
+        self.stats['files_written'] += 1
+        return path
+
+    def compact(self, before: Optional[date] = None) -> int:
+        """Merge the part files of every partition dated before `before` (default: today)"""
+        before = before or date.today()
+        cutoff = before.strftime('%Y-%m-%d')
+        compacted = 0
+
+        with self._lock:
+            for day in self._partition_dates():
+                if day >= cutoff:
+                    continue
+                day_dir = os.path.join(self.root_dir, f'date={day}')
+                for sensor_dir in self._list_dirs(day_dir, 'sensor_id='):
+                    files = self._part_files(sensor_dir)
+                    if len(files) < 2:
+                        continue
+
+                    table = pa.concat_tables([pq.read_table(f, schema=FILE_SCHEMA) for f in files])
+                    table = table.sort_by('timestamp')
+                    self._write_file(sensor_dir, table)
+                    for f in files:
+                        os.remove(f)
+                    compacted += 1
+
+            if compacted:
+                self.generation += 1
+                self.stats['partitions_compacted'] += compacted
+                logger.info(f"✓ Compacted {compacted} archive partitions")
+            self._compacted_before = before
+
+        return compacted
+
+    def _read_marker(self, name: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.root_dir, name), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_marker(self, name: str, state: Dict):
+        path = os.path.join(self.root_dir, name)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.replace(path + '.tmp', path)
+
+    def import_state(self) -> Optional[Dict]:
+        """Record of the finished CSV import, None if none has finished"""
+        return self._read_marker(IMPORT_DONE)
+
+    def _begin_import(self, csv_file: str) -> Optional[Dict]:
+        """
+        Progress of the CSV import to run, or None when there is nothing to import
+
+        A new import records the CSV size first and never reads past it:
+        readings appended later are archived by the ingest path already. An
+        interrupted import is resumed from its recorded progress.
+        """
+        if self._read_marker(IMPORT_DONE) is not None:
+            return None
+
+        progress = self._read_marker(IMPORT_PROGRESS)
+        if progress is None:
+            if not self.is_empty() or not os.path.exists(csv_file):
+                # Archive filled before import records were kept, or nothing to import
+                if not self.is_empty():
+                    logger.warning("⚠ Archive has readings but no record of a CSV import; "
+                                   "assuming it was imported")
+                self._write_marker(IMPORT_DONE, {'csv_file': os.path.abspath(csv_file), 'offset': None,
+                                                 'rows': 0, 'finished': time.strftime('%Y-%m-%d %H:%M:%S')})
+                return None
+            progress = {
+                'csv_file': os.path.abspath(csv_file),
+                'offset': _line_boundary(csv_file, os.path.getsize(csv_file)),
+                'chunk': 0,   # chunks written so far
+                'lines': 0,   # CSV data lines read so far
+                'rows': 0     # readings imported so far
+            }
+            self._write_marker(IMPORT_PROGRESS, progress)
+        elif not os.path.exists(progress['csv_file']):
+            raise FileNotFoundError(f"Cannot resume the archive import: {progress['csv_file']} is gone")
+        else:
+            logger.info(f"Resuming archive import of {progress['csv_file']} after {progress['rows']} readings")
+
+        self._importing = True
+        return progress
+
+    def _remove_import_files(self, from_chunk: int):
+        """Delete part files of import chunks from_chunk and later (written before an interruption)"""
+        with self._lock:
+            for day in self._partition_dates():
+                for sensor_dir in self._list_dirs(os.path.join(self.root_dir, f'date={day}'), 'sensor_id='):
+                    for path in self._part_files(sensor_dir):
+                        tag = os.path.basename(path).split('-')[1]
+                        if tag.startswith('import') and int(tag[len('import'):]) >= from_chunk:
+                            os.remove(path)
+
+    def _import(self, progress: Dict, chunksize: int = 200000) -> int:
+        """Import the CSV file up to the recorded offset, saving progress after every chunk"""
+        try:
+            self._remove_import_files(progress['chunk'])
+            skip = progress['lines']
+
+            with open(progress['csv_file'], 'rb') as f:
+                reader = pd.read_csv(io.BufferedReader(_BoundedFile(f, progress['offset'])),
+                                     chunksize=chunksize, dtype={'sensor_id': str},
+                                     skiprows=lambda line: 0 < line <= skip)
+                for chunk in reader:
+                    lines = len(chunk)
+                    chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], errors='coerce')
+                    chunk = chunk.dropna(subset=['timestamp', 'sensor_id'])
+                    for col in METRIC_COLUMNS:
+                        if col in chunk.columns:
+                            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').replace(-999, float('nan'))
+                    if not chunk.empty:
+                        self.write_frame(chunk, prefix=f"part-import{progress['chunk']:06d}")
+
+                    progress['chunk'] += 1
+                    progress['lines'] += lines
+                    progress['rows'] += len(chunk)
+                    self._write_marker(IMPORT_PROGRESS, progress)
+
+            self.compact()
+            self._write_marker(IMPORT_DONE, {'csv_file': progress['csv_file'], 'offset': progress['offset'],
+                                             'rows': progress['rows'],
+                                             'finished': time.strftime('%Y-%m-%d %H:%M:%S')})
+            os.remove(os.path.join(self.root_dir, IMPORT_PROGRESS))
+        finally:
+            self._importing = False
+
+        logger.info(f"✓ Imported {progress['rows']} readings from {progress['csv_file']} into the archive")
+        return progress['rows']
+
+    def import_csv(self, csv_file: str, chunksize: int = 200000) -> int:
+        """Backfill the archive from a crop_data.csv file once, resuming an interrupted import"""
+        progress = self._begin_import(csv_file)
+        if progress is None:
+            return 0
+        return self._import(progress, chunksize)
+
+    def start_import(self, csv_file: str) -> Optional[threading.Thread]:
+        """Run import_csv on a background thread, so startup does not wait for a large file"""
+        # The CSV size is recorded before returning, so readings stored from now
+        # on reach the archive only through append()
+        progress = self._begin_import(csv_file)
+        if progress is None:
+            return None
+
+        def run():
+            try:
+                self._import(progress)
+                self.stats['csv_import'] = 'done'
+            except Exception as e:
+                logger.error(f"✗ CSV import into the archive failed (resumed on next start): {e}")
+                self.stats['csv_import'] = 'failed'
+
+        self.stats['csv_import'] = 'running'
+        thread = threading.Thread(target=run, name='parquet-import', daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """Stop the background thread and write everything still buffered"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(10)
+            self._thread = None
+        self.flush()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _list_dirs(path: str, prefix: str) -> List[str]:
+        try:
+            return sorted(os.path.join(path, name) for name in os.listdir(path)
+                          if name.startswith(prefix))
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _part_files(directory: str) -> List[str]:
+        try:
+            return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                          if name.endswith('.parquet') and not name.startswith('.'))
+        except FileNotFoundError:
+            return []
+
+    def _partition_dates(self) -> List[str]:
+        return [os.path.basename(d)[len('date='):] for d in self._list_dirs(self.root_dir, 'date=')]
+
+    def dates(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+        """Partition dates overlapping [start, end)"""
+        first = start.strftime('%Y-%m-%d') if start is not None else None
+        # end is exclusive; a partition is needed if it starts before end
+        last = (end - timedelta(microseconds=1)).strftime('%Y-%m-%d') if end is not None else None
+        return [day for day in self._partition_dates()
+                if not ((first and day < first) or (last and day > last))]
+
+    def files(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              sensor_ids: Optional[Iterable[str]] = None,
+              days: Optional[List[str]] = None) -> List[str]:
+        """Part files of the partitions overlapping [start, end) for the given sensors"""
+        wanted = {f'sensor_id={quote(str(s), safe="")}' for s in sensor_ids} if sensor_ids is not None else None
+
+        files = []
+        for day in (days if days is not None else self.dates(start, end)):
+            day_dir = os.path.join(self.root_dir, f'date={day}')
+            for sensor_dir in self._list_dirs(day_dir, 'sensor_id='):
+                if wanted is None or os.path.basename(sensor_dir) in wanted:
+                    files.extend(self._part_files(sensor_dir))
+        return files
+
+    @staticmethod
+    def _time_filter(start: Optional[datetime], end: Optional[datetime]):
+        condition = None
+        if start is not None:
+            condition = ds.field('timestamp') >= pa.scalar(start, pa.timestamp('us'))
+        if end is not None:
+            upper = ds.field('timestamp') < pa.scalar(end, pa.timestamp('us'))
+            condition = upper if condition is None else condition & upper
+        return condition
+
+    def read(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             sensor_ids: Optional[Iterable[str]] = None,
+             columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Read readings in [start, end) as a DataFrame (timestamp, sensor_id, metrics)
+
+        Missing metric values are NaN.
+        """
+        sensor_ids = list(sensor_ids) if sensor_ids is not None else None
+        metrics = [c for c in (columns or METRIC_COLUMNS) if c in METRIC_COLUMNS]
+
+        with self._lock:
+            files = self.files(start, end, sensor_ids)
+            return self.read_files(files, metrics, self._time_filter(start, end))
+
+    def iter_days(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  sensor_ids: Optional[Iterable[str]] = None) -> Iterator[pd.DataFrame]:
+        """Yield readings in [start, end) one date partition at a time, in time order"""
+        sensor_ids = list(sensor_ids) if sensor_ids is not None else None
+        condition = self._time_filter(start, end)
+
+        for day in self.dates(start, end):
+            with self._lock:
+                df = self.read_files(self.files(sensor_ids=sensor_ids, days=[day]), condition=condition)
+            if not df.empty:
+                yield df
+
+    def read_new_files(self, seen: FrozenSet[str],
+                       start: Optional[datetime] = None) -> Tuple[pd.DataFrame, Optional[FrozenSet[str]]]:
+        """
+        Read the part files not in `seen`, only rows at or after start if given
+
+        Files are listed and read under the lock, so compaction cannot remove
+        them in between. Returns the rows and every current part file, or None
+        instead of the files when compaction replaced any file in `seen`.
+        """
+        with self._lock:
+            files = frozenset(self.files())
+            if not seen.issubset(files):
+                return pd.DataFrame(), None
+
+            new_files = [f for f in self.files(start) if f not in seen]
+            return self.read_files(new_files, condition=self._time_filter(start, None)), files
+
+    def read_files(self, files: List[str], metrics: Optional[List[str]] = None,
+                   condition=None) -> pd.DataFrame:
+        """Read the given part files (memory-mapped), taking sensor_id from their paths"""
+        if not files:
+            return pd.DataFrame()
+
+        metrics = METRIC_COLUMNS if metrics is None else metrics
+        dataset = ds.dataset(files, schema=FILE_SCHEMA.append(pa.field('sensor_id', pa.string())),
+                             format='parquet', filesystem=self._filesystem,
+                             partitioning=PARTITIONING, partition_base_dir=self.root_dir)
+        table = dataset.to_table(columns=['timestamp', 'sensor_id'] + metrics, filter=condition)
+
+        # Partition values are URI-decoded by pyarrow
+        df = table.to_pandas()
+        df['sensor_id'] = df['sensor_id'].astype(object)
+        return df.sort_values('timestamp', kind='mergesort').reset_index(drop=True)
+
+    def sensor_ids(self) -> List[str]:
+        """Every sensor present in the archive"""
+        sensors = set()
+        for day in self._partition_dates():
+            for sensor_dir in self._list_dirs(os.path.join(self.root_dir, f'date={day}'), 'sensor_id='):
+                sensors.add(unquote(os.path.basename(sensor_dir)[len('sensor_id='):]))
+        return sorted(sensors)
+
+    def is_empty(self) -> bool:
+        return not self._partition_dates()
+
+    def get_stats(self) -> Dict:
+        """Archive statistics"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            **self.stats,
+            'pending': pending,
+            'partitions': sum(len(self._list_dirs(os.path.join(self.root_dir, f'date={d}'), 'sensor_id='))
+                              for d in self._partition_dates()),
+            'csv_import_done': self.import_state(),
+            'root_dir': self.root_dir
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description='Manage the CropIoT Parquet archive')
+    parser.add_argument('command', choices=['import', 'compact'], help='Action to run')
+    parser.add_argument('--archive-dir', type=str, required=True, help='Archive directory')
+    parser.add_argument('--csv', type=str, default='crop_data.csv', help='CSV file to import')
+
+    args = parser.parse_args()
+
+    archive = ParquetArchive(args.archive_dir)
+    if args.command == 'import':
+        archive.import_csv(args.csv)
+    else:
+        archive.compact()
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+CropIoT Async Ingest Service
+asyncio (aiohttp + Motor) server for the LoRa bridge ingest endpoints.
+One event loop holds thousands of slow gateway connections on one core:
+a connection that is still trickling its body costs a coroutine, not a
+worker thread, and readings are written to MongoDB in batches.
+
+Serves the same contract as the Flask API:
+    POST /api/sensor-data        one reading
+    POST /api/sensor-data/bulk   JSON array, {'readings': [...]} or NDJSON
+
+Usage:
+    python async_ingest.py --port 5001
+
+Run the Flask API with FOLLOW_EXTERNAL_WRITES=true so its latest-reading
+cache and live stream pick up the readings stored here.
+
+Readings stored here are not written to the Parquet archive, which only the
+API server's ingest path feeds; they reach it only through a re-import. A
+deployment that relies on the archive as its backup should keep the CSV
+export or MongoDB backups for this service.
+"""
+
+import asyncio
+import csv
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from pymongo.errors import BulkWriteError, PyMongoError
+
+load_dotenv()
+
+import mongo_registry
+from ingest_buffer import CSV_COLUMNS, document_to_csv_row
+from readings import build_document, parse_ndjson, validate_reading, validate_readings
+from rollups import RollupStore
+
+try:
+    from aiohttp import web
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    MOTOR_AVAILABLE = True
+except ImportError:
+    MOTOR_AVAILABLE = False
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Configuration (same variables as api_server.py where they overlap)
+ASYNC_INGEST_PORT = int(os.getenv('ASYNC_INGEST_PORT', '5001'))
+MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+MONGODB_DATABASE = os.getenv('MONGODB_DATABASE', 'cropiot')
+MONGODB_COLLECTION = os.getenv('MONGODB_COLLECTION', 'sensor_data')
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '500'))
+INGEST_FLUSH_INTERVAL = float(os.getenv('INGEST_FLUSH_INTERVAL', '1.0'))
+INGEST_MAX_QUEUE = int(os.getenv('INGEST_MAX_QUEUE', '50000'))
+INGEST_RETRY_ATTEMPTS = int(os.getenv('INGEST_RETRY_ATTEMPTS', '5'))
+INGEST_RETRY_BACKOFF = float(os.getenv('INGEST_RETRY_BACKOFF', '1.0'))
+# Readings MongoDB did not store; the API server's CSV file by default, which it reads as a fallback
+INGEST_FALLBACK_FILE = os.getenv('INGEST_FALLBACK_FILE', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'crop_data.csv'))
+BULK_MAX_READINGS = int(os.getenv('BULK_MAX_READINGS', '5000'))
+ROLLUPS_ENABLED = os.getenv('ROLLUPS_ENABLED', 'true').lower() == 'true'
+ROLLUP_GRANULARITIES = [g.strip() for g in os.getenv('ROLLUP_GRANULARITIES', 'hour,day').split(',') if g.strip()]
+
+
+class AsyncIngestWriter:
+    """
+    Batched MongoDB writer running on the event loop
+
+    The asyncio counterpart of IngestBuffer: handlers queue documents without
+    awaiting the database, and one task writes them with an unordered
+    insert_many per batch (batch_size readings or flush_interval seconds).
+    Written batches are handed to blocking listeners (rollups) in the
+    default executor.
+
+    Queued readings were already acknowledged, so they follow the same
+    contract as IngestBuffer: a batch MongoDB cannot take is retried with
+    exponential backoff, and readings still not stored after retry_attempts,
+    or rejected by the server itself, are appended to fallback_file.
+    """
+
+    def __init__(self, collection, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_queue: int = 50000, fallback_file: Optional[str] = None,
+                 retry_attempts: int = 5, retry_backoff: float = 1.0):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.01, flush_interval)
+        self.max_queue = max_queue
+        self.fallback_file = fallback_file
+        self.retry_attempts = max(1, retry_attempts)
+        self.retry_backoff = max(0.01, retry_backoff)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._listeners = []
+        # (due loop time, attempts so far, documents) of batches waiting for a retry
+        self._retries: List[tuple] = []
+
+        self.stats = {
+            'batches_written': 0,
+            'documents_written': 0,
+            'documents_failed': 0,
+            'documents_retried': 0,
+            'documents_spilled': 0,
+            'last_batch_size': 0,
+            'last_flush': None
+        }
+
+    def add_listener(self, listener):
+        """Register a blocking callback invoked with each written batch"""
+        self._listeners.append(listener)
+
+    def start(self):
+        """Start the writer task (call from the running loop)"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"✓ Async ingest writer started (batch size {self.batch_size}, "
+                    f"flush interval {self.flush_interval}s)")
+
+    def put(self, document: Dict) -> bool:
+        """Queue a document for writing. Returns False if the queue is full."""
+        if self._stopping:
+            return False
+        try:
+            self._queue.put_nowait(document)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def retrying(self) -> int:
+        """Number of readings waiting for a MongoDB retry"""
+        return sum(len(docs) for _, _, docs in self._retries)
+
+    async def _run(self):
+        """Writer loop: collect a batch, then flush it"""
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            await self._write_due_retries()
+            try:
+                first = await asyncio.wait_for(self._queue.get(), self.flush_interval)
+            except asyncio.TimeoutError:
+                continue
+
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._write_batch(batch)
+
+    async def _write_due_retries(self, force: bool = False):
+        """Retry the batches whose backoff has expired (all of them with force)"""
+        now = asyncio.get_running_loop().time()
+        due = [entry for entry in self._retries if force or entry[0] <= now]
+        self._retries = [entry for entry in self._retries if not (force or entry[0] <= now)]
+        self.stats['documents_retried'] += sum(len(docs) for _, _, docs in due)
+
+        for _, attempts, documents in due:
+            await self._write_batch(documents, attempts, final=force)
+
+    async def _write_batch(self, batch: List[Dict], attempts: int = 0, final: bool = False):
+        """Write one queued batch, scheduling a retry or falling back for what MongoDB did not store"""
+        written, retry, rejected = await self._insert(batch)
+        attempts += 1
+        if retry and attempts < self.retry_attempts and not final:
+            await self._schedule_retry(retry, attempts)
+            retry = []
+        await self._fall_back(retry + rejected)
+
+        if attempts == 1:
+            self.stats['batches_written'] += 1
+            self.stats['last_batch_size'] = len(batch)
+        await self._written(written)
+
+    async def write(self, batch: List[Dict]) -> List[Dict]:
+        """
+        Insert one batch now, without retries; returns the documents that were stored
+
+        For readings the queue could not take: the client is still waiting and
+        is told which readings to send again.
+        """
+        written, retry, rejected = await self._insert(batch)
+        self.stats['batches_written'] += 1
+        self.stats['last_batch_size'] = len(batch)
+        self.stats['documents_failed'] += len(retry) + len(rejected)
+        await self._written(written)
+        return written
+
+    async def _insert(self, batch: List[Dict]) -> tuple:
+        """
+        Insert a batch with a single unordered insert_many
+
+        Returns (written, to retry, rejected): documents the server refused
+        (writeErrors) would be refused again, everything else can be retried.
+        """
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            return batch, [], []
+        except BulkWriteError as e:
+            failed = {err['index'] for err in e.details.get('writeErrors', [])}
+            logger.error(f"✗ MongoDB bulk insert: {len(failed)} of {len(batch)} readings failed")
+            written = [doc for i, doc in enumerate(batch) if i not in failed]
+            return written, [], [doc for i, doc in enumerate(batch) if i in failed]
+        except PyMongoError as e:
+            logger.error(f"✗ MongoDB bulk insert error: {e}")
+            return [], batch, []
+
+    async def _written(self, written: List[Dict]):
+        """Count stored documents and hand them to the listeners"""
+        self.stats['documents_written'] += len(written)
+        self.stats['last_flush'] = time.strftime('%Y-%m-%d %H:%M:%S')
+
+        if written:
+            loop = asyncio.get_running_loop()
+            for listener in self._listeners:
+                try:
+                    await loop.run_in_executor(None, listener, written)
+                except Exception as e:
+                    logger.error(f"✗ Ingest listener error: {e}")
+
+    async def _schedule_retry(self, documents: List[Dict], attempts: int):
+        """Queue documents for another MongoDB write after the backoff"""
+        delay = self.retry_backoff * 2 ** (attempts - 1)
+        self._retries.append((asyncio.get_running_loop().time() + delay, attempts, documents))
+        logger.warning(f"⚠ Retrying {len(documents)} readings in {delay:.1f}s (attempt {attempts + 1})")
+
+        # Readings waiting for a retry count against the queue bound; the oldest fall back first
+        waiting = self.retrying()
+        while waiting > self.max_queue and len(self._retries) > 1:
+            _, _, oldest = self._retries.pop(0)
+            waiting -= len(oldest)
+            await self._fall_back(oldest)
+
+    async def _fall_back(self, documents: List[Dict]):
+        """Keep readings MongoDB did not store in the fallback CSV file"""
+        if not documents:
+            return
+
+        spilled = False
+        if self.fallback_file:
+            spilled = await asyncio.get_running_loop().run_in_executor(
+                None, append_csv, self.fallback_file, documents
+            )
+
+        if spilled:
+            self.stats['documents_spilled'] += len(documents)
+            logger.warning(f"⚠ {len(documents)} readings not stored in MongoDB kept in {self.fallback_file}")
+        else:
+            self.stats['documents_failed'] += len(documents)
+            logger.error(f"✗ {len(documents)} readings lost: MongoDB and the CSV fallback failed")
+
+    async def close(self):
+        """Stop the writer and store everything still queued"""
+        self._stopping = True
+        if self._task is not None:
+            # Let the batch in flight finish; the loop exits within flush_interval
+            await self._task
+            self._task = None
+
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+            if len(batch) >= self.batch_size:
+                await self._write_batch(batch)
+                batch = []
+        if batch:
+            await self._write_batch(batch)
+
+        # Last chance for batches still waiting for a retry
+        await self._write_due_retries(force=True)
+
+        logger.info(f"✓ Async ingest writer closed ({self.stats['documents_written']} readings written)")
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'pending': self.pending(),
+            'retrying': self.retrying(),
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval
+        }
+
+
+def append_csv(path: str, documents: List[Dict]) -> bool:
+    """Append documents to a CSV file in the crop_data.csv layout (blocking)"""
+    try:
+        new_file = not os.path.exists(path)
+        with open(path, 'a', newline='') as file:
+            writer = csv.writer(file)
+            if new_file:
+                writer.writerow(CSV_COLUMNS)
+            writer.writerows(document_to_csv_row(doc) for doc in documents)
+        return True
+    except Exception as e:
+        logger.error(f"✗ Error writing batch to CSV: {e}")
+        return False
+
+
+class IngestService:
+    """Request handlers for the ingest endpoints"""
+
+    def __init__(self, writer: AsyncIngestWriter):
+        self.writer = writer
+        self.stats = {'total_received': 0, 'errors': 0, 'last_sensor_id': None}
+
+    async def store(self, documents: List[Dict]) -> Dict[int, str]:
+        """
+        Queue documents; what the queue cannot take is written right away
+
+        Returns the error of each document that was not stored, by index.
+        """
+        queued = 0
+        for document in documents:
+            if not self.writer.put(document):
+                break
+            queued += 1
+
+        if queued == len(documents):
+            return {}
+
+        logger.warning("⚠ Ingest queue full, writing readings directly")
+        direct = documents[queued:]
+        written = {id(doc) for doc in await self.writer.write(direct)}
+        return {queued + index: "Failed to save data"
+                for index, doc in enumerate(direct) if id(doc) not in written}
+
+    async def receive_sensor_data(self, request: 'web.Request') -> 'web.Response':
+        """Receive sensor data from LoRa WiFi Bridge"""
+        try:
+            try:
+                data = await request.json()
+            except ValueError:
+                data = None
+
+            if not data or not isinstance(data, dict):
+                logger.warning("✗ Received empty data")
+                return web.json_response({'status': 'error', 'message': 'No data received'}, status=400)
+
+            is_valid, error_msg = validate_reading(data)
+            if not is_valid:
+                self.stats['errors'] += 1
+                logger.warning(f"✗ Invalid data received: {error_msg}")
+                return web.json_response({'status': 'error', 'message': error_msg}, status=400)
+
+            failed = await self.store([build_document(data)])
+            if failed:
+                # Storage failure, not a bad request: the bridge should send it again
+                self.stats['errors'] += 1
+                return web.json_response({'status': 'error', 'message': failed[0]}, status=503)
+
+            self.stats['total_received'] += 1
+            self.stats['last_sensor_id'] = data.get('id')
+            return web.json_response({
+                'status': 'success',
+                'message': 'Data received and queued for storage',
+                'sensor_id': data.get('id'),
+                'saved_to_dashboard': True,
+                'storage': 'mongodb'
+            })
+
+        except Exception as e:
+            logger.error(f"✗ Error in /api/sensor-data endpoint: {e}")
+            return web.json_response({'status': 'error', 'message': str(e)}, status=500)
+
+    async def receive_sensor_data_bulk(self, request: 'web.Request') -> 'web.Response':
+        """Receive many sensor readings in one request (see the Flask endpoint)"""
+        try:
+            parse_errors = {}
+
+            if request.content_type in ('application/x-ndjson', 'application/ndjson'):
+                items, parse_errors = parse_ndjson(await request.text())
+            else:
+                try:
+                    payload = await request.json()
+                except ValueError:
+                    payload = None
+                items = payload.get('readings') if isinstance(payload, dict) else payload
+
+            if not isinstance(items, list) or not items:
+                logger.warning("✗ Received empty bulk upload")
+                return web.json_response({
+                    'status': 'error',
+                    'message': 'Expected a non-empty array of readings'
+                }, status=400)
+
+            if len(items) > BULK_MAX_READINGS:
+                return web.json_response({
+                    'status': 'error',
+                    'message': f'Too many readings ({len(items)}), maximum is {BULK_MAX_READINGS}'
+                }, status=413)
+
+            results = []
+            accepted = []
+            documents = []
+            received_at = datetime.now()
+
+            validation, timestamps = validate_readings(items)
+            for index, (item, (is_valid, error_msg), timestamp) in enumerate(zip(items, validation, timestamps)):
+                if not is_valid:
+                    results.append({'index': index, 'status': 'error',
+                                    'message': parse_errors.get(index, error_msg)})
+                    continue
+
+                documents.append(build_document(item, timestamp or received_at))
+                accepted.append({'index': index, 'status': 'ok', 'sensor_id': item.get('id')})
+                results.append(accepted[-1])
+
+            failed = await self.store(documents) if documents else {}
+            for index, message in failed.items():
+                accepted[index]['status'] = 'error'
+                accepted[index]['message'] = message
+
+            stored_documents = [doc for index, doc in enumerate(documents) if index not in failed]
+            stored = len(stored_documents)
+            self.stats['total_received'] += stored
+            self.stats['errors'] += len(items) - stored
+            if stored:
+                self.stats['last_sensor_id'] = stored_documents[-1]['sensor_id']
+
+            rejected = len(results) - stored
+            return web.json_response({
+                'status': 'success' if rejected == 0 else ('partial' if stored else 'error'),
+                'received': len(results),
+                'accepted': stored,
+                'rejected': rejected,
+                'results': results,
+                'storage': 'mongodb'
+            }, status=200 if stored else (503 if failed else 400))
+
+        except Exception as e:
+            logger.error(f"✗ Error in /api/sensor-data/bulk endpoint: {e}")
+            return web.json_response({'status': 'error', 'message': str(e)}, status=500)
+
+    async def health(self, request: 'web.Request') -> 'web.Response':
+        return web.json_response({
+            'status': 'healthy',
+            'service': 'CropIoT Async Ingest',
+            'stats': self.stats,
+            'writer': self.writer.get_stats()
+        })
+
+
+def create_app() -> 'web.Application':
+    """aiohttp application with the Motor client and writer tied to its lifetime"""
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+
+    async def on_startup(app):
+        # Same pool, timeout and compression settings as the synchronous clients
+        client = AsyncIOMotorClient(MONGODB_URI, **mongo_registry.client_options())
+        await client.admin.command('ping')
+        logger.info(f"✓ Connected to MongoDB: {MONGODB_DATABASE}.{MONGODB_COLLECTION}")
+
+        writer = AsyncIngestWriter(
+            client[MONGODB_DATABASE][MONGODB_COLLECTION],
+            batch_size=INGEST_BATCH_SIZE,
+            flush_interval=INGEST_FLUSH_INTERVAL,
+            max_queue=INGEST_MAX_QUEUE,
+            fallback_file=INGEST_FALLBACK_FILE,
+            retry_attempts=INGEST_RETRY_ATTEMPTS,
+            retry_backoff=INGEST_RETRY_BACKOFF
+        )
+        if ROLLUPS_ENABLED:
+            # Blocking pymongo updates run in the executor; the API server owns the backfill.
+            # The backfill cutoff is loaded (or recorded) first so readings it folds in are
+            # not counted again here.
+            database = mongo_registry.get_database(MONGODB_DATABASE, MONGODB_URI)
+            rollups = RollupStore(database, ROLLUP_GRANULARITIES)
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: rollups.start(database[MONGODB_COLLECTION], rebuild=False)
+                )
+                writer.add_listener(rollups.update)
+            except PyMongoError as e:
+                logger.error(f"✗ Sensor rollups unavailable: {e}")
+        writer.start()
+
+        app['mongo_client'] = client
+        service.writer = writer
+
+    async def on_cleanup(app):
+        await service.writer.close()
+        app['mongo_client'].close()
+        mongo_registry.close_all()
+
+    service = IngestService(None)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_post('/api/sensor-data', service.receive_sensor_data)
+    app.router.add_post('/api/sensor-data/bulk', service.receive_sensor_data_bulk)
+    app.router.add_get('/health', service.health)
+    return app
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='CropIoT async ingest service')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='Bind address')
+    parser.add_argument('--port', type=int, default=ASYNC_INGEST_PORT, help='Port')
+    parser.add_argument('--backlog', type=int, default=4096, help='Listen backlog for connection bursts')
+
+    args = parser.parse_args()
+
+    if not AIOHTTP_AVAILABLE or not MOTOR_AVAILABLE:
+        logger.error("✗ The async ingest service needs aiohttp and motor: pip install aiohttp motor")
+        sys.exit(1)
+
+    logger.info("=" * 60)
+    logger.info("CropIoT Async Ingest Service")
+    logger.info(f"Listening on http://{args.host}:{args.port}")
+    logger.info(f"MongoDB: {MONGODB_DATABASE}.{MONGODB_COLLECTION}")
+    logger.info("=" * 60)
+
+    web.run_app(create_app(), host=args.host, port=args.port, backlog=args.backlog,
+                access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
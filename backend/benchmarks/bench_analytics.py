@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+AnalyticsEngine Benchmark
+Times the grouped analytics against the previous per-sensor loops on
+synthetic data (default: 100 sensors x 1 year of 1-minute readings), and
+exits non-zero if the two disagree
+
+Usage:
+    python benchmarks/bench_analytics.py
+    python benchmarks/bench_analytics.py --sensors 20 --days 30 --freq 5min
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import AnalyticsEngine, YieldEstimator
+
+
+class FrameDataSource:
+    """In-memory data source serving a prepared frame"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def load(self, start=None, end=None, sensor_ids=None, columns=None) -> pd.DataFrame:
+        df = self.df
+        if start is not None:
+            df = df[df['timestamp'] >= start]
+        if end is not None:
+            df = df[df['timestamp'] < end]
+        if sensor_ids is not None:
+            df = df[df['sensor_id'].isin(list(sensor_ids))]
+        return df.copy()
+
+    def sensor_ids(self):
+        return list(self.df['sensor_id'].unique())
+
+
+def generate_readings(sensors: int, days: int, freq: str, seed: int = 42) -> pd.DataFrame:
+    """Synthetic readings for every sensor at a fixed interval, ~2% missing values"""
+    rng = np.random.default_rng(seed)
+    end = datetime.now().replace(second=0, microsecond=0)
+    index = pd.date_range(end=end, periods=int(timedelta(days=days) / pd.Timedelta(freq)), freq=freq)
+
+    # Built in time order (every sensor per tick) so no sort copy is needed
+    n = len(index) * sensors
+    sensor_names = np.array([f'SENSOR_{i:03d}' for i in range(sensors)], dtype=object)
+    df = pd.DataFrame({
+        'timestamp': np.repeat(index.values, sensors),
+        'sensor_id': np.tile(sensor_names, len(index)),
+        'soil_moisture': rng.normal(50, 12, n),
+        'ph': rng.normal(6.5, 0.4, n),
+        'temperature': rng.normal(24, 5, n),
+        'humidity': rng.normal(65, 10, n)
+    })
+    for col in ['soil_moisture', 'ph', 'temperature', 'humidity']:
+        df.loc[rng.random(n) < 0.02, col] = np.nan
+
+    return df
+
+
+# Previous implementations: loop over sensors and rescan the frame per sensor/day
+
+def legacy_daily_averages(df: pd.DataFrame, days: int) -> dict:
+    df = df[df['timestamp'] >= datetime.now() - timedelta(days=days)].copy()
+    df['date'] = df['timestamp'].dt.date
+
+    daily_averages = {}
+    for sensor_id in df['sensor_id'].unique():
+        sensor_data = df[df['sensor_id'] == sensor_id]
+        daily_avg = sensor_data.groupby('date').agg({
+            'soil_moisture': 'mean', 'ph': 'mean', 'temperature': 'mean', 'humidity': 'mean'
+        }).round(2)
+        daily_averages[sensor_id] = [
+            {
+                'date': str(date),
+                **{m: row[m] if not pd.isna(row[m]) else None
+                   for m in ['soil_moisture', 'ph', 'temperature', 'humidity']},
+                'readings_count': int(sensor_data[sensor_data['date'] == date].shape[0])
+            }
+            for date, row in daily_avg.iterrows()
+        ]
+    return daily_averages
+
+
+def legacy_trend_summary(df: pd.DataFrame) -> dict:
+    now = datetime.now()
+    last_7_days = df[df['timestamp'] >= (now - timedelta(days=7))]
+    previous_7_days = df[(df['timestamp'] >= (now - timedelta(days=14))) &
+                         (df['timestamp'] < (now - timedelta(days=7)))]
+
+    trends = {}
+    for sensor_id in df['sensor_id'].unique():
+        last_week = last_7_days[last_7_days['sensor_id'] == sensor_id]
+        prev_week = previous_7_days[previous_7_days['sensor_id'] == sensor_id]
+        trends[sensor_id] = {
+            m: (last_week[m].mean(), prev_week[m].mean())
+            for m in ['soil_moisture', 'ph', 'temperature', 'humidity']
+        }
+    return trends
+
+
+def legacy_sensor_statistics(df: pd.DataFrame) -> dict:
+    stats = {}
+    for sensor_id in df['sensor_id'].unique():
+        sensor_data = df[df['sensor_id'] == sensor_id]
+        metrics = {}
+        for m in ['soil_moisture', 'ph', 'temperature', 'humidity']:
+            d = sensor_data[m].dropna()
+            metrics[m] = (d.iloc[-1], d.mean(), d.min(), d.max(), d.std()) if len(d) else None
+        stats[sensor_id] = {
+            'total_readings': len(sensor_data),
+            'start': sensor_data['timestamp'].min(),
+            'end': sensor_data['timestamp'].max(),
+            'metrics': metrics
+        }
+    return stats
+
+
+# Output checks: grouped results are rounded to 2 decimals, legacy ones are raw
+
+METRICS = ['soil_moisture', 'ph', 'temperature', 'humidity']
+
+
+def same_value(grouped, legacy, tolerance: float = 0.011) -> bool:
+    """Grouped value (None for missing) matches a legacy value (None or NaN for missing)"""
+    legacy_missing = legacy is None or pd.isna(legacy)
+    if grouped is None or legacy_missing:
+        return grouped is None and legacy_missing
+    return abs(grouped - legacy) <= tolerance
+
+
+def compare_daily_averages(grouped: dict, legacy: dict) -> list:
+    mismatches = []
+    for sensor_id in sorted(set(grouped) | set(legacy)):
+        rows = {row['date']: row for row in grouped.get(sensor_id, [])}
+        legacy_rows = {row['date']: row for row in legacy.get(sensor_id, [])}
+        if sorted(rows) != sorted(legacy_rows):
+            mismatches.append(f"{sensor_id}: dates {sorted(rows)} != {sorted(legacy_rows)}")
+            continue
+        # The grouped window starts at midnight, the legacy one N days before now:
+        # the first day holds more readings in the grouped result by design
+        for date in sorted(rows)[1:]:
+            row, legacy_row = rows[date], legacy_rows[date]
+            if row['readings_count'] != legacy_row['readings_count']:
+                mismatches.append(f"{sensor_id} {date}: readings_count {row['readings_count']} "
+                                  f"!= {legacy_row['readings_count']}")
+            for m in METRICS:
+                if not same_value(row[m], legacy_row[m]):
+                    mismatches.append(f"{sensor_id} {date} {m}: {row[m]} != {legacy_row[m]}")
+    return mismatches
+
+
+def compare_trend_summary(grouped: dict, legacy: dict) -> list:
+    mismatches = []
+    for sensor_id in sorted(set(grouped) | set(legacy)):
+        if sensor_id not in grouped or sensor_id not in legacy:
+            mismatches.append(f"{sensor_id}: only in {'grouped' if sensor_id in grouped else 'legacy'}")
+            continue
+        for m in METRICS:
+            trend = grouped[sensor_id].get(m) or {}
+            last_week, prev_week = legacy[sensor_id][m]
+            if not (same_value(trend.get('last_week_avg'), last_week)
+                    and same_value(trend.get('prev_week_avg'), prev_week)):
+                mismatches.append(f"{sensor_id} {m}: {trend} != {(last_week, prev_week)}")
+    return mismatches
+
+
+def compare_sensor_statistics(grouped: dict, legacy: dict) -> list:
+    mismatches = []
+    for sensor_id in sorted(set(grouped) | set(legacy)):
+        if sensor_id not in grouped or sensor_id not in legacy:
+            mismatches.append(f"{sensor_id}: only in {'grouped' if sensor_id in grouped else 'legacy'}")
+            continue
+        stats, legacy_stats = grouped[sensor_id], legacy[sensor_id]
+        if stats['total_readings'] != legacy_stats['total_readings']:
+            mismatches.append(f"{sensor_id}: total_readings {stats['total_readings']} "
+                              f"!= {legacy_stats['total_readings']}")
+        legacy_range = {'start': legacy_stats['start'].strftime('%Y-%m-%d'),
+                        'end': legacy_stats['end'].strftime('%Y-%m-%d')}
+        if stats['date_range'] != legacy_range:
+            mismatches.append(f"{sensor_id}: date_range {stats['date_range']} != {legacy_range}")
+        for m in METRICS:
+            metric = stats['metrics'].get(m)
+            legacy_metric = legacy_stats['metrics'][m]
+            if metric is None or legacy_metric is None:
+                if metric is not None or legacy_metric is not None:
+                    mismatches.append(f"{sensor_id} {m}: {metric} != {legacy_metric}")
+                continue
+            for key, legacy_value in zip(['current', 'average', 'min', 'max', 'std'], legacy_metric):
+                if not same_value(metric[key], legacy_value):
+                    mismatches.append(f"{sensor_id} {m} {key}: {metric[key]} != {legacy_value}")
+    return mismatches
+
+
+def compare_yield_estimates(grouped: dict, legacy: dict) -> list:
+    return [f"{sensor_id}: {grouped.get(sensor_id)} != {legacy.get(sensor_id)}"
+            for sensor_id in sorted(set(grouped) | set(legacy))
+            if grouped.get(sensor_id) != legacy.get(sensor_id)]
+
+
+def timed(fn, *args, repeat: int = 1) -> tuple:
+    """Best wall time of repeat runs in seconds, and the result of the last run"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark AnalyticsEngine aggregations')
+    parser.add_argument('--sensors', type=int, default=100, help='Number of sensors')
+    parser.add_argument('--days', type=int, default=365, help='Days of history')
+    parser.add_argument('--freq', type=str, default='1min', help='Reading interval (pandas offset)')
+    parser.add_argument('--window', type=int, default=30, help='Daily averages window in days')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per measurement (best is reported)')
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the grouped implementation')
+
+    args = parser.parse_args()
+
+    print(f"Generating {args.sensors} sensors x {args.days} days at {args.freq}...")
+    started = time.perf_counter()
+    df = generate_readings(args.sensors, args.days, args.freq)
+    print(f"  {len(df):,} readings in {time.perf_counter() - started:.1f}s")
+
+    engine = AnalyticsEngine(data_source=FrameDataSource(df))
+    estimator = YieldEstimator(engine)
+
+    cases = [
+        ('daily_averages', lambda: engine.calculate_daily_averages(args.window),
+         lambda: legacy_daily_averages(df, args.window), compare_daily_averages),
+        ('trend_summary', engine.calculate_trend_summary,
+         lambda: legacy_trend_summary(df), compare_trend_summary),
+        ('sensor_statistics', engine.get_sensor_statistics,
+         lambda: legacy_sensor_statistics(df), compare_sensor_statistics),
+        ('yield_estimates', estimator.get_all_sensor_yields,
+         lambda: {s: estimator.calculate_yield_score(s) for s in engine.sensor_ids()},
+         compare_yield_estimates)
+    ]
+
+    mismatched = {}
+    print(f"\n{'method':<20}{'grouped (s)':>14}{'legacy (s)':>14}{'speedup':>10}")
+    for name, grouped, legacy, compare in cases:
+        grouped_time, grouped_result = timed(grouped, repeat=args.repeat)
+        if args.skip_legacy:
+            print(f"{name:<20}{grouped_time:>14.3f}{'-':>14}{'-':>10}")
+            continue
+        legacy_time, legacy_result = timed(legacy, repeat=args.repeat)
+        print(f"{name:<20}{grouped_time:>14.3f}{legacy_time:>14.3f}{legacy_time / grouped_time:>9.1f}x")
+        mismatches = compare(grouped_result, legacy_result)
+        if mismatches:
+            mismatched[name] = mismatches
+
+    if mismatched:
+        for name, mismatches in mismatched.items():
+            print(f"\n✗ {name}: {len(mismatches)} mismatches between grouped and legacy output")
+            for mismatch in mismatches[:10]:
+                print(f"  {mismatch}")
+        sys.exit(1)
+    if not args.skip_legacy:
+        print("\n✓ Grouped and legacy outputs match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Ingest Load Test
+Simulates many slow LoRa gateways posting readings at once and compares
+ingest servers: each virtual gateway opens a connection, trickles its JSON
+body over --slow seconds and waits for the response
+
+Start the servers first, e.g.
+    python api_server.py                       # Flask, port 5000
+    gunicorn -c gunicorn.conf.py wsgi:app      # Flask under gunicorn
+    python async_ingest.py --port 5001         # asyncio + Motor
+
+Usage:
+    python benchmarks/bench_ingest_load.py --target flask=http://localhost:5000 \\
+        --target async=http://localhost:5001 --gateways 2000 --slow 2
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+
+def reading_body(gateway: int) -> bytes:
+    """One /api/sensor-data payload"""
+    return json.dumps({
+        'id': f'LOAD_{gateway:05d}',
+        'soil_moisture': round(random.uniform(20, 60), 1),
+        'ph': round(random.uniform(5.5, 7.5), 2),
+        'temperature': round(random.uniform(15, 35), 1),
+        'humidity': round(random.uniform(40, 90), 1),
+        'rssi': random.randint(-120, -40),
+        'snr': round(random.uniform(-10, 10), 1)
+    }).encode()
+
+
+async def post_slowly(host: str, port: int, path: str, body: bytes,
+                      slow: float, chunks: int, timeout: float) -> Tuple[int, float]:
+    """POST body in chunks spread over slow seconds; returns (status, latency)"""
+    started = time.perf_counter()
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+                      f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                      f"Connection: close\r\n\r\n").encode())
+        size = -(-len(body) // chunks)
+        for offset in range(0, len(body), size):
+            await asyncio.sleep(slow / chunks)
+            writer.write(body[offset:offset + size])
+            await writer.drain()
+
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1]), time.perf_counter() - started
+    finally:
+        writer.close()
+
+
+async def run_target(url: str, gateways: int, rounds: int, slow: float,
+                     chunks: int, timeout: float) -> Dict:
+    """Every gateway posts rounds readings, all gateways concurrently"""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    path = (parts.path.rstrip('/') or '') + '/api/sensor-data'
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def gateway(index: int):
+        # Spread connection attempts so the first round is not one SYN burst
+        await asyncio.sleep(random.uniform(0, slow))
+        for _ in range(rounds):
+            try:
+                status, latency = await post_slowly(host, port, path, reading_body(index),
+                                                     slow, chunks, timeout)
+                if status == 200:
+                    latencies.append(latency)
+                else:
+                    errors[f'HTTP {status}'] = errors.get(f'HTTP {status}', 0) + 1
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(gateway(i) for i in range(gateways)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else float('nan')
+
+    return {
+        'ok': len(latencies),
+        'errors': errors,
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'mean': statistics.mean(latencies) if latencies else float('nan')
+    }
+
+
+def raise_file_limit():
+    """Each simulated gateway holds a socket; lift the soft descriptor limit"""
+    if not RESOURCE_AVAILABLE:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Load test ingest servers with slow gateways')
+    parser.add_argument('--target', action='append', required=True,
+                        help='name=base_url of a server to test (repeatable)')
+    parser.add_argument('--gateways', type=int, default=1000, help='Concurrent gateways')
+    parser.add_argument('--rounds', type=int, default=3, help='Readings posted per gateway')
+    parser.add_argument('--slow', type=float, default=2.0, help='Seconds to send each request body')
+    parser.add_argument('--chunks', type=int, default=4, help='Pieces each body is sent in')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-step timeout in seconds')
+
+    args = parser.parse_args()
+    raise_file_limit()
+
+    print(f"{args.gateways} gateways x {args.rounds} readings, bodies trickled over {args.slow}s\n")
+    print(f"{'target':<12}{'ok':>8}{'req/s':>10}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}  errors")
+    for target in args.target:
+        name, _, url = target.partition('=')
+        result = asyncio.run(run_target(url or name, args.gateways, args.rounds,
+                                        args.slow, args.chunks, args.timeout))
+        print(f"{name:<12}{result['ok']:>8}{result['throughput']:>10.1f}{result['p50']:>10.2f}"
+              f"{result['p95']:>10.2f}{result['p99']:>10.2f}  {result['errors'] or '-'}")
+
+
+if __name__ == "__main__":
+    main()
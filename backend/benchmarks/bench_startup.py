@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+API Startup Benchmark
+Times a fresh `import api_server` in a child process: how long until the
+module is imported, /health answers, storage is ready and every subsystem
+has finished loading, for background and eager startup
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 5 --mode background
+    MONGODB_URI=mongodb://localhost:27017/ python benchmarks/bench_startup.py
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child; prints one JSON line with the timings in seconds
+CHILD = """
+import json, time
+started = time.perf_counter()
+import api_server
+imported = time.perf_counter() - started
+client = api_server.app.test_client()
+client.get('/health')
+health = time.perf_counter() - started
+api_server.subsystems.wait('storage')
+storage = time.perf_counter() - started
+for name in api_server.subsystems.get_stats():
+    api_server.subsystems.wait(name)
+everything = time.perf_counter() - started
+states = {name: s['state'] for name, s in api_server.subsystems.get_stats().items()}
+api_server.data_collector.close()
+print('RESULT ' + json.dumps({'import': imported, 'health': health, 'storage': storage,
+                              'all': everything, 'states': states}))
+"""
+
+PHASES = ['import', 'health', 'storage', 'all']
+
+
+def run_once(mode: str) -> dict:
+    """One cold start in a fresh interpreter"""
+    with tempfile.TemporaryDirectory() as archive_dir:
+        env = {**os.environ, 'STARTUP_MODE': mode, 'ARCHIVE_DIR': archive_dir,
+               'LIVE_STREAM_ENABLED': 'false'}
+        result = subprocess.run([sys.executable, '-c', CHILD], cwd=archive_dir, env={
+            **env, 'PYTHONPATH': BACKEND_DIR + os.pathsep + env.get('PYTHONPATH', '')
+        }, capture_output=True, text=True, timeout=300)
+
+    for line in result.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    raise RuntimeError(f"Child failed:\n{result.stderr[-2000:]}")
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark API server startup')
+    parser.add_argument('--runs', type=int, default=3, help='Cold starts per mode (median is reported)')
+    parser.add_argument('--mode', choices=['both', 'background', 'eager'], default='both',
+                        help='STARTUP_MODE to measure')
+
+    args = parser.parse_args()
+    modes = ['background', 'eager'] if args.mode == 'both' else [args.mode]
+
+    print(f"MongoDB: {os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')}")
+    print(f"\n{'mode':<12}" + ''.join(f"{phase + ' (s)':>14}" for phase in PHASES))
+    for mode in modes:
+        runs = [run_once(mode) for _ in range(args.runs)]
+        medians = {phase: statistics.median(r[phase] for r in runs) for phase in PHASES}
+        print(f"{mode:<12}" + ''.join(f"{medians[phase]:>14.2f}" for phase in PHASES))
+
+    print(f"\nSubsystem states: {runs[-1]['states']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Water Balance Benchmark
+Times WaterBalanceAPI.calculate_water_balance end to end without network
+access: satellite series come from an offline GEE backend (synthetic by
+default, or replayed fixtures) and daily sensor means are synthetic unless
+--sensors mongo is given. Series go through the GEE cache as in production;
+--cold-cache clears it before every call, --no-cache bypasses it
+
+Usage:
+    python benchmarks/bench_water_balance.py
+    python benchmarks/bench_water_balance.py --days 30 90 365 --runs 20 --latency 0.8
+    python benchmarks/bench_water_balance.py --plots 50 --profile
+    python benchmarks/bench_water_balance.py --cold-cache --latency 0.8
+    GEE_FIXTURE_DIR=fixtures/gee python benchmarks/bench_water_balance.py --backend replay
+"""
+
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Marondera, Zimbabwe
+LAT, LNG = -18.30252535, 31.56415345
+
+
+def synthetic_daily_sensor(start_date: str, end_date: str) -> Tuple[Dict[str, Dict], int]:
+    """Daily temperature / humidity / soil moisture means, as get_daily_sensor_data returns them"""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    days = (datetime.strptime(end_date, '%Y-%m-%d') - start).days + 1
+    daily = {}
+    for i in range(days):
+        day = start + timedelta(days=i)
+        season = math.cos(2 * math.pi * (day.timetuple().tm_yday - 20) / 365.25)
+        daily[day.strftime('%Y-%m-%d')] = {
+            'temperature': 21.0 + 4.0 * season + 2.0 * math.sin(i * 0.7),
+            'humidity': 62.0 + 15.0 * season + 5.0 * math.cos(i * 0.5),
+            'soil_moisture': 35.0 + 12.0 * season + 6.0 * math.sin(i * 0.3)
+        }
+    return daily, days * 1440  # one reading a minute
+
+
+def date_window(days: int) -> Tuple[str, str]:
+    end = datetime.now()
+    return (end - timedelta(days=days)).strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+
+def timed_runs(fn: Callable, runs: int, before: Callable = None) -> List[float]:
+    times = []
+    for _ in range(runs):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def summarize(times: List[float]) -> str:
+    ordered = sorted(times)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    return f"{statistics.mean(times) * 1000:>10.1f}{statistics.median(times) * 1000:>10.1f}{p95 * 1000:>10.1f}"
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the water balance physics path offline')
+    parser.add_argument('--backend', choices=['synthetic', 'replay'], default='synthetic',
+                        help='Offline GEE backend')
+    parser.add_argument('--days', type=int, nargs='+', default=[30, 90, 365], help='Date ranges to time')
+    parser.add_argument('--runs', type=int, default=10, help='Calls per date range')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Simulated Earth Engine round-trip per query in seconds (synthetic)')
+    parser.add_argument('--plots', type=int, default=0,
+                        help='Also compare one batch call against per-plot calls for this many plots')
+    parser.add_argument('--sensors', choices=['synthetic', 'mongo'], default='synthetic',
+                        help='Daily sensor means: generated, or read from MONGODB_URI')
+    parser.add_argument('--profile', action='store_true', help='cProfile one call over the longest range')
+    parser.add_argument('--cold-cache', action='store_true', help='Clear the GEE cache before every call')
+    parser.add_argument('--no-cache', action='store_true', help='Fetch every series from the backend')
+
+    args = parser.parse_args()
+
+    # gee_service reads its settings at import
+    os.environ['GEE_BACKEND'] = args.backend
+    os.environ['GEE_SYNTHETIC_LATENCY'] = str(args.latency)
+    if args.no_cache:
+        os.environ['GEE_CACHE_ENABLED'] = 'false'
+    # A throwaway cache file, so --cold-cache never clears the API's cache
+    os.environ.setdefault('GEE_CACHE_PATH', os.path.join(tempfile.mkdtemp(prefix='bench_gee_'), 'gee_cache.sqlite'))
+
+    from water_balance_api import WaterBalanceAPI
+
+    api = WaterBalanceAPI()
+    if args.sensors == 'synthetic':
+        api.get_daily_sensor_data = lambda start_date, end_date, sensor_id=None: \
+            synthetic_daily_sensor(start_date, end_date)
+
+    gee = api.gee_service
+    cache = 'off' if gee.cache is None else ('cold' if args.cold_cache else 'on')
+    print(f"GEE backend: {args.backend} (latency {args.latency}s), cache: {cache}, "
+          f"sensors: {args.sensors}, {args.runs} runs\n")
+    print(f"{'range':<10}{'step':<20}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    def clear_cache():
+        if args.cold_cache and gee.cache is not None:
+            gee.cache.clear()
+
+    for days in args.days:
+        start_date, end_date = date_window(days)
+        steps = [
+            ('gee fetch', lambda: gee.fetch_comprehensive_data(LAT, LNG, start_date, end_date)),
+            ('sensor days', lambda: api.get_daily_sensor_data(start_date, end_date)),
+            ('water balance', lambda: api.calculate_water_balance(LAT, LNG, start_date, end_date))
+        ]
+        for step, fn in steps:
+            print(f"{f'{days}d':<10}{step:<20}{summarize(timed_runs(fn, args.runs, clear_cache))}")
+
+    if args.plots:
+        start_date, end_date = date_window(args.days[0])
+        plots = [{'id': f'plot_{i}', 'lat': LAT + 0.01 * (i // 10), 'lng': LNG + 0.01 * (i % 10)}
+                 for i in range(args.plots)]
+
+        def per_plot():
+            for plot in plots:
+                api.calculate_water_balance(plot['lat'], plot['lng'], start_date, end_date)
+
+        print(f"\n{args.plots} plots over {args.days[0]}d")
+        print(f"{'per-plot calls':<30}{summarize(timed_runs(per_plot, max(1, args.runs // 5), clear_cache))}")
+        print(f"{'one batch call':<30}"
+              f"{summarize(timed_runs(lambda: api.calculate_water_balance_batch(plots, start_date, end_date), max(1, args.runs // 5), clear_cache))}")
+
+    if args.profile:
+        import cProfile
+        import pstats
+
+        start_date, end_date = date_window(max(args.days))
+        clear_cache()
+        profiler = cProfile.Profile()
+        profiler.runcall(api.calculate_water_balance, LAT, LNG, start_date, end_date)
+        print(f"\nProfile of one {max(args.days)}d call:")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+
+    print(f"\nGEE backend stats: {gee.source.get_stats()}")
+    if gee.cache is not None:
+        print(f"GEE cache stats: {gee.cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,12 +37,12 @@ class ChartGenerator:
     
     def create_trend_chart(self, sensor_id: str, days: int = 7) -> str:
         """Create a trend chart for a specific sensor over the last N days"""
-        df = self.analytics.load_data()
+        cutoff_date = datetime.now() - timedelta(days=days)
+        df = self.analytics.load_data(start=cutoff_date, sensor_ids=[sensor_id])
         if df.empty:
-            return self._create_no_data_chart("No data available")
+            return self._create_no_data_chart(f"No data for {sensor_id}")
         
         # Filter data for the sensor and time period
-        cutoff_date = datetime.now() - timedelta(days=days)
         sensor_data = df[
             (df['sensor_id'] == sensor_id) & 
             (df['timestamp'] >= cutoff_date)
@@ -206,12 +206,12 @@ class ChartGenerator:
     
     def create_comparison_chart(self, metric: str, days: int = 7) -> str:
         """Create a comparison chart showing all sensors for a specific metric"""
-        df = self.analytics.load_data()
+        cutoff_date = datetime.now() - timedelta(days=days)
+        df = self.analytics.load_data(start=cutoff_date, columns=[metric])
         if df.empty:
             return self._create_no_data_chart("No data available")
         
         # Filter data for the time period
-        cutoff_date = datetime.now() - timedelta(days=days)
         recent_data = df[df['timestamp'] >= cutoff_date].copy()
         
         if recent_data.empty:
@@ -302,9 +302,8 @@ def generate_all_charts(analytics_engine, yield_estimator, output_dir: str = "st
     charts = {}
     
     # Get all sensors
-    df = analytics_engine.load_data()
-    if not df.empty:
-        sensors = df['sensor_id'].unique()
+    sensors = analytics_engine.sensor_ids()
+    if sensors:
         
         # Generate trend charts for each sensor
         for sensor in sensors:
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+CropIoT Analytics Data Sources
+Storage backends for the AnalyticsEngine that push time-window, sensor and
+column filters down to the store instead of loading the full history
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_COLUMNS = ['soil_moisture', 'ph', 'temperature', 'humidity']
+ALL_COLUMNS = ['timestamp', 'sensor_id', 'soil_moisture', 'ph',
+               'temperature', 'humidity', 'rssi', 'snr']
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _select_columns(columns: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """Requested columns plus the ones every analytics frame needs"""
+    if columns is None:
+        return None
+    selected = ['timestamp', 'sensor_id']
+    selected += [c for c in columns if c not in selected]
+    return selected
+
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse timestamps, turn error values (-999) into NaN and sort by time"""
+    if df.empty:
+        return pd.DataFrame()
+
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+            df[col] = df[col].replace(-999, np.nan)
+
+    return df.sort_values('timestamp', kind='mergesort').reset_index(drop=True)
+
+
+class CSVDataSource:
+    """Sensor readings from the CSV file (loads only the requested columns)"""
+
+    def __init__(self, csv_file: str):
+        self.csv_file = csv_file
+
+    def load(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             sensor_ids: Optional[Iterable[str]] = None,
+             columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Load readings in [start, end) for the given sensors"""
+        if not os.path.exists(self.csv_file):
+            return pd.DataFrame()
+
+        df = pd.read_csv(self.csv_file, usecols=_select_columns(columns),
+                         dtype={'timestamp': str, 'sensor_id': str})
+
+        # Timestamps are stored as '%Y-%m-%d %H:%M:%S', so the window can be
+        # applied on the raw strings before anything is parsed
+        if start is not None:
+            df = df[df['timestamp'] >= start.strftime(TIMESTAMP_FORMAT)]
+        if end is not None:
+            df = df[df['timestamp'] < end.strftime(TIMESTAMP_FORMAT)]
+        if sensor_ids is not None:
+            df = df[df['sensor_id'].isin(list(sensor_ids))]
+
+        return clean_frame(df.copy())
+
+    def sensor_ids(self) -> List[str]:
+        """Every sensor present in the file"""
+        if not os.path.exists(self.csv_file):
+            return []
+        ids = pd.read_csv(self.csv_file, usecols=['sensor_id'], dtype=str)['sensor_id']
+        return list(ids.dropna().unique())
+
+    def version(self):
+        """Changes whenever the file is written"""
+        try:
+            stat = os.stat(self.csv_file)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def load_since(self, cursor: Optional[int] = None,
+                   start: Optional[datetime] = None) -> Tuple[pd.DataFrame, Optional[int]]:
+        """
+        Load rows appended after a byte offset (from the header when None),
+        optionally only those timestamped at or after start
+
+        Only complete lines are consumed, so a batch that is still being
+        written is picked up by the next call. Returns (rows, new offset);
+        the offset is None when the file shrank and must be reloaded.
+        """
+        if not os.path.exists(self.csv_file):
+            return pd.DataFrame(), 0
+
+        since = start
+        with open(self.csv_file, 'rb') as file:
+            header = file.readline()
+            offset = cursor if cursor is not None else len(header)
+            if os.fstat(file.fileno()).st_size < offset:
+                return pd.DataFrame(), None
+
+            file.seek(offset)
+            data = file.read()
+
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return pd.DataFrame(), offset
+
+        df = pd.read_csv(io.BytesIO(header + data[:end]), dtype={'timestamp': str, 'sensor_id': str})
+        if since is not None:
+            df = df[df['timestamp'] >= since.strftime(TIMESTAMP_FORMAT)]
+        return clean_frame(df.copy()), offset + end
+
+
+class MongoDataSource:
+    """Sensor readings from MongoDB with filters and projection applied server-side"""
+
+    def __init__(self, collection, batch_size: int = 5000, overlap_seconds: float = 60.0):
+        self.collection = collection
+        self.batch_size = batch_size
+        # ObjectIds are made by each writer (ingest buffer, other workers,
+        # async_ingest) before the insert commits, so they do not arrive in
+        # order; incremental loads re-read this much before the newest _id seen
+        self.overlap_seconds = overlap_seconds
+
+    def load(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             sensor_ids: Optional[Iterable[str]] = None,
+             columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Load readings in [start, end) for the given sensors"""
+        query = {}
+        if start is not None or end is not None:
+            query['timestamp'] = {}
+            if start is not None:
+                query['timestamp']['$gte'] = start
+            if end is not None:
+                query['timestamp']['$lt'] = end
+        if sensor_ids is not None:
+            query['sensor_id'] = {'$in': list(sensor_ids)}
+
+        selected = _select_columns(columns) or ALL_COLUMNS
+        projection = {'_id': 0, **{col: 1 for col in selected}}
+
+        cursor = self.collection.find(query, projection).batch_size(self.batch_size)
+        df = pd.DataFrame(list(cursor), columns=selected)
+
+        return clean_frame(df)
+
+    def sensor_ids(self) -> List[str]:
+        """Every sensor present in the collection"""
+        return self.collection.distinct('sensor_id')
+
+    def version(self):
+        """MongoDB has no cheap change marker; callers rely on load_since"""
+        return None
+
+    def load_since(self, cursor=None, start: Optional[datetime] = None) -> Tuple[pd.DataFrame, object]:
+        """
+        Load documents not returned by earlier calls (all when cursor is None),
+        optionally only those timestamped at or after start
+
+        The cursor is (newest ObjectId, ObjectIds seen in the overlap window
+        before it). Each call re-reads the overlap window and skips the ids
+        already seen, so a reading that commits after a newer _id was read is
+        still picked up. Returns (rows, new cursor).
+        """
+        query = {}
+        newest, seen = cursor if cursor is not None else (None, frozenset())
+        if newest is not None:
+            floor = newest.generation_time - timedelta(seconds=self.overlap_seconds)
+            query['_id'] = {'$gte': ObjectId.from_datetime(floor)}
+        if start is not None:
+            query['timestamp'] = {'$gte': start}
+        projection = {col: 1 for col in ALL_COLUMNS}
+
+        documents = list(self.collection.find(query, projection).batch_size(self.batch_size))
+        if not documents:
+            return pd.DataFrame(), (newest, seen)
+
+        newest = max([doc['_id'] for doc in documents] + ([newest] if newest is not None else []))
+        floor = ObjectId.from_datetime(newest.generation_time - timedelta(seconds=self.overlap_seconds))
+        new_documents = [doc for doc in documents if doc['_id'] not in seen]
+        seen = frozenset([oid for oid in seen if oid >= floor] +
+                         [doc['_id'] for doc in documents if doc['_id'] >= floor])
+
+        df = pd.DataFrame(new_documents, columns=ALL_COLUMNS)
+        return clean_frame(df), (newest, seen)
+
+
+class ParquetDataSource:
+    """Sensor readings from the partitioned Parquet archive (partition and column pruning)"""
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def load(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             sensor_ids: Optional[Iterable[str]] = None,
+             columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Load readings in [start, end) for the given sensors"""
+        return clean_frame(self.archive.read(start=start, end=end, sensor_ids=sensor_ids,
+                                             columns=columns))
+
+    def sensor_ids(self) -> List[str]:
+        """Every sensor present in the archive"""
+        return self.archive.sensor_ids()
+
+    def version(self):
+        """Changes whenever the archive writes or compacts files"""
+        return self.archive.generation
+
+    def load_since(self, cursor=None, start: Optional[datetime] = None) -> Tuple[pd.DataFrame, Optional[frozenset]]:
+        """
+        Load part files not seen before, optionally only rows at or after start.
+        The cursor is the set of files already loaded; it is None (full reload)
+        when compaction replaced any of them.
+        """
+        df, files = self.archive.read_new_files(cursor or frozenset(), start=start)
+        return clean_frame(df), files
+
+
+class SnapshotDataSource:
+    """
+    Process-wide cached DataFrame in front of another data source
+
+    All analytics endpoints read from one in-memory snapshot. It is refreshed
+    by appending only the rows added since the last refresh (CSV byte offset,
+    MongoDB ObjectIds, archive part files) when the version marker changes - the ingest
+    generation counter when one is given, the file mtime/size otherwise. The
+    horizon moves forward with every append. A full reload happens on first
+    use, when the source cannot continue its cursor (archive compaction) and,
+    if a ttl is given, when the snapshot is older than ttl seconds (to pick up
+    deleted or edited readings). Windows reaching past the snapshot horizon are
+    passed through to the underlying source.
+    """
+
+    def __init__(self, source, ttl: Optional[float] = None, horizon_days: Optional[int] = None,
+                 version_fn: Optional[Callable[[], object]] = None):
+        """
+        Args:
+            source: CSVDataSource, MongoDataSource or ParquetDataSource
+            ttl: Seconds after which the snapshot is fully reloaded (None or 0: never)
+            horizon_days: Days of history kept in memory (None keeps everything)
+            version_fn: Returns a value that changes whenever new data is stored
+        """
+        self.source = source
+        self.ttl = ttl
+        self.horizon_days = horizon_days
+        self.version_fn = version_fn or source.version
+
+        self._df: Optional[pd.DataFrame] = None
+        self._cursor = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._covers_from: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+        self.stats = {'full_loads': 0, 'incremental_loads': 0, 'hits': 0}
+
+    def _horizon_start(self) -> Optional[datetime]:
+        if not self.horizon_days:
+            return None
+        return datetime.now() - timedelta(days=self.horizon_days)
+
+    def _trim(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Drop rows older than the horizon"""
+        self._covers_from = self._horizon_start()
+        if self._covers_from is None or df.empty:
+            return df
+        return df[df['timestamp'] >= self._covers_from].reset_index(drop=True)
+
+    def _full_load(self):
+        # The horizon is pushed down to the store, so only the window is read
+        df, cursor = self.source.load_since(None, start=self._horizon_start())
+        self._df = self._trim(df)
+        self._cursor = cursor
+        self._loaded_at = time.monotonic()
+        self.stats['full_loads'] += 1
+
+    def _append(self):
+        new_rows, cursor = self.source.load_since(self._cursor)
+        if cursor is None:
+            self._full_load()
+            return
+
+        self._cursor = cursor
+        if new_rows.empty:
+            return
+
+        combined = new_rows if self._df.empty else pd.concat([self._df, new_rows], ignore_index=True)
+        # Readings may arrive out of order (bulk uploads with explicit timestamps)
+        if not combined['timestamp'].is_monotonic_increasing:
+            combined = combined.sort_values('timestamp', kind='mergesort').reset_index(drop=True)
+
+        self._df = self._trim(combined)
+        self.stats['incremental_loads'] += 1
+
+    def snapshot(self) -> pd.DataFrame:
+        """Current snapshot, refreshed if stale (do not modify the returned frame)"""
+        with self._lock:
+            version = self.version_fn()
+
+            if self._df is None or (self.ttl and time.monotonic() - self._loaded_at > self.ttl):
+                self._full_load()
+            elif version is None or version != self._version:
+                self._append()
+            else:
+                self.stats['hits'] += 1
+
+            self._version = version
+            return self._df
+
+    def covers(self, start: Optional[datetime]) -> bool:
+        """True if a window starting at start is (or, before the first load, will be) held in memory"""
+        if not self.horizon_days:
+            return True
+        covers_from = self._covers_from if self._df is not None else self._horizon_start()
+        return start is not None and covers_from is not None and start >= covers_from
+
+    def load(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             sensor_ids: Optional[Iterable[str]] = None,
+             columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Load readings in [start, end) for the given sensors"""
+        # Windows reaching past the horizon go to the store without refreshing the snapshot
+        if not self.covers(start):
+            return self.source.load(start=start, end=end, sensor_ids=sensor_ids, columns=columns)
+        df = self.snapshot()
+        if not self.covers(start):
+            return self.source.load(start=start, end=end, sensor_ids=sensor_ids, columns=columns)
+        if df.empty:
+            return pd.DataFrame()
+
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df['timestamp'] >= start
+        if end is not None:
+            mask &= df['timestamp'] < end
+        if sensor_ids is not None:
+            mask &= df['sensor_id'].isin(list(sensor_ids))
+
+        selected = _select_columns(columns)
+        result = df.loc[mask, selected] if selected is not None else df.loc[mask]
+        return result.reset_index(drop=True).copy()
+
+    def sensor_ids(self) -> List[str]:
+        """Every sensor present in the store"""
+        if self.horizon_days:
+            return self.source.sensor_ids()
+        df = self.snapshot()
+        return list(df['sensor_id'].dropna().unique()) if not df.empty else []
+
+    def version(self):
+        return self.version_fn()
+
+    def load_since(self, cursor=None, start: Optional[datetime] = None):
+        return self.source.load_since(cursor, start=start)
+
+    def get_stats(self) -> dict:
+        """Snapshot statistics"""
+        return {
+            **self.stats,
+            'rows': 0 if self._df is None else len(self._df),
+            'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._df is not None else None
+        }
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+CropIoT Chart Downsampling
+Reduces long sensor series to a bounded number of points with NumPy, either
+by Largest-Triangle-Three-Buckets (keeps peaks and dips) or by time-bucket means
+"""
+
+import logging
+import warnings
+from typing import Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DOWNSAMPLING_METHODS = ('lttb', 'mean')
+
+
+def lttb_indices(x: np.ndarray, ys: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets
+
+    All metrics of a sensor share one time axis, so one point is picked per
+    bucket for every column of ys: the one with the largest triangle area summed
+    over the columns, each scaled to its own range so no metric dominates.
+
+    Args:
+        x: Sorted time axis as numbers (n,)
+        ys: Values (n, k); NaN marks missing readings
+        max_points: Points to keep (at least 3)
+
+    Returns:
+        Sorted indices into x, first and last point included
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    with warnings.catch_warnings():
+        # A metric with no readings at all just contributes nothing
+        warnings.simplefilter('ignore', RuntimeWarning)
+        span = np.nanmax(ys, axis=0) - np.nanmin(ys, axis=0)
+    span[~np.isfinite(span) | (span == 0)] = 1.0
+    scaled = np.nan_to_num(ys / span)
+
+    # Bucket boundaries for the n - 2 inner points
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+    previous = 0
+
+    for i in range(max_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        if next_stop <= next_start:
+            next_start, next_stop = n - 1, n
+
+        # Average of the next bucket is the third triangle corner
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = scaled[next_start:next_stop].mean(axis=0)
+
+        px, py = x[previous], scaled[previous]
+        bx, by = x[start:stop], scaled[start:stop]
+        area = np.abs((px - avg_x) * (by - py) - (px - bx)[:, None] * (avg_y - py)).sum(axis=1)
+
+        previous = start + int(np.argmax(area))
+        kept[i + 1] = previous
+
+    return kept
+
+
+def bucket_means(x: np.ndarray, ys: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean of every column over max_points equal time buckets
+
+    Empty buckets are dropped; a bucket where a metric has no readings gets NaN.
+
+    Returns:
+        (bucket start times, means (m, k))
+    """
+    n = len(x)
+    if max_points >= n or max_points < 1:
+        return x, ys
+
+    x0 = x[0]
+    width = max((x[-1] - x0) / max_points, 1)
+    bucket = np.minimum(((x - x0) / width).astype(np.int64), max_points - 1)
+
+    valid = ~np.isnan(ys)
+    counts = np.zeros((max_points, ys.shape[1]))
+    sums = np.zeros((max_points, ys.shape[1]))
+    for col in range(ys.shape[1]):
+        counts[:, col] = np.bincount(bucket, weights=valid[:, col], minlength=max_points)
+        sums[:, col] = np.bincount(bucket, weights=np.where(valid[:, col], ys[:, col], 0.0),
+                                   minlength=max_points)
+
+    occupied = np.bincount(bucket, minlength=max_points) > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+
+    starts = (x0 + np.arange(max_points) * width).astype(x.dtype)
+    return starts[occupied], means[occupied]
+
+
+def downsample(x: np.ndarray, ys: np.ndarray, max_points: int,
+               method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a series to at most max_points points
+
+    Args:
+        x: Sorted time axis (int64 nanoseconds or any numeric)
+        ys: Values (n, k)
+        max_points: Upper bound on returned points (0 or None keeps everything)
+        method: 'lttb' (keeps real readings) or 'mean' (time-bucket averages)
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    if not max_points or len(x) <= max_points:
+        return x, ys
+
+    if method == 'mean':
+        return bucket_means(x, ys, max_points)
+
+    kept = lttb_indices(x, ys, max_points)
+    return x[kept], ys[kept]
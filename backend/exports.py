@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+CropIoT Data Export
+Streams sensor readings from MongoDB, the Parquet archive or the CSV file as
+CSV, NDJSON or Parquet chunks, optionally gzip-compressed, in constant memory
+"""
+
+import io
+import logging
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+from data_sources import clean_frame
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_EXPORT_AVAILABLE = True
+except ImportError:
+    PARQUET_EXPORT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ['timestamp', 'sensor_id', 'soil_moisture', 'ph',
+                  'temperature', 'humidity', 'rssi', 'snr']
+SENSOR_METRICS = ['soil_moisture', 'ph', 'temperature', 'humidity']
+LINK_METRICS = ['rssi', 'snr']
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet')
+}
+
+
+def _conform(df: pd.DataFrame) -> pd.DataFrame:
+    """Export column order; missing values as NaN"""
+    for col in EXPORT_COLUMNS:
+        if col not in df.columns:
+            df[col] = float('nan')
+    df = df[EXPORT_COLUMNS].copy()
+    for col in SENSOR_METRICS + LINK_METRICS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+# ----------------------------------------------------------------------
+# Sources: each yields DataFrames in time order
+# ----------------------------------------------------------------------
+
+def iter_mongodb_frames(collection, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        sensor_id: Optional[str] = None, batch_size: int = 5000) -> Iterator[pd.DataFrame]:
+    """Read readings with one cursor, batch_size documents per frame"""
+    query = {}
+    if start is not None or end is not None:
+        query['timestamp'] = {}
+        if start is not None:
+            query['timestamp']['$gte'] = start
+        if end is not None:
+            query['timestamp']['$lt'] = end
+    if sensor_id:
+        query['sensor_id'] = sensor_id
+
+    projection = {'_id': 0, **{col: 1 for col in EXPORT_COLUMNS}}
+    cursor = collection.find(query, projection).sort('timestamp', 1).batch_size(batch_size)
+
+    try:
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield _conform(clean_frame(pd.DataFrame(batch, columns=EXPORT_COLUMNS)))
+                batch = []
+        if batch:
+            yield _conform(clean_frame(pd.DataFrame(batch, columns=EXPORT_COLUMNS)))
+    finally:
+        cursor.close()
+
+
+def iter_archive_frames(archive, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        sensor_id: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Read readings from the Parquet archive one day partition at a time"""
+    sensor_ids = [sensor_id] if sensor_id else None
+    for df in archive.iter_days(start, end, sensor_ids):
+        yield _conform(df)
+
+
+def iter_csv_frames(csv_file: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    sensor_id: Optional[str] = None, chunksize: int = 50000) -> Iterator[pd.DataFrame]:
+    """Read readings from the CSV file in chunks"""
+    try:
+        reader = pd.read_csv(csv_file, chunksize=chunksize, dtype={'timestamp': str, 'sensor_id': str})
+    except FileNotFoundError:
+        return
+
+    with reader:
+        for chunk in reader:
+            if start is not None:
+                chunk = chunk[chunk['timestamp'] >= start.strftime('%Y-%m-%d %H:%M:%S')]
+            if end is not None:
+                chunk = chunk[chunk['timestamp'] < end.strftime('%Y-%m-%d %H:%M:%S')]
+            if sensor_id:
+                chunk = chunk[chunk['sensor_id'] == sensor_id]
+            if not chunk.empty:
+                yield _conform(clean_frame(chunk.copy()))
+
+
+# ----------------------------------------------------------------------
+# Encoders: frames -> bytes chunks
+# ----------------------------------------------------------------------
+
+def _with_string_timestamps(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+
+def encode_csv(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """CSV in the crop_data.csv layout (-999 marks missing sensor values)"""
+    yield (','.join(EXPORT_COLUMNS) + '\n').encode()
+    for df in frames:
+        df = _with_string_timestamps(df)
+        df[SENSOR_METRICS] = df[SENSOR_METRICS].fillna(-999)
+        df[LINK_METRICS] = df[LINK_METRICS].fillna(0)
+        yield df.to_csv(index=False, header=False, lineterminator='\n').encode()
+
+
+def encode_ndjson(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """One JSON object per line (null marks missing values)"""
+    for df in frames:
+        text = _with_string_timestamps(df).to_json(orient='records', lines=True)
+        yield (text if text.endswith('\n') else text + '\n').encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object collecting bytes until the generator takes them"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def encode_parquet(frames: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """Parquet file written one row group per frame"""
+    if not PARQUET_EXPORT_AVAILABLE:
+        raise RuntimeError("pyarrow is required for Parquet export")
+
+    schema = pa.schema(
+        [('timestamp', pa.timestamp('us')), ('sensor_id', pa.string())] +
+        [(col, pa.float64()) for col in SENSOR_METRICS + LINK_METRICS]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for df in frames:
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            data = sink.take()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """gzip-compress a stream of byte chunks, flushing after each so bytes go out right away"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'ndjson': encode_ndjson,
+    'parquet': encode_parquet
+}
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+CropIoT GEE Cache
+Persistent per-day cache of Earth Engine time series, so repeated and
+overlapping requests for the same field only ask Earth Engine for days it
+has not answered yet
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 3600
+
+
+@dataclass(frozen=True)
+class ProductPolicy:
+    """
+    How long cached days of one product stay valid
+
+    Days younger than settle_days may still change (late scenes, preliminary
+    products, composites still being produced) and are refetched after
+    recent_ttl seconds; older days are final and kept for settled_ttl.
+    """
+    dataset: str
+    recipe: str  # band selection / conversion applied to the dataset
+    settle_days: int
+    recent_ttl: float
+    settled_ttl: float = 365 * DAY
+
+
+# Cadence of each product fetched by GEEService
+PRODUCT_POLICIES = {
+    # Sentinel-2: 5-day revisit, scenes appear within ~2 days
+    'ndvi': ProductPolicy('COPERNICUS/S2_SR_HARMONIZED', 'NDVI=B8,B4;cloud<20', settle_days=10, recent_ttl=6 * 3600),
+    # CHIRPS: preliminary after ~2 days, final about a month after the month ends
+    'rainfall': ProductPolicy('UCSB-CHG/CHIRPS/DAILY', 'precipitation', settle_days=60, recent_ttl=DAY),
+    # MOD16A2GF: gap-filled 8-day ET, produced once the year is complete
+    'et': ProductPolicy('MODIS/061/MOD16A2GF', 'ET*0.1/8', settle_days=400, recent_ttl=7 * DAY),
+    # MOD11A2: 8-day LST composite, available ~1-2 weeks after the period
+    'lst': ProductPolicy('MODIS/061/MOD11A2', 'LST_Day_1km*0.02-273.15', settle_days=16, recent_ttl=DAY),
+    # SMAP L4: 3-hourly, about 3 days latency
+    'soil_moisture': ProductPolicy('NASA/SMAP/SPL4SMGP/007', 'sm_surface', settle_days=7, recent_ttl=6 * 3600),
+}
+
+
+def series_key(product: str, lat: float, lng: float, buffer_m: int, decimals: int = 3,
+               namespace: str = '') -> str:
+    """
+    Content address of one time series: dataset, processing recipe and AOI
+
+    Coordinates are rounded (3 decimals ~ 110 m) so GPS jitter around the
+    same field maps to the same cached series. A namespace keeps series of
+    offline backends apart from Earth Engine's.
+    """
+    policy = PRODUCT_POLICIES[product]
+    fields = {
+        'dataset': policy.dataset,
+        'recipe': policy.recipe,
+        'lat': round(lat, decimals),
+        'lng': round(lng, decimals),
+        'buffer_m': buffer_m
+    }
+    if namespace:
+        fields['source'] = namespace
+    descriptor = json.dumps(fields, sort_keys=True)
+    return hashlib.blake2b(descriptor.encode(), digest_size=16).hexdigest()
+
+
+def date_range(start_date: str, end_date: str) -> List[str]:
+    """Days in [start_date, end_date) as YYYY-MM-DD, the same span Earth Engine filterDate uses"""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days)]
+
+
+def contiguous_runs(days: List[str]) -> List[Tuple[str, str]]:
+    """Split sorted YYYY-MM-DD days into [start, end) spans of consecutive days"""
+    runs = []
+    for day in days:
+        following = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        if runs and runs[-1][1] == day:
+            runs[-1] = (runs[-1][0], following)
+        else:
+            runs.append((day, following))
+    return runs
+
+
+def daily_means(time_series: List[Dict]) -> Dict[str, float]:
+    """Collapse several images on one day (overlapping tiles, sub-daily products) to their mean"""
+    sums: Dict[str, List[float]] = {}
+    for item in time_series:
+        sums.setdefault(item['date'], []).append(item['value'])
+    return {date: sum(values) / len(values) for date, values in sums.items()}
+
+
+class GEECache:
+    """
+    SQLite store of per-day values
+
+    Every requested day is recorded, including days without an image (value
+    NULL), so a 5-day revisit product does not refetch its empty days. WAL
+    mode lets every gunicorn worker share one file.
+    """
+
+    def __init__(self, path: str, aoi_decimals: int = 3, namespace: str = ''):
+        self.path = path
+        self.aoi_decimals = aoi_decimals
+        self.namespace = namespace
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS gee_days (
+                series TEXT NOT NULL,
+                date TEXT NOT NULL,
+                value REAL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (series, date)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+        self.stats = {'days_hit': 0, 'days_missed': 0, 'fetches': 0, 'series_served': 0}
+
+    def _fresh(self, policy: ProductPolicy, date: str, fetched_at: float, now: float) -> bool:
+        """Days fetched while still settling expire after recent_ttl, final days after settled_ttl"""
+        day = datetime.strptime(date, '%Y-%m-%d').timestamp()
+        settled = fetched_at - day >= policy.settle_days * DAY
+        return now - fetched_at < (policy.settled_ttl if settled else policy.recent_ttl)
+
+    def get_days(self, key: str, days: List[str]) -> Dict[str, Tuple[Optional[float], float]]:
+        """Cached (value, fetched_at) for the requested days"""
+        if not days:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT date, value, fetched_at FROM gee_days WHERE series = ? AND date >= ? AND date <= ?',
+                (key, days[0], days[-1])
+            ).fetchall()
+        return {date: (value, fetched_at) for date, value, fetched_at in rows}
+
+    def put_days(self, key: str, values: Dict[str, Optional[float]], fetched_at: float):
+        """Store one value (or None for no observation) per day"""
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO gee_days (series, date, value, fetched_at) VALUES (?, ?, ?, ?)',
+                [(key, date, value, fetched_at) for date, value in values.items()]
+            )
+            self._conn.commit()
+
+    def _lookup(self, policy: ProductPolicy, key: str, days: List[str],
+                now: float) -> Tuple[Dict[str, Optional[float]], List[str]]:
+        """Fresh cached values of the requested days, and the days that must be fetched"""
+        cached = self.get_days(key, days)
+        missing = [d for d in days if d not in cached or not self._fresh(policy, d, cached[d][1], now)]
+        values = {d: cached[d][0] for d in days if d in cached}
+        return values, missing
+
+    def time_series(self, product: str, lat: float, lng: float, buffer_m: int,
+                    start_date: str, end_date: str,
+                    fetch: Callable[[str, str], List[Dict]]) -> List[Dict]:
+        """
+        Daily {date, value} series for [start_date, end_date), fetching only stale or missing days
+
+        fetch(start, end) runs the Earth Engine query for a sub-range, once
+        for each contiguous run of missing days.
+        """
+        series = self.time_series_batch(product, {None: (lat, lng, buffer_m)}, start_date, end_date,
+                                        lambda plot_ids, start, end: {None: fetch(start, end)})
+        return series[None]
+
+    def time_series_batch(self, product: str, plots: Dict[Any, Tuple[float, float, int]],
+                          start_date: str, end_date: str,
+                          fetch: Callable[[List, str, str], Dict[Any, List[Dict]]]) -> Dict[Any, List[Dict]]:
+        """
+        Daily series of several plots ({plot_id: (lat, lng, buffer_m)}) sharing one fetch
+
+        Each contiguous run of stale or missing days is fetched with one
+        fetch(plot_ids, start, end) shared by every plot missing that run, so
+        a farm whose plots were cached together costs one Earth Engine query
+        per gap, and days already cached between two gaps are not fetched again.
+        """
+        policy = PRODUCT_POLICIES[product]
+        days = date_range(start_date, end_date)
+        now = time.time()
+
+        keys, values, missing = {}, {}, {}
+        for plot_id, (lat, lng, buffer_m) in plots.items():
+            keys[plot_id] = series_key(product, lat, lng, buffer_m, self.aoi_decimals, self.namespace)
+            values[plot_id], plot_missing = self._lookup(policy, keys[plot_id], days, now)
+            if plot_missing:
+                missing[plot_id] = plot_missing
+
+        runs: Dict[Tuple[str, str], List] = {}
+        for plot_id, plot_missing in missing.items():
+            for run in contiguous_runs(plot_missing):
+                runs.setdefault(run, []).append(plot_id)
+
+        for (run_start, run_end), plot_ids in sorted(runs.items()):
+            fetched = fetch(plot_ids, run_start, run_end)
+            span = date_range(run_start, run_end)
+            for plot_id in plot_ids:
+                means = daily_means(fetched.get(plot_id, []))
+                fresh = {d: means.get(d) for d in span}
+                self.put_days(keys[plot_id], fresh, now)
+                values[plot_id].update(fresh)
+
+        missed = sum(len(m) for m in missing.values())
+        with self._lock:
+            self.stats['days_hit'] += len(days) * len(plots) - missed
+            self.stats['days_missed'] += missed
+            self.stats['fetches'] += len(runs)
+            self.stats['series_served'] += len(plots)
+
+        if missing:
+            logger.info(f"GEE cache {product}: {len(days) * len(plots) - missed}/{len(days) * len(plots)} days cached, "
+                        f"fetched {len(runs)} gap(s) for {len(missing)}/{len(plots)} plots")
+
+        return {
+            plot_id: [{'date': d, 'value': plot_values[d]} for d in days if plot_values.get(d) is not None]
+            for plot_id, plot_values in values.items()
+        }
+
+    def clear(self, older_than: Optional[float] = None):
+        """Drop cached days (all, or those fetched more than older_than seconds ago)"""
+        with self._lock:
+            if older_than is None:
+                self._conn.execute('DELETE FROM gee_days')
+            else:
+                self._conn.execute('DELETE FROM gee_days WHERE fetched_at < ?', (time.time() - older_than,))
+            self._conn.commit()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            days = self._conn.execute('SELECT COUNT(*) FROM gee_days').fetchone()[0]
+            return {**self.stats, 'days_stored': days, 'path': self.path, 'namespace': self.namespace}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -9,20 +9,65 @@ Fetches satellite data for physics-informed ST-GNN model including:
 - Soil Moisture from NASA SMAP
 
 This module provides the environmental data needed for water balance,
-VPD calculations, and crop growth equations.
+VPD calculations, and crop growth equations. GEE_BACKEND=synthetic|replay
+serves the same series offline (see gee_sources.py).
 """
 
-import ee
 import os
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 import numpy as np
 
+from gee_cache import GEECache
+from gee_sources import FixtureStore, GEESource, ReplaySource, SyntheticSource
+
 logger = logging.getLogger(__name__)
 
+# Where product series come from: 'live' queries Earth Engine, 'synthetic'
+# generates them offline, 'replay' serves series recorded with GEE_RECORD
+GEE_BACKEND = os.getenv('GEE_BACKEND', 'live')
+
+# Earth Engine is only needed by the live backend
+try:
+    import ee
+except ImportError:
+    if GEE_BACKEND == 'live':
+        raise
+    ee = None
+
+GEE_FIXTURE_DIR = os.getenv('GEE_FIXTURE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                            'fixtures', 'gee'))
+GEE_RECORD = os.getenv('GEE_RECORD', 'false').lower() == 'true'  # live fetches are also saved as fixtures
+GEE_SYNTHETIC_SEED = int(os.getenv('GEE_SYNTHETIC_SEED', '0'))
+GEE_SYNTHETIC_LATENCY = float(os.getenv('GEE_SYNTHETIC_LATENCY', '0'))  # simulated round-trip seconds
+
+# Per-day cache of fetched time series (see gee_cache.py)
+GEE_CACHE_ENABLED = os.getenv('GEE_CACHE_ENABLED', 'true').lower() == 'true'
+GEE_CACHE_PATH = os.getenv('GEE_CACHE_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                          'cache', 'gee_cache.sqlite'))
+GEE_CACHE_AOI_DECIMALS = int(os.getenv('GEE_CACHE_AOI_DECIMALS', '3'))
+
+# Radius of the area of interest around a field's coordinates
+AOI_BUFFER_M = 500
+
+# fetch_comprehensive_data: 'concurrent' runs the product queries on a thread
+# pool (wall time ~ slowest product), 'sequential' one after another
+GEE_FETCH_MODE = os.getenv('GEE_FETCH_MODE', 'concurrent')
+GEE_FETCH_WORKERS = int(os.getenv('GEE_FETCH_WORKERS', '10'))
+GEE_FETCH_TIMEOUT = float(os.getenv('GEE_FETCH_TIMEOUT', '60'))
+# Per-product overrides, e.g. "ndvi=90,soil_moisture=45"
+GEE_FETCH_TIMEOUTS = {
+    name.strip(): float(seconds)
+    for name, _, seconds in (item.partition('=') for item in os.getenv('GEE_FETCH_TIMEOUTS', 'ndvi=90').split(','))
+    if name.strip() and seconds
+}
+
 @dataclass
 class GEEConfig:
     """Configuration for GEE service"""
@@ -30,6 +75,35 @@ class GEEConfig:
     private_key: str
     project_id: str = "tobaccomarondera"
 
+@dataclass
+class Plot:
+    """One field (or part of a field) in a batch request"""
+    id: str
+    lat: float
+    lng: float
+    buffer_m: int = AOI_BUFFER_M
+
+def make_plots(items: List) -> List[Plot]:
+    """
+    Plots from request data: dicts with lat/lng (and optional id, buffer_m)
+    or (lat, lng[, buffer_m]) tuples; plots without an id are numbered
+    """
+    plots = []
+    for index, item in enumerate(items):
+        if isinstance(item, Plot):
+            plots.append(item)
+        elif isinstance(item, dict):
+            plots.append(Plot(id=str(item.get('id', index)), lat=float(item['lat']), lng=float(item['lng']),
+                              buffer_m=int(item.get('buffer_m', AOI_BUFFER_M))))
+        else:
+            lat, lng, *rest = item
+            plots.append(Plot(id=str(index), lat=float(lat), lng=float(lng),
+                              buffer_m=int(rest[0]) if rest else AOI_BUFFER_M))
+    
+    if len({plot.id for plot in plots}) != len(plots):
+        raise ValueError("Plot ids must be unique")
+    return plots
+
 class GEEService:
     """
     Google Earth Engine service for fetching satellite data
@@ -38,6 +112,8 @@ class GEEService:
     
     _instance = None
     _initialized = False
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -47,7 +123,24 @@ class GEEService:
     def __init__(self):
         if not GEEService._initialized:
             self.config = None
+            self.source = self._open_source()
+            self.cache = self._open_cache()
+            live = isinstance(self.source, LiveSource)
+            self.recorder = FixtureStore(GEE_FIXTURE_DIR) if GEE_RECORD and live else None
+    
+    def _open_source(self) -> GEESource:
+        """Backend selected by GEE_BACKEND: Earth Engine or an offline stand-in"""
+        if GEE_BACKEND == 'live':
             self._load_credentials()
+            return LiveSource(self, self.config)
+        if GEE_BACKEND == 'synthetic':
+            source = SyntheticSource(seed=GEE_SYNTHETIC_SEED, latency=GEE_SYNTHETIC_LATENCY)
+        elif GEE_BACKEND == 'replay':
+            source = ReplaySource(FixtureStore(GEE_FIXTURE_DIR))
+        else:
+            raise ValueError(f"Unknown GEE_BACKEND: {GEE_BACKEND}")
+        logger.warning(f"GEE backend '{GEE_BACKEND}': serving offline data, not Earth Engine")
+        return source
     
     def _load_credentials(self):
         """Load GEE credentials from environment or file"""
@@ -79,30 +172,65 @@ class GEEService:
             logger.error(f"Failed to load GEE credentials: {e}")
             raise
     
+    def _open_cache(self) -> Optional[GEECache]:
+        """Open the time series cache (None when disabled or unusable)"""
+        if not GEE_CACHE_ENABLED:
+            return None
+        try:
+            cache = GEECache(GEE_CACHE_PATH, aoi_decimals=GEE_CACHE_AOI_DECIMALS,
+                             namespace=self.source.cache_namespace)
+            logger.info(f"GEE cache: {GEE_CACHE_PATH}")
+            return cache
+        except Exception as e:
+            logger.warning(f"GEE cache unavailable, fetching without it: {e}")
+            return None
+
+    # Image collection builder and band of each product, for batch queries
+    BATCH_PRODUCTS = {
+        'ndvi': ('_ndvi_collection', 'NDVI'),
+        'rainfall': ('_rainfall_collection', 'precipitation'),
+        'et': ('_et_collection', 'ET'),
+        'lst': ('_lst_collection', 'LST'),
+        'soil_moisture': ('_soil_moisture_collection', 'sm_surface')
+    }
+    
+    def _cached(self, product: str, lat: float, lng: float,
+                start_date: str, end_date: str) -> List[Dict]:
+        """Serve a product from the cache, asking the source for missing days"""
+        def query(start: str, end: str) -> List[Dict]:
+            return self.source.time_series(product, lat, lng, AOI_BUFFER_M, start, end)
+        
+        if self.cache is None:
+            series = query(start_date, end_date)
+        else:
+            series = self.cache.time_series(product, lat, lng, AOI_BUFFER_M, start_date, end_date, query)
+        
+        if self.recorder is not None:
+            self.recorder.record(product, lat, lng, AOI_BUFFER_M, start_date, end_date, series)
+        return series
+
     def initialize(self) -> bool:
-        """Initialize Earth Engine with service account credentials"""
+        """Open the backend's session (Earth Engine with service account credentials)"""
         if GEEService._initialized:
             return True
         
-        try:
-            credentials = ee.ServiceAccountCredentials(
-                self.config.service_account_email,
-                key_data=self.config.private_key
-            )
-            ee.Initialize(credentials, project=self.config.project_id)
+        if self.source.initialize():
             GEEService._initialized = True
-            logger.info("Earth Engine initialized successfully")
             return True
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize Earth Engine: {e}")
-            return False
+        return False
     
-    def get_aoi(self, lat: float, lng: float, buffer_m: int = 500) -> ee.Geometry:
+    def get_aoi(self, lat: float, lng: float, buffer_m: int = AOI_BUFFER_M) -> 'ee.Geometry':
         """Create area of interest from coordinates"""
         point = ee.Geometry.Point([lng, lat])
         return point.buffer(buffer_m)
     
+    def get_plots_collection(self, plots: List[Plot]) -> 'ee.FeatureCollection':
+        """One buffered feature per plot, tagged with its plot_id"""
+        return ee.FeatureCollection([
+            ee.Feature(self.get_aoi(plot.lat, plot.lng, plot.buffer_m), {'plot_id': plot.id})
+            for plot in plots
+        ])
+    
     def fetch_ndvi(self, lat: float, lng: float, 
                    start_date: str, end_date: str) -> List[Dict]:
         """
@@ -117,11 +245,20 @@ class GEEService:
         Returns:
             List of {date, ndvi} dictionaries
         """
+        return self._cached('ndvi', lat, lng, start_date, end_date)
+    
+    def _query_ndvi(self, lat: float, lng: float, 
+                    start_date: str, end_date: str,
+                    buffer_m: int = AOI_BUFFER_M) -> List[Dict]:
+        """Earth Engine query behind fetch_ndvi"""
         self.initialize()
-        aoi = self.get_aoi(lat, lng)
-        
+        aoi = self.get_aoi(lat, lng, buffer_m)
+        return self._extract_time_series(self._ndvi_collection(aoi, start_date, end_date), aoi, 'NDVI')
+    
+    def _ndvi_collection(self, region, start_date: str, end_date: str) -> 'ee.ImageCollection':
+        """Sentinel-2 NDVI images over region"""
         s2 = (ee.ImageCollection('COPERNICUS/S2_SR_HARMONIZED')
-              .filterBounds(aoi)
+              .filterBounds(region)
               .filterDate(start_date, end_date)
               .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20)))
         
@@ -129,9 +266,7 @@ class GEEService:
             ndvi = image.normalizedDifference(['B8', 'B4']).rename('NDVI')
             return ndvi.set('system:time_start', image.get('system:time_start'))
         
-        ndvi_collection = s2.map(compute_ndvi)
-        
-        return self._extract_time_series(ndvi_collection, aoi, 'NDVI')
+        return s2.map(compute_ndvi)
     
     def fetch_rainfall(self, lat: float, lng: float,
                        start_date: str, end_date: str) -> List[Dict]:
@@ -147,14 +282,22 @@ class GEEService:
         Returns:
             List of {date, precipitation} dictionaries
         """
+        return self._cached('rainfall', lat, lng, start_date, end_date)
+    
+    def _query_rainfall(self, lat: float, lng: float,
+                        start_date: str, end_date: str,
+                        buffer_m: int = AOI_BUFFER_M) -> List[Dict]:
+        """Earth Engine query behind fetch_rainfall"""
         self.initialize()
-        aoi = self.get_aoi(lat, lng)
-        
-        chirps = (ee.ImageCollection('UCSB-CHG/CHIRPS/DAILY')
-                  .filterBounds(aoi)
-                  .filterDate(start_date, end_date))
-        
-        return self._extract_time_series(chirps, aoi, 'precipitation')
+        aoi = self.get_aoi(lat, lng, buffer_m)
+        return self._extract_time_series(self._rainfall_collection(aoi, start_date, end_date), aoi, 'precipitation')
+    
+    def _rainfall_collection(self, region, start_date: str, end_date: str) -> 'ee.ImageCollection':
+        """CHIRPS daily precipitation images over region"""
+        return (ee.ImageCollection('UCSB-CHG/CHIRPS/DAILY')
+                .filterBounds(region)
+                .filterDate(start_date, end_date)
+                .select('precipitation'))
     
     def fetch_et(self, lat: float, lng: float,
                  start_date: str, end_date: str) -> List[Dict]:
@@ -170,11 +313,20 @@ class GEEService:
         Returns:
             List of {date, et} dictionaries in mm/day
         """
+        return self._cached('et', lat, lng, start_date, end_date)
+    
+    def _query_et(self, lat: float, lng: float,
+                  start_date: str, end_date: str,
+                  buffer_m: int = AOI_BUFFER_M) -> List[Dict]:
+        """Earth Engine query behind fetch_et"""
         self.initialize()
-        aoi = self.get_aoi(lat, lng)
-        
+        aoi = self.get_aoi(lat, lng, buffer_m)
+        return self._extract_time_series(self._et_collection(aoi, start_date, end_date), aoi, 'ET')
+    
+    def _et_collection(self, region, start_date: str, end_date: str) -> 'ee.ImageCollection':
+        """MOD16A2GF ET images over region, in mm/day"""
         mod16 = (ee.ImageCollection('MODIS/061/MOD16A2GF')
-                 .filterBounds(aoi)
+                 .filterBounds(region)
                  .filterDate(start_date, end_date)
                  .select('ET'))
         
@@ -183,9 +335,7 @@ class GEEService:
             et_mm_day = image.multiply(0.1).divide(8).rename('ET')
             return et_mm_day.set('system:time_start', image.get('system:time_start'))
         
-        et_collection = mod16.map(convert_et)
-        
-        return self._extract_time_series(et_collection, aoi, 'ET')
+        return mod16.map(convert_et)
     
     def fetch_land_surface_temperature(self, lat: float, lng: float,
                                         start_date: str, end_date: str) -> List[Dict]:
@@ -194,11 +344,20 @@ class GEEService:
         
         Returns temperature in Celsius
         """
+        return self._cached('lst', lat, lng, start_date, end_date)
+    
+    def _query_land_surface_temperature(self, lat: float, lng: float,
+                                         start_date: str, end_date: str,
+                                        buffer_m: int = AOI_BUFFER_M) -> List[Dict]:
+        """Earth Engine query behind fetch_land_surface_temperature"""
         self.initialize()
-        aoi = self.get_aoi(lat, lng)
-        
+        aoi = self.get_aoi(lat, lng, buffer_m)
+        return self._extract_time_series(self._lst_collection(aoi, start_date, end_date), aoi, 'LST')
+    
+    def _lst_collection(self, region, start_date: str, end_date: str) -> 'ee.ImageCollection':
+        """MOD11A2 daytime LST images over region, in Celsius"""
         mod11 = (ee.ImageCollection('MODIS/061/MOD11A2')
-                 .filterBounds(aoi)
+                 .filterBounds(region)
                  .filterDate(start_date, end_date)
                  .select('LST_Day_1km'))
         
@@ -207,9 +366,7 @@ class GEEService:
             temp_c = image.multiply(0.02).subtract(273.15).rename('LST')
             return temp_c.set('system:time_start', image.get('system:time_start'))
         
-        lst_collection = mod11.map(convert_temp)
-        
-        return self._extract_time_series(lst_collection, aoi, 'LST')
+        return mod11.map(convert_temp)
     
     def fetch_soil_moisture_smap(self, lat: float, lng: float,
                                   start_date: str, end_date: str) -> List[Dict]:
@@ -218,15 +375,22 @@ class GEEService:
         
         Returns soil moisture in cm³/cm³
         """
+        return self._cached('soil_moisture', lat, lng, start_date, end_date)
+    
+    def _query_soil_moisture_smap(self, lat: float, lng: float,
+                                   start_date: str, end_date: str,
+                                  buffer_m: int = AOI_BUFFER_M) -> List[Dict]:
+        """Earth Engine query behind fetch_soil_moisture_smap"""
         self.initialize()
-        aoi = self.get_aoi(lat, lng)
-        
-        smap = (ee.ImageCollection('NASA/SMAP/SPL4SMGP/007')
-                .filterBounds(aoi)
+        aoi = self.get_aoi(lat, lng, buffer_m)
+        return self._extract_time_series(self._soil_moisture_collection(aoi, start_date, end_date), aoi, 'sm_surface')
+    
+    def _soil_moisture_collection(self, region, start_date: str, end_date: str) -> 'ee.ImageCollection':
+        """SMAP L4 surface soil moisture images over region"""
+        return (ee.ImageCollection('NASA/SMAP/SPL4SMGP/007')
+                .filterBounds(region)
                 .filterDate(start_date, end_date)
                 .select('sm_surface'))
-        
-        return self._extract_time_series(smap, aoi, 'sm_surface')
     
     def fetch_comprehensive_data(self, lat: float, lng: float,
                                   start_date: str, end_date: str) -> Dict[str, Any]:
@@ -250,37 +414,104 @@ class GEEService:
         logger.info(f"Fetching comprehensive GEE data for ({lat}, {lng}) "
                    f"from {start_date} to {end_date}")
         
-        # Fetch all data in parallel would be ideal, but EE doesn't support that well
-        # So we fetch sequentially
-        try:
-            ndvi_data = self.fetch_ndvi(lat, lng, start_date, end_date)
-        except Exception as e:
-            logger.warning(f"Failed to fetch NDVI: {e}")
-            ndvi_data = []
+        # Each product is an independent getInfo() request; the EE client is
+        # thread-safe, so they can run side by side
+        products = {
+            'ndvi': self.fetch_ndvi,
+            'rainfall': self.fetch_rainfall,
+            'et': self.fetch_et,
+            'lst': self.fetch_land_surface_temperature,
+            'soil_moisture': self.fetch_soil_moisture_smap
+        }
+        if GEE_FETCH_MODE == 'sequential':
+            results, errors, timings = self._fetch_sequential(products, lat, lng, start_date, end_date)
+        else:
+            results, errors, timings = self._fetch_concurrent(products, lat, lng, start_date, end_date)
+        
+        data = self._assemble_comprehensive(results)
+        data['metadata'] = self._comprehensive_metadata({'lat': lat, 'lng': lng}, start_date, end_date,
+                                                        timings, errors)
+        return data
+    
+    def fetch_batch(self, product: str, plots: List[Plot],
+                    start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        """
+        Fetch one product for many plots with a single Earth Engine request
         
-        try:
-            rainfall_data = self.fetch_rainfall(lat, lng, start_date, end_date)
-        except Exception as e:
-            logger.warning(f"Failed to fetch rainfall: {e}")
-            rainfall_data = []
+        Args:
+            product: ndvi, rainfall, et, lst or soil_moisture
+            plots: Plots from make_plots
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            
+        Returns:
+            {plot_id: [{date, value}]} for every plot
+        """
+        if self.cache is None:
+            batch = self.source.fetch_batch(product, plots, start_date, end_date)
+        else:
+            by_id = {plot.id: plot for plot in plots}
+            batch = self.cache.time_series_batch(
+                product, {plot.id: (plot.lat, plot.lng, plot.buffer_m) for plot in plots}, start_date, end_date,
+                lambda plot_ids, start, end: self.source.fetch_batch(product, [by_id[i] for i in plot_ids], start, end)
+            )
         
-        try:
-            et_data = self.fetch_et(lat, lng, start_date, end_date)
-        except Exception as e:
-            logger.warning(f"Failed to fetch ET: {e}")
-            et_data = []
+        if self.recorder is not None:
+            for plot in plots:
+                self.recorder.record(product, plot.lat, plot.lng, plot.buffer_m, start_date, end_date, batch[plot.id])
+        return batch
+    
+    def _query_batch(self, product: str, plots: List[Plot],
+                     start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        """Earth Engine query behind fetch_batch"""
+        self.initialize()
+        builder, band_name = self.BATCH_PRODUCTS[product]
+        plots_fc = self.get_plots_collection(plots)
+        collection = getattr(self, builder)(plots_fc.geometry(), start_date, end_date)
+        series = self._extract_time_series_batch(collection, plots_fc, band_name)
+        return {plot.id: series.get(plot.id, []) for plot in plots}
+    
+    def fetch_comprehensive_batch(self, plots: List[Plot],
+                                  start_date: str, end_date: str) -> Dict[str, Dict[str, Any]]:
+        """
+        fetch_comprehensive_data for many plots: one request per product
+        covers every plot, instead of one per product per plot
         
-        try:
-            lst_data = self.fetch_land_surface_temperature(lat, lng, start_date, end_date)
-        except Exception as e:
-            logger.warning(f"Failed to fetch LST: {e}")
-            lst_data = []
+        Returns:
+            {plot_id: comprehensive data} in the fetch_comprehensive_data layout
+        """
+        self.initialize()
         
-        try:
-            soil_moisture_data = self.fetch_soil_moisture_smap(lat, lng, start_date, end_date)
-        except Exception as e:
-            logger.warning(f"Failed to fetch SMAP soil moisture: {e}")
-            soil_moisture_data = []
+        logger.info(f"Fetching comprehensive GEE data for {len(plots)} plots "
+                   f"from {start_date} to {end_date}")
+        
+        products = {
+            name: lambda plots, start, end, name=name: self.fetch_batch(name, plots, start, end)
+            for name in self.BATCH_PRODUCTS
+        }
+        if GEE_FETCH_MODE == 'sequential':
+            results, errors, timings = self._fetch_sequential(products, plots, start_date, end_date)
+        else:
+            results, errors, timings = self._fetch_concurrent(products, plots, start_date, end_date)
+        
+        batch = {}
+        for plot in plots:
+            data = self._assemble_comprehensive({
+                name: (series or {}).get(plot.id, []) for name, series in results.items()
+            })
+            data['metadata'] = self._comprehensive_metadata({'lat': plot.lat, 'lng': plot.lng}, start_date, end_date,
+                                                            timings, errors)
+            data['metadata']['plot'] = {'id': plot.id, 'buffer_m': plot.buffer_m}
+            batch[plot.id] = data
+        return batch
+    
+    def _assemble_comprehensive(self, results: Dict[str, List[Dict]]) -> Dict[str, Any]:
+        """Product series plus the Kc and VPD derived from them"""
+        ndvi_data = results['ndvi']
+        rainfall_data = results['rainfall']
+        et_data = results['et']
+        lst_data = results['lst']
+        soil_moisture_data = results['soil_moisture']
         
         # Calculate Kc from NDVI
         kc_data = self._calculate_kc_from_ndvi(ndvi_data)
@@ -296,22 +527,87 @@ class GEEService:
             'lst': lst_data,
             'soil_moisture': soil_moisture_data,
             'kc': kc_data,
-            'vpd': vpd_data,
-            'metadata': {
-                'location': {'lat': lat, 'lng': lng},
-                'date_range': {'start': start_date, 'end': end_date},
-                'data_sources': {
-                    'ndvi': 'COPERNICUS/S2_SR_HARMONIZED',
-                    'rainfall': 'UCSB-CHG/CHIRPS/DAILY',
-                    'et': 'MODIS/061/MOD16A2GF',
-                    'lst': 'MODIS/061/MOD11A2',
-                    'soil_moisture': 'NASA/SMAP/SPL4SMGP/007'
-                }
+            'vpd': vpd_data
+        }
+    
+    def _comprehensive_metadata(self, location: Dict, start_date: str, end_date: str,
+                                timings: Dict, errors: Dict) -> Dict[str, Any]:
+        return {
+            'location': location,
+            'date_range': {'start': start_date, 'end': end_date},
+            'backend': GEE_BACKEND,
+            'fetch_seconds': timings,
+            'errors': errors,
+            'data_sources': {
+                'ndvi': 'COPERNICUS/S2_SR_HARMONIZED',
+                'rainfall': 'UCSB-CHG/CHIRPS/DAILY',
+                'et': 'MODIS/061/MOD16A2GF',
+                'lst': 'MODIS/061/MOD11A2',
+                'soil_moisture': 'NASA/SMAP/SPL4SMGP/007'
             }
         }
     
-    def _extract_time_series(self, collection: ee.ImageCollection, 
-                             aoi: ee.Geometry, band_name: str) -> List[Dict]:
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        """Pool shared by all requests; threads of timed-out queries finish in the background"""
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=GEE_FETCH_WORKERS, thread_name_prefix='gee-fetch')
+            return cls._executor
+    
+    def _fetch_concurrent(self, products: Dict, *args) -> Tuple[Dict, Dict, Dict]:
+        """
+        Run every product query fetch(*args) on the pool, each with its own timeout
+        
+        A product that fails or times out comes back empty with its error in
+        the returned errors; the others are unaffected. A timed-out query keeps
+        running and still fills the cache for the next request.
+        """
+        executor = self._get_executor()
+        started = time.perf_counter()
+        
+        def timed(fetch):
+            begin = time.perf_counter()
+            data = fetch(*args)
+            return data, time.perf_counter() - begin
+        
+        futures = {name: executor.submit(timed, fetch) for name, fetch in products.items()}
+        
+        results, errors, timings = {}, {}, {}
+        for name, future in futures.items():
+            deadline = started + GEE_FETCH_TIMEOUTS.get(name, GEE_FETCH_TIMEOUT)
+            try:
+                results[name], seconds = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                timings[name] = round(seconds, 3)
+            except FutureTimeoutError:
+                logger.warning(f"Timed out fetching {name} after {GEE_FETCH_TIMEOUTS.get(name, GEE_FETCH_TIMEOUT)}s")
+                results[name] = []
+                errors[name] = 'timeout'
+            except Exception as e:
+                logger.warning(f"Failed to fetch {name}: {e}")
+                results[name] = []
+                errors[name] = str(e)
+        
+        logger.info(f"Fetched GEE products in {time.perf_counter() - started:.2f}s "
+                    f"(slowest {max(timings.values(), default=0):.2f}s, sum {sum(timings.values()):.2f}s)")
+        return results, errors, timings
+    
+    def _fetch_sequential(self, products: Dict, *args) -> Tuple[Dict, Dict, Dict]:
+        """Run the product queries one after another"""
+        results, errors, timings = {}, {}, {}
+        for name, fetch in products.items():
+            begin = time.perf_counter()
+            try:
+                results[name] = fetch(*args)
+                timings[name] = round(time.perf_counter() - begin, 3)
+            except Exception as e:
+                logger.warning(f"Failed to fetch {name}: {e}")
+                results[name] = []
+                errors[name] = str(e)
+        return results, errors, timings
+    
+    def _extract_time_series(self, collection: 'ee.ImageCollection', 
+                             aoi: 'ee.Geometry', band_name: str) -> List[Dict]:
         """
         Extract time series from image collection
         """
@@ -347,6 +643,44 @@ class GEEService:
         
         return []
     
+    def _extract_time_series_batch(self, collection: 'ee.ImageCollection',
+                                   plots_fc: 'ee.FeatureCollection', band_name: str) -> Dict[str, List[Dict]]:
+        """
+        Extract per-plot time series with reduceRegions
+        
+        Each image is reduced over all plots server-side and returns one
+        feature holding parallel plot_id / value arrays, so the response has
+        one element per image (like _extract_time_series) however many plots
+        there are, and the whole batch is a single getInfo().
+        """
+        def extract_values(image):
+            reduced = (image.select([band_name])
+                       .reduceRegions(collection=plots_fc, reducer=ee.Reducer.mean(), scale=30)
+                       .filter(ee.Filter.notNull(['mean'])))
+            return ee.Feature(None, {
+                'date': ee.Date(image.get('system:time_start')).format('YYYY-MM-dd'),
+                'plot_ids': reduced.aggregate_array('plot_id'),
+                'values': reduced.aggregate_array('mean')
+            })
+        
+        result = collection.map(extract_values).getInfo()
+        
+        series: Dict[str, List[Dict]] = {}
+        if result and 'features' in result:
+            for f in result['features']:
+                props = f.get('properties', {})
+                date = props.get('date')
+                if not date:
+                    continue
+                for plot_id, value in zip(props.get('plot_ids') or [], props.get('values') or []):
+                    if value is not None:
+                        series.setdefault(plot_id, []).append({
+                            'date': date,
+                            'value': float(value) if value else 0.0
+                        })
+        
+        return {plot_id: sorted(items, key=lambda x: x['date']) for plot_id, items in series.items()}
+    
     def _calculate_kc_from_ndvi(self, ndvi_data: List[Dict]) -> List[Dict]:
         """
         Calculate crop coefficient (Kc) from NDVI
@@ -399,6 +733,58 @@ class GEEService:
         return vpd_data
 
 
+class LiveSource(GEESource):
+    """Earth Engine itself: the GEEService product queries on a service account session"""
+    
+    name = 'live'
+    
+    # Earth Engine query of each product
+    QUERIES = {
+        'ndvi': '_query_ndvi',
+        'rainfall': '_query_rainfall',
+        'et': '_query_et',
+        'lst': '_query_land_surface_temperature',
+        'soil_moisture': '_query_soil_moisture_smap'
+    }
+    
+    def __init__(self, service: GEEService, config: GEEConfig):
+        self.service = service
+        self.config = config
+    
+    @property
+    def cache_namespace(self) -> str:
+        # Series keys of the live backend carry no namespace
+        return ''
+    
+    def initialize(self) -> bool:
+        try:
+            credentials = ee.ServiceAccountCredentials(
+                self.config.service_account_email,
+                key_data=self.config.private_key
+            )
+            ee.Initialize(credentials, project=self.config.project_id)
+            logger.info("Earth Engine initialized successfully")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to initialize Earth Engine: {e}")
+            return False
+    
+    def time_series(self, product: str, lat: float, lng: float, buffer_m: int,
+                    start_date: str, end_date: str) -> List[Dict]:
+        if product not in self.QUERIES:
+            raise ValueError(f"Unknown product: {product}")
+        return getattr(self.service, self.QUERIES[product])(lat, lng, start_date, end_date, buffer_m)
+    
+    def fetch_batch(self, product: str, plots: List[Plot],
+                    start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        # One reduceRegions request for all plots
+        return self.service._query_batch(product, plots, start_date, end_date)
+    
+    def get_stats(self) -> Dict:
+        return {'backend': self.name, 'project': self.config.project_id}
+
+
 # Singleton instance
 gee_service = GEEService()
 
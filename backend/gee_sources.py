@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+CropIoT GEE Sources
+Backends GEEService reads product series from. Live Earth Engine is
+LiveSource in gee_service.py; the offline stand-ins here let the physics
+endpoints be benchmarked and load-tested without network access:
+
+- synthetic: deterministic, seasonally realistic series for any location
+- replay: series recorded from live Earth Engine (GEE_RECORD=true)
+
+Select with GEE_BACKEND=synthetic|replay (see gee_service.py)
+"""
+
+import abc
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from gee_cache import date_range, daily_means
+
+logger = logging.getLogger(__name__)
+
+PRODUCTS = ('ndvi', 'rainfall', 'et', 'lst', 'soil_moisture')
+
+
+def location_key(lat: float, lng: float, buffer_m: int, decimals: int = 3) -> str:
+    """Fixture key of one AOI; rounding matches the GEE cache so GPS jitter maps to one series"""
+    return f"{round(lat, decimals)},{round(lng, decimals)},{buffer_m}"
+
+
+class GEESource(abc.ABC):
+    """
+    Where GEEService gets product time series from; series use the live
+    {date, value} layout and units. GEEService serves every backend through
+    its GEECache, so only missing days reach the source.
+    """
+
+    name = 'source'
+
+    @property
+    def cache_namespace(self) -> str:
+        """Keeps cached days of this backend apart from those of other backends"""
+        return self.name
+
+    def initialize(self) -> bool:
+        """Open the backend's session (offline backends need none)"""
+        return True
+
+    @abc.abstractmethod
+    def time_series(self, product: str, lat: float, lng: float, buffer_m: int,
+                    start_date: str, end_date: str) -> List[Dict]:
+        """{date, value} series of one product for [start_date, end_date)"""
+
+    def fetch_batch(self, product: str, plots: List,
+                    start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        """{plot_id: series} for plots with id, lat, lng and buffer_m"""
+        return {
+            plot.id: self.time_series(product, plot.lat, plot.lng, plot.buffer_m, start_date, end_date)
+            for plot in plots
+        }
+
+    def get_stats(self) -> Dict:
+        return {'backend': self.name}
+
+
+class SyntheticSource(GEESource):
+    """
+    Seasonal series generated from the date and location alone
+
+    Every day is drawn from its own seeded generator, so any sub-range
+    returns the same values as the full range and runs are reproducible.
+    Observation calendars follow the real products: Sentinel-2 every 5 days
+    with cloud gaps, daily CHIRPS and SMAP, 8-day MODIS composites. Seasons
+    follow the southern African rainy season (Nov-Mar), mirrored north of
+    the equator.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, seed: int = 0, latency: float = 0.0):
+        self.seed = seed
+        self.latency = latency  # seconds per query, to mimic an Earth Engine round-trip
+        self.stats = {'queries': 0, 'values': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def cache_namespace(self) -> str:
+        return f'{self.name}:{self.seed}'
+
+    def _rng(self, *parts) -> random.Random:
+        digest = hashlib.blake2b(repr((self.seed,) + parts).encode(), digest_size=8).digest()
+        return random.Random(int.from_bytes(digest, 'big'))
+
+    def _seasons(self, lat: float, date: datetime):
+        """(wetness, greenness, day of season): rains peak mid-January, canopy about six weeks later"""
+        doy = date.timetuple().tm_yday + (182 if lat > 0 else 0)
+        wet = 0.5 * (1 + math.cos(2 * math.pi * (doy - 20) / 365.25))
+        green = 0.5 * (1 + math.cos(2 * math.pi * (doy - 60) / 365.25))
+        return wet, green, doy
+
+    def _rainfall(self, lat: float, lng: float, day: datetime) -> float:
+        wet, _, _ = self._seasons(lat, day)
+        rng = self._rng('rainfall', round(lat, 2), round(lng, 2), day.toordinal())
+        if rng.random() < 0.03 + 0.5 * wet:
+            return round(rng.expovariate(1.0 / (4.0 + 8.0 * wet)), 1)
+        return 0.0
+
+    def _value(self, product: str, lat: float, lng: float, buffer_m: int, day: datetime) -> Optional[float]:
+        """Value of one day, or None when the product has no observation that day"""
+        wet, green, doy = self._seasons(lat, day)
+        key = location_key(lat, lng, buffer_m)
+        rng = self._rng(product, key, day.toordinal())
+        vigour = 0.85 + 0.3 * self._rng('vigour', key).random()
+
+        if product == 'ndvi':
+            # 5-day revisit, scenes dropped for clouds more often in the rains
+            if (day.toordinal() + int(vigour * 100)) % 5 or rng.random() < 0.1 + 0.4 * wet:
+                return None
+            return min(0.9, max(0.05, 0.18 + 0.6 * green * vigour + rng.gauss(0, 0.03)))
+
+        if product == 'rainfall':
+            return self._rainfall(lat, lng, day)
+
+        if product in ('et', 'lst'):
+            # 8-day composites start on day 1, 9, 17, ... of each year
+            if (day.timetuple().tm_yday - 1) % 8:
+                return None
+            if product == 'et':
+                return max(0.2, 1.0 + 3.5 * green * vigour + rng.gauss(0, 0.3))
+            # Hottest just before the rains (October)
+            return 27.0 + 7.0 * math.cos(2 * math.pi * (doy - 290) / 365.25) + rng.gauss(0, 1.5)
+
+        if product == 'soil_moisture':
+            # Surface layer wets up with the last ten days of rain and dries down
+            recent = sum(self._rainfall(lat, lng, datetime.fromordinal(day.toordinal() - k)) * 0.6 ** k
+                         for k in range(10))
+            return min(0.45, max(0.05, 0.08 + 0.12 * wet + 0.006 * recent + rng.gauss(0, 0.01)))
+
+        raise ValueError(f"Unknown product: {product}")
+
+    def _series(self, product: str, lat: float, lng: float, buffer_m: int,
+                start_date: str, end_date: str) -> List[Dict]:
+        series = []
+        for date in date_range(start_date, end_date):
+            value = self._value(product, lat, lng, buffer_m, datetime.strptime(date, '%Y-%m-%d'))
+            if value is not None:
+                series.append({'date': date, 'value': float(value)})
+
+        with self._lock:
+            self.stats['queries'] += 1
+            self.stats['values'] += len(series)
+        return series
+
+    def time_series(self, product: str, lat: float, lng: float, buffer_m: int,
+                    start_date: str, end_date: str) -> List[Dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._series(product, lat, lng, buffer_m, start_date, end_date)
+
+    def fetch_batch(self, product: str, plots: List,
+                    start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        # One simulated round-trip for the whole batch, like reduceRegions
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            plot.id: self._series(product, plot.lat, plot.lng, plot.buffer_m, start_date, end_date)
+            for plot in plots
+        }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {'backend': self.name, 'seed': self.seed, 'latency': self.latency, **self.stats}
+
+
+class FixtureStore:
+    """
+    Recorded per-day values, one JSON file per product:
+    {location_key: {date: value or null}}
+
+    Days without an observation are recorded as null, so a replay knows the
+    difference between "no image that day" and "never recorded".
+    """
+
+    def __init__(self, path: str, decimals: int = 3):
+        self.path = path
+        self.decimals = decimals
+        self._data: Dict[str, Dict[str, Dict[str, Optional[float]]]] = {}
+        self._lock = threading.Lock()
+
+    def _file(self, product: str) -> str:
+        return os.path.join(self.path, f'{product}.json')
+
+    def _load(self, product: str) -> Dict[str, Dict[str, Optional[float]]]:
+        if product not in self._data:
+            try:
+                with open(self._file(product), 'r') as f:
+                    self._data[product] = json.load(f)
+            except FileNotFoundError:
+                self._data[product] = {}
+        return self._data[product]
+
+    def get(self, product: str, lat: float, lng: float, buffer_m: int) -> Optional[Dict[str, Optional[float]]]:
+        """Recorded days of one series, or None when the location was never recorded"""
+        with self._lock:
+            return self._load(product).get(location_key(lat, lng, buffer_m, self.decimals))
+
+    def record(self, product: str, lat: float, lng: float, buffer_m: int,
+               start_date: str, end_date: str, series: List[Dict]):
+        """Merge a fetched series into the fixtures, marking days without a value as null"""
+        # Daily means, as the GEE cache stores, so sub-daily products (SMAP) replay the same values
+        values = {date: None for date in date_range(start_date, end_date)}
+        values.update(daily_means(series))
+
+        with self._lock:
+            data = self._load(product)
+            data.setdefault(location_key(lat, lng, buffer_m, self.decimals), {}).update(values)
+
+            os.makedirs(self.path, exist_ok=True)
+            tmp_path = self._file(product) + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self._file(product))
+
+    def locations(self) -> Dict[str, int]:
+        """Recorded locations per product"""
+        with self._lock:
+            return {product: len(self._load(product)) for product in PRODUCTS}
+
+
+class ReplaySource(GEESource):
+    """Serves series recorded from live Earth Engine by a FixtureStore"""
+
+    name = 'replay'
+
+    def __init__(self, store: FixtureStore):
+        self.store = store
+        self.stats = {'queries': 0, 'unrecorded_days': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def cache_namespace(self) -> str:
+        return f'{self.name}:{os.path.abspath(self.store.path)}'
+
+    def time_series(self, product: str, lat: float, lng: float, buffer_m: int,
+                    start_date: str, end_date: str) -> List[Dict]:
+        recorded = self.store.get(product, lat, lng, buffer_m)
+        if recorded is None:
+            raise LookupError(f"No recorded {product} series for "
+                              f"{location_key(lat, lng, buffer_m, self.store.decimals)} in {self.store.path}")
+
+        days = date_range(start_date, end_date)
+        unrecorded = sum(1 for date in days if date not in recorded)
+        if unrecorded:
+            logger.warning(f"Replay {product}: {unrecorded}/{len(days)} days not recorded")
+
+        with self._lock:
+            self.stats['queries'] += 1
+            self.stats['unrecorded_days'] += unrecorded
+
+        return [{'date': date, 'value': recorded[date]} for date in days if recorded.get(date) is not None]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {'backend': self.name, 'path': self.store.path,
+                    'locations': self.store.locations(), **self.stats}
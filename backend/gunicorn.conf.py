@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+CropIoT Gunicorn Configuration
+Worker pool settings for `gunicorn -c gunicorn.conf.py wsgi:app`
+"""
+
+import multiprocessing
+import os
+import sys
+
+from shared_state import enable_shared_counters
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# Processes sidestep the GIL for JSON rendering and pandas work; threads inside
+# each worker serve concurrent I/O-bound requests and streaming downloads
+workers = int(os.getenv('GUNICORN_WORKERS', str(multiprocessing.cpu_count())))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# Live stream (SSE /api/stream): with threaded workers every connected client
+# holds one of the worker's threads. GUNICORN_STREAM_THREADS is how many of
+# each worker's threads live clients may take (default half of them); clients
+# beyond it, or beyond LIVE_STREAM_MAX_CLIENTS, get a 503, and the remaining
+# threads stay free for regular requests. For many dashboards per gateway run
+# an async worker instead (GUNICORN_WORKER_CLASS=gevent, pip install gevent):
+# a connection then costs no thread and only LIVE_STREAM_MAX_CLIENTS applies.
+ASYNC_WORKERS = ('gevent', 'eventlet')
+stream_threads = int(os.getenv('GUNICORN_STREAM_THREADS', str(max(1, threads // 2))))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# The app is imported after fork so every worker opens its own MongoDB client
+# (pymongo clients are not fork-safe) and its own background threads
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def on_starting(server):
+    """Counters in shared memory must exist before the workers are forked"""
+    if workers > 1:
+        enable_shared_counters()
+    if worker_class not in ASYNC_WORKERS and stream_threads >= threads:
+        server.log.warning(f"GUNICORN_STREAM_THREADS={stream_threads} leaves none of the {threads} "
+                           f"threads for regular requests while live clients are connected")
+
+
+def post_worker_init(worker):
+    """Limit live stream clients to the threads set aside for them"""
+    if worker_class in ASYNC_WORKERS:
+        return
+    api_server = sys.modules.get('api_server')
+    hub = getattr(api_server, 'live_hub', None)
+    if hub is not None and hub.max_clients > stream_threads:
+        worker.log.info(f"Live stream limited to {stream_threads} clients per worker "
+                        f"(GUNICORN_STREAM_THREADS; LIVE_STREAM_MAX_CLIENTS={hub.max_clients}). "
+                        f"Use GUNICORN_WORKER_CLASS=gevent for more.")
+        hub.max_clients = stream_threads
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+CropIoT Ingest Buffer
+Groups incoming sensor readings into batched MongoDB writes and keeps a
+single long-lived CSV writer for the backup file
+"""
+
+import csv
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ['timestamp', 'sensor_id', 'soil_moisture', 'ph',
+               'temperature', 'humidity', 'rssi', 'snr']
+
+
+def document_to_csv_row(document: Dict) -> List:
+    """Convert a sensor document to a CSV row (-999 marks missing values)"""
+    def value(key, default):
+        v = document.get(key)
+        return default if v is None else v
+
+    return [
+        document['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+        document.get('sensor_id', 'Unknown'),
+        value('soil_moisture', -999),
+        value('ph', -999),
+        value('temperature', -999),
+        value('humidity', -999),
+        value('rssi', 0),
+        value('snr', 0)
+    ]
+
+
+class IngestBuffer:
+    """
+    In-process write buffer for sensor readings
+
+    Readings are appended to a bounded queue by the request thread and written
+    by a background thread in batches: one insert_many per batch to MongoDB and
+    one writerows per batch to the CSV backup. A batch is flushed when it
+    reaches batch_size or when its oldest reading is flush_interval seconds old.
+
+    Readings were already acknowledged when they were queued, so a batch
+    MongoDB cannot take (connection loss, timeouts) is retried with
+    exponential backoff. Readings still not stored after retry_attempts, or
+    rejected by the server itself, are appended to fallback_file; only if
+    that fails too are they counted as failed.
+    """
+
+    def __init__(self, collection=None, csv_file: Optional[str] = None,
+                 batch_size: int = 500, flush_interval: float = 1.0,
+                 max_queue: int = 50000, fallback_file: Optional[str] = None,
+                 retry_attempts: int = 5, retry_backoff: float = 1.0):
+        """
+        Args:
+            collection: MongoDB collection (None for CSV-only storage)
+            csv_file: CSV backup path (None to disable the backup)
+            batch_size: Maximum number of readings per write
+            flush_interval: Maximum age in seconds of a buffered reading
+            max_queue: Maximum number of readings waiting to be written (and
+                waiting for a retry)
+            fallback_file: CSV file for readings MongoDB did not store (not
+                needed when csv_file already receives every reading)
+            retry_attempts: MongoDB writes of a failed batch before it falls back
+            retry_backoff: Seconds before the first retry, doubled for each next one
+        """
+        self.collection = collection
+        self.csv_file = csv_file
+        self.fallback_file = fallback_file
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.01, flush_interval)
+        self.max_queue = max_queue
+        self.retry_attempts = max(1, retry_attempts)
+        self.retry_backoff = max(0.01, retry_backoff)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._listeners: List[Callable[[List[Dict]], None]] = []
+        self._backups: List[Callable[[List[Dict]], None]] = []
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # (due time, attempts so far, documents, in the CSV backup) of batches waiting for a retry
+        self._retries: List[tuple] = []
+
+        self._csv_handle = None
+        self._csv_writer = None
+
+        self.stats = {
+            'batches_written': 0,
+            'documents_written': 0,
+            'documents_failed': 0,
+            'documents_retried': 0,
+            'documents_spilled': 0,
+            'last_batch_size': 0,
+            'last_flush': None
+        }
+
+    def add_listener(self, listener: Callable[[List[Dict]], None]):
+        """Register a callback invoked with each successfully written batch"""
+        self._listeners.append(listener)
+
+    def add_backup(self, backup: Callable[[List[Dict]], None]):
+        """Register a callback that receives every batch before it is written, whatever MongoDB does"""
+        self._backups.append(backup)
+
+    def start(self):
+        """Start the background writer thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ingest-buffer', daemon=True)
+        self._thread.start()
+        logger.info(f"✓ Ingest buffer started (batch size {self.batch_size}, "
+                    f"flush interval {self.flush_interval}s)")
+
+    def put(self, document: Dict) -> bool:
+        """Queue a document for writing. Returns False if the buffer is full."""
+        if self._stop_event.is_set():
+            return False
+        try:
+            self._queue.put_nowait(document)
+            return True
+        except queue.Full:
+            return False
+
+    def pending(self) -> int:
+        """Number of readings waiting to be written"""
+        return self._queue.qsize()
+
+    def retrying(self) -> int:
+        """Number of readings waiting for a MongoDB retry"""
+        with self._lock:
+            return sum(len(entry[2]) for entry in self._retries)
+
+    def _run(self):
+        """Writer loop: collect a batch, then flush it"""
+        while not self._stop_event.is_set():
+            self._write_due_retries()
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+
+        # Drain whatever arrived before shutdown
+        self._drain()
+
+    def _drain(self):
+        """Write every queued reading synchronously"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch)
+                batch = []
+
+        if batch:
+            self._write_batch(batch)
+
+        # Last chance for batches still waiting for a retry
+        self._write_due_retries(force=True)
+
+    def _write_due_retries(self, force: bool = False):
+        """Retry the batches whose backoff has expired (all of them with force)"""
+        with self._lock:
+            now = time.monotonic()
+            due = [entry for entry in self._retries if force or entry[0] <= now]
+            self._retries = [entry for entry in self._retries if not (force or entry[0] <= now)]
+            self.stats['documents_retried'] += sum(len(entry[2]) for entry in due)
+
+        for _, attempts, documents, backed_up in due:
+            self._write_batch(documents, attempts, final=force, backed_up=backed_up)
+
+    def _write_batch(self, batch: List[Dict], attempts: int = 0, final: bool = False,
+                     backed_up: bool = False):
+        """
+        Write one batch to MongoDB and the CSV backup, then notify listeners
+
+        backed_up tells a retried batch whether its first attempt reached the CSV backup.
+        """
+        # Only one thread writes at a time, so the I/O runs without the lock; it only
+        # guards the retry list and the stats that get_stats() reads
+        written = batch
+        first_attempt = attempts == 0
+        failed = 0
+
+        if first_attempt:
+            for backup in self._backups:
+                try:
+                    backup(batch)
+                except Exception as e:
+                    logger.error(f"✗ Ingest backup error: {e}")
+            if self.csv_file:
+                backed_up = self._write_csv(self.csv_file, batch)
+
+        if self.collection is not None:
+            written, retry, rejected = self._write_mongodb(batch)
+            attempts += 1
+            if retry and attempts < self.retry_attempts and not final:
+                self._schedule_retry(retry, attempts, backed_up)
+                retry = []
+            self._fall_back(retry + rejected, backed_up)
+
+        # Without MongoDB the CSV file is the primary storage
+        elif not backed_up:
+            written = []
+            failed = len(batch)
+
+        with self._lock:
+            if first_attempt:
+                self.stats['batches_written'] += 1
+                self.stats['last_batch_size'] = len(batch)
+            self.stats['documents_written'] += len(written)
+            self.stats['documents_failed'] += failed
+            self.stats['last_flush'] = time.strftime('%Y-%m-%d %H:%M:%S')
+
+        if written:
+            logger.info(f"✓ Flushed {len(written)} readings "
+                        f"({'MongoDB' if self.collection is not None else 'CSV'})")
+            for listener in self._listeners:
+                try:
+                    listener(written)
+                except Exception as e:
+                    logger.error(f"✗ Ingest listener error: {e}")
+
+    def _write_mongodb(self, batch: List[Dict]) -> tuple:
+        """
+        Insert a batch with a single unordered insert_many
+
+        Returns (written, to retry, rejected): documents the server refused
+        (writeErrors) would be refused again, everything else is retried.
+        """
+        try:
+            self.collection.insert_many(batch, ordered=False)
+            return batch, [], []
+        except BulkWriteError as e:
+            failed = {err['index'] for err in e.details.get('writeErrors', [])}
+            logger.error(f"✗ MongoDB bulk insert: {len(failed)} of {len(batch)} readings failed")
+            written = [doc for i, doc in enumerate(batch) if i not in failed]
+            return written, [], [doc for i, doc in enumerate(batch) if i in failed]
+        except PyMongoError as e:
+            logger.error(f"✗ MongoDB bulk insert error: {e}")
+            return [], batch, []
+
+    def _schedule_retry(self, documents: List[Dict], attempts: int, backed_up: bool):
+        """Queue documents for another MongoDB write after the backoff"""
+        delay = self.retry_backoff * 2 ** (attempts - 1)
+        overflow = []
+        with self._lock:
+            self._retries.append((time.monotonic() + delay, attempts, documents, backed_up))
+
+            # Readings waiting for a retry count against the queue bound; the oldest fall back first
+            waiting = sum(len(entry[2]) for entry in self._retries)
+            while waiting > self.max_queue and len(self._retries) > 1:
+                oldest = self._retries.pop(0)
+                waiting -= len(oldest[2])
+                overflow.append(oldest)
+
+        logger.warning(f"⚠ Retrying {len(documents)} readings in {delay:.1f}s (attempt {attempts + 1})")
+        for _, _, oldest, oldest_backed_up in overflow:
+            self._fall_back(oldest, oldest_backed_up)
+
+    def _fall_back(self, documents: List[Dict], backed_up: bool):
+        """Keep readings MongoDB did not store in the CSV files"""
+        if not documents:
+            return
+
+        if backed_up:
+            # The CSV backup already holds these readings
+            spilled, target = True, self.csv_file
+        elif self.fallback_file:
+            spilled, target = self._write_csv(self.fallback_file, documents, keep_open=False), self.fallback_file
+        else:
+            spilled, target = False, None
+
+        with self._lock:
+            self.stats['documents_spilled' if spilled else 'documents_failed'] += len(documents)
+
+        if spilled:
+            logger.warning(f"⚠ {len(documents)} readings not stored in MongoDB kept in {target}")
+        else:
+            logger.error(f"✗ {len(documents)} readings lost: MongoDB and the CSV fallback failed")
+
+    def _write_csv(self, path: str, batch: List[Dict], keep_open: bool = True) -> bool:
+        """Append a batch to a CSV file (the backup through the long-lived writer)"""
+        if not keep_open:
+            try:
+                with open(path, 'a', newline='') as file:
+                    csv.writer(file).writerows(document_to_csv_row(doc) for doc in batch)
+                return True
+            except Exception as e:
+                logger.error(f"✗ Error writing batch to CSV: {e}")
+                return False
+
+        try:
+            if self._csv_writer is None:
+                self._csv_handle = open(path, 'a', newline='')
+                self._csv_writer = csv.writer(self._csv_handle)
+
+            self._csv_writer.writerows(document_to_csv_row(doc) for doc in batch)
+            # Flush so readers of the CSV file never see a partial batch
+            self._csv_handle.flush()
+            return True
+        except Exception as e:
+            logger.error(f"✗ Error writing batch to CSV: {e}")
+            self._close_csv()
+            return False
+
+    def _close_csv(self):
+        if self._csv_handle is not None:
+            try:
+                self._csv_handle.close()
+            except Exception:
+                pass
+        self._csv_handle = None
+        self._csv_writer = None
+
+    def close(self, timeout: float = 10.0):
+        """Stop accepting readings, write everything still queued and close the CSV file"""
+        self._stop_event.set()
+
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                # Still inside a slow batch; it drains the queue itself when that finishes
+                logger.warning(f"⚠ Ingest buffer shutdown timed out after {timeout}s "
+                               f"({self.pending()} readings queued, {self.retrying()} waiting for a retry)")
+                return
+            self._thread = None
+
+        # The writer thread drains on exit; this covers a buffer that was never started
+        self._drain()
+        self._close_csv()
+
+        logger.info(f"✓ Ingest buffer closed ({self.stats['documents_written']} readings written)")
+
+    def get_stats(self) -> Dict:
+        """Get buffer statistics"""
+        return {
+            **self.stats,
+            'pending': self.pending(),
+            'retrying': self.retrying(),
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval
+        }
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+CropIoT Latest Readings Cache
+Keeps the most recent reading of every sensor in memory so dashboard polls
+of /api/latest never touch the database
+"""
+
+import csv
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+METRIC_FIELDS = ['soil_moisture', 'ph', 'temperature', 'humidity', 'rssi', 'snr']
+
+
+def format_reading(doc: Dict) -> Dict:
+    """Format a sensor document the way /api/latest returns it"""
+    return {
+        'timestamp': doc['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
+        'sensor_id': doc['sensor_id'],
+        'soil_moisture': doc.get('soil_moisture'),
+        'ph': doc.get('ph'),
+        'temperature': doc.get('temperature'),
+        'humidity': doc.get('humidity'),
+        'rssi': doc.get('rssi', 0),
+        'snr': doc.get('snr', 0)
+    }
+
+
+class LatestReadingsCache:
+    """
+    Latest-value table keyed by sensor_id
+
+    Seeded once at startup, then updated with every batch the DataCollector
+    stores. Timestamps are compared in their '%Y-%m-%d %H:%M:%S' form, which
+    sorts chronologically, so readings arriving out of order never replace a
+    newer one. The oldest stored timestamp is tracked too, so /api/stats can
+    report the data range without querying.
+    """
+
+    def __init__(self):
+        self._latest: Dict[str, Dict] = {}
+        self._oldest: Optional[str] = None
+        self._lock = threading.Lock()
+        self.seeded = False
+
+    def _note_oldest(self, timestamp: Optional[str]):
+        """Keep the earliest timestamp seen (caller holds the lock)"""
+        if timestamp and (self._oldest is None or timestamp < self._oldest):
+            self._oldest = timestamp
+
+    def update(self, documents: List[Dict]):
+        """Apply a batch of stored sensor documents"""
+        with self._lock:
+            for doc in documents:
+                row = format_reading(doc)
+                self._note_oldest(row['timestamp'])
+                current = self._latest.get(row['sensor_id'])
+                if current is None or row['timestamp'] >= current['timestamp']:
+                    self._latest[row['sensor_id']] = row
+
+    def seed_from_mongodb(self, collection) -> bool:
+        """
+        Load the latest reading per sensor with a single aggregation
+
+        Sorting on (sensor_id, timestamp desc) before grouping with $first lets
+        MongoDB answer from the compound index with a distinct scan instead of
+        sorting the whole collection.
+        """
+        pipeline = [
+            {'$sort': {'sensor_id': ASCENDING, 'timestamp': DESCENDING}},
+            {'$group': {
+                '_id': '$sensor_id',
+                'timestamp': {'$first': '$timestamp'},
+                'sensor_id': {'$first': '$sensor_id'},
+                'soil_moisture': {'$first': '$soil_moisture'},
+                'ph': {'$first': '$ph'},
+                'temperature': {'$first': '$temperature'},
+                'humidity': {'$first': '$humidity'},
+                'rssi': {'$first': '$rssi'},
+                'snr': {'$first': '$snr'}
+            }}
+        ]
+
+        try:
+            results = list(collection.aggregate(
+                pipeline, hint=[('sensor_id', ASCENDING), ('timestamp', DESCENDING)]
+            ))
+        except PyMongoError as e:
+            logger.error(f"✗ Failed to seed latest readings from MongoDB: {e}")
+            return False
+
+        try:
+            oldest = collection.find_one({}, {'timestamp': 1}, sort=[('timestamp', ASCENDING)])
+        except PyMongoError as e:
+            logger.error(f"✗ Failed to read the oldest reading from MongoDB: {e}")
+            return False
+
+        self.update(results)
+        if oldest:
+            with self._lock:
+                self._note_oldest(oldest['timestamp'].strftime('%Y-%m-%d %H:%M:%S'))
+        self.seeded = True
+        logger.info(f"✓ Latest readings cache seeded from MongoDB ({len(results)} sensors)")
+        return True
+
+    def seed_from_csv(self, csv_file: str) -> bool:
+        """Load the latest reading per sensor from the CSV file in one pass"""
+        if not os.path.exists(csv_file):
+            self.seeded = True
+            return True
+
+        latest_rows: Dict[str, Dict] = {}
+        oldest = None
+        try:
+            with open(csv_file, 'r') as file:
+                for row in csv.DictReader(file):
+                    sensor_id = row.get('sensor_id')
+                    timestamp = row.get('timestamp')
+                    if not sensor_id or not timestamp:
+                        continue
+                    if oldest is None or timestamp < oldest:
+                        oldest = timestamp
+                    current = latest_rows.get(sensor_id)
+                    if current is None or timestamp >= current['timestamp']:
+                        latest_rows[sensor_id] = row
+        except Exception as e:
+            logger.error(f"✗ Failed to seed latest readings from CSV: {e}")
+            return False
+
+        # Numeric conversion only for the rows we keep
+        for row in latest_rows.values():
+            for key in METRIC_FIELDS:
+                try:
+                    value = float(row.get(key, -999))
+                    row[key] = None if value == -999 else value
+                except (ValueError, TypeError):
+                    row[key] = None
+
+        with self._lock:
+            self._note_oldest(oldest)
+            for sensor_id, row in latest_rows.items():
+                current = self._latest.get(sensor_id)
+                if current is None or row['timestamp'] >= current['timestamp']:
+                    self._latest[sensor_id] = {
+                        'timestamp': row['timestamp'],
+                        'sensor_id': sensor_id,
+                        **{key: row[key] for key in METRIC_FIELDS}
+                    }
+
+        self.seeded = True
+        logger.info(f"✓ Latest readings cache seeded from CSV ({len(latest_rows)} sensors)")
+        return True
+
+    def get_latest(self) -> List[Dict]:
+        """Latest reading of every sensor"""
+        with self._lock:
+            return [dict(row) for row in self._latest.values()]
+
+    def get(self, sensor_id: str) -> Optional[Dict]:
+        """Latest reading of one sensor"""
+        with self._lock:
+            row = self._latest.get(sensor_id)
+            return dict(row) if row else None
+
+    def last_update(self) -> Optional[str]:
+        """Timestamp of the newest reading of any sensor"""
+        with self._lock:
+            return max((row['timestamp'] for row in self._latest.values()), default=None)
+
+    def oldest(self) -> Optional[str]:
+        """Timestamp of the oldest reading stored"""
+        with self._lock:
+            return self._oldest
+
+    def sensor_ids(self) -> List[str]:
+        """All sensors that have reported at least once"""
+        with self._lock:
+            return list(self._latest.keys())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+CropIoT Live Stream
+Fans out ingested readings and disease detections to Server-Sent Events
+subscribers, so dashboards are pushed new data instead of polling
+"""
+
+import itertools
+import json
+import logging
+import queue
+import threading
+from collections import deque
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('reading', 'disease')
+
+# Put on a subscriber queue to end its stream
+_CLOSE = object()
+
+
+class Subscription:
+    """
+    One connected client: a bounded queue of pending events plus its filters
+
+    When the client cannot keep up and the queue is full, the oldest pending
+    event is dropped; the client is told how many it missed with an
+    'overflow' event so it can refetch instead of silently drifting.
+    """
+
+    def __init__(self, sensor_ids: Optional[Set[str]], event_types: Set[str], max_queue: int):
+        self.sensor_ids = sensor_ids
+        self.event_types = event_types
+        self.queue: 'queue.Queue' = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def wants(self, event: Dict) -> bool:
+        if event['type'] not in self.event_types:
+            return False
+        return self.sensor_ids is None or event['sensor_id'] in self.sensor_ids
+
+    def offer(self, item):
+        """Queue an event without ever blocking the publisher"""
+        with self._lock:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def take_dropped(self) -> int:
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+
+def format_event(event: Dict) -> str:
+    """Server-Sent Events wire format"""
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+class LiveStreamHub:
+    """
+    Publish/subscribe hub for live events
+
+    publish() is called on the ingest path and only appends to per-client
+    queues, so a slow or stalled browser never delays storage. The last
+    replay_size events are kept so a reconnecting EventSource (Last-Event-ID)
+    resumes without gaps.
+    """
+
+    def __init__(self, max_clients: int = 100, max_queue: int = 500,
+                 replay_size: int = 1000, heartbeat: float = 15.0):
+        self.max_clients = max_clients
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+
+        self._subscribers: List[Subscription] = []
+        self._recent: deque = deque(maxlen=replay_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self.stats = {'published': 0, 'delivered': 0, 'clients_total': 0}
+
+    def publish(self, event_type: str, sensor_id: Optional[str], data: Dict):
+        """Send one event to every matching subscriber"""
+        with self._lock:
+            event = {'id': next(self._ids), 'type': event_type, 'sensor_id': sensor_id, 'data': data}
+            self._recent.append(event)
+            subscribers = [s for s in self._subscribers if s.wants(event)]
+            self.stats['published'] += 1
+            self.stats['delivered'] += len(subscribers)
+
+        for subscription in subscribers:
+            subscription.offer(event)
+
+    def publish_readings(self, readings: Iterable[Dict]):
+        """Publish formatted sensor readings"""
+        for reading in readings:
+            self.publish('reading', reading.get('sensor_id'), reading)
+
+    def subscribe(self, sensor_ids: Optional[Iterable[str]] = None,
+                  event_types: Optional[Iterable[str]] = None,
+                  last_event_id: Optional[int] = None) -> Optional[Subscription]:
+        """
+        Register a client (None when max_clients are already connected)
+
+        Events after last_event_id that are still in the replay buffer are
+        queued first.
+        """
+        subscription = Subscription(
+            set(sensor_ids) if sensor_ids else None,
+            set(event_types) if event_types else set(EVENT_TYPES),
+            self.max_queue
+        )
+
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            self._subscribers.append(subscription)
+            self.stats['clients_total'] += 1
+
+            # Replayed under the lock so they stay ahead of newly published events
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event['id'] > last_event_id and subscription.wants(event):
+                        subscription.offer(event)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def stream(self, subscription: Subscription) -> Iterator[str]:
+        """SSE text for one client until it disconnects or the hub closes"""
+        try:
+            yield "retry: 3000\n: connected\n\n"
+            while True:
+                try:
+                    item = subscription.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Comment line keeps proxies from timing out idle connections
+                    yield ": keepalive\n\n"
+                    continue
+
+                if item is _CLOSE:
+                    return
+
+                dropped = subscription.take_dropped()
+                if dropped:
+                    yield f"event: overflow\ndata: {json.dumps({'dropped': dropped})}\n\n"
+                yield format_event(item)
+        finally:
+            self.unsubscribe(subscription)
+
+    def close(self):
+        """End every open stream"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(_CLOSE)
+
+    def get_stats(self) -> Dict:
+        """Hub statistics"""
+        with self._lock:
+            return {
+                **self.stats,
+                'clients': len(self._subscribers),
+                'max_clients': self.max_clients,
+                'pending': sum(s.queue.qsize() for s in self._subscribers)
+            }
+
+
+class CollectionTailer:
+    """
+    Follows documents inserted into a MongoDB collection by any process
+
+    Under a multi-worker server each worker only sees the readings it ingested
+    itself; a tailer polls for documents inserted since the last poll and hands
+    them to a callback, so every worker's live stream and caches see all of
+    them within one poll interval.
+
+    ObjectIds are generated by each writer process and batches commit out of
+    order, so a document may appear with an _id below one already handled.
+    Like MongoDataSource.load_since, every poll re-reads the ids of the last
+    overlap_seconds before the newest _id and skips the ones already handled.
+    """
+
+    def __init__(self, collection, callback: Callable[[List[Dict]], None],
+                 interval: float = 1.0, batch_size: int = 1000, name: str = 'collection-tailer',
+                 overlap_seconds: float = 10.0):
+        self.collection = collection
+        self.callback = callback
+        self.interval = interval
+        self.batch_size = batch_size
+        self.name = name
+        self.overlap_seconds = overlap_seconds
+
+        self._last_id = None
+        self._seen: Set[ObjectId] = set()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start following from the newest document stored now"""
+        newest = self.collection.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+        self._last_id = newest['_id'] if newest else None
+        if self._last_id is not None:
+            # Documents already in the overlap window were stored before the tailer started
+            self._seen = {doc['_id'] for doc in self.collection.find(self._window_query(), {'_id': 1})}
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"✗ {self.name} poll failed: {e}")
+
+    def _floor(self) -> ObjectId:
+        return ObjectId.from_datetime(self._last_id.generation_time - timedelta(seconds=self.overlap_seconds))
+
+    def _window_query(self) -> Dict:
+        return {'_id': {'$gte': self._floor()}} if self._last_id is not None else {}
+
+    def poll(self) -> int:
+        """Hand every document inserted since the last poll to the callback"""
+        # Only the ids of the overlap window are re-read; full documents are fetched for new ones
+        ids = [doc['_id'] for doc in self.collection.find(self._window_query(), {'_id': 1}).sort('_id', 1)]
+        new_ids = [oid for oid in ids if oid not in self._seen]
+
+        handled = 0
+        for offset in range(0, len(new_ids), self.batch_size):
+            chunk = new_ids[offset:offset + self.batch_size]
+            documents = list(self.collection.find({'_id': {'$in': chunk}}).sort('_id', 1))
+            self._seen.update(chunk)
+            if self._last_id is None or chunk[-1] > self._last_id:
+                self._last_id = chunk[-1]
+            if documents:
+                self.callback(documents)
+                handled += len(documents)
+
+        if self._last_id is not None:
+            floor = self._floor()
+            self._seen = {oid for oid in self._seen if oid >= floor}
+        return handled
+
+    def close(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
@@ -1,12 +1,15 @@
 import os
+import sys
 from datetime import datetime, timedelta
-from pymongo import MongoClient
 from dotenv import load_dotenv
 
 load_dotenv()
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mongo_registry
+
 # MongoDB connection
-client = MongoClient(os.getenv('MONGODB_URI'))
+client = mongo_registry.get_client(os.getenv('MONGODB_URI'))
 db = client[os.getenv('MONGODB_DB', 'cropiot')]
 yield_collection = db['yield_records']
 sensor_collection = db['sensor_data']
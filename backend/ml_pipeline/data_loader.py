@@ -8,10 +8,14 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import logging
-from pymongo import MongoClient
 from sklearn.preprocessing import StandardScaler
 import pickle
 import os
+import sys
+
+# Backend directory holds the shared MongoDB client registry
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mongo_registry
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +39,7 @@ class CropDataLoader:
             mongodb_uri: MongoDB connection string
             database: Database name
         """
-        self.client = MongoClient(mongodb_uri)
+        self.client = mongo_registry.get_client(mongodb_uri)
         self.db = self.client[database]
         
         # Collections
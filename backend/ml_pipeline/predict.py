@@ -9,8 +9,12 @@ from typing import Dict, List, Optional
 import logging
 import os
 import json
+import sys
 import joblib
 
+# Backend directory holds the shared MongoDB client registry
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 logger = logging.getLogger(__name__)
 
 # Get the base directory for models
@@ -71,15 +75,15 @@ class SklearnYieldPredictor:
         self._init_mongodb()
     
     def _init_mongodb(self):
-        """Initialize MongoDB connection"""
-        from pymongo import MongoClient
+        """Initialize MongoDB connection (shared client from the registry)"""
+        import mongo_registry
         
         mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
         mongodb_database = os.getenv('MONGODB_DATABASE', 'cropiot')
         
         logger.info(f"Connecting to MongoDB: {mongodb_database}")
         
-        self.client = MongoClient(mongodb_uri)
+        self.client = mongo_registry.get_client(mongodb_uri)
         self.db = self.client[mongodb_database]
         self.sensor_collection = self.db['sensor_data']
     
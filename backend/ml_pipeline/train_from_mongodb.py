@@ -15,13 +15,14 @@ import json
 import sys
 from pathlib import Path
 from typing import Dict, Tuple, Optional
-import pymongo
 from tqdm import tqdm
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models.st_gnn import create_model
+import mongo_registry
 
 logging.basicConfig(
     level=logging.INFO,
@@ -41,7 +42,7 @@ class MongoDBTrainer:
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         # Connect to MongoDB
-        self.client = pymongo.MongoClient(mongodb_uri)
+        self.client = mongo_registry.get_client(mongodb_uri)
         self.db = self.client[database]
         
         # Training status file
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+CropIoT MongoDB Reader
+Bounded, projected reads of sensor readings decoded straight into NumPy
+columns, with keyset cursors for paging through longer histories
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from pagination import KEYSET_SORT, encode_cursor, keyset_filter
+
+logger = logging.getLogger(__name__)
+
+READING_FIELDS = ['timestamp', 'sensor_id', 'soil_moisture', 'ph',
+                  'temperature', 'humidity', 'rssi', 'snr']
+NUMERIC_FIELDS = ['soil_moisture', 'ph', 'temperature', 'humidity', 'rssi', 'snr']
+
+# Values filled in when a document has no such field (matches the CSV layout)
+FIELD_DEFAULTS = {'rssi': 0, 'snr': 0}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def read_columns(collection, query: Dict, limit: int,
+                 fields: Iterable[str] = READING_FIELDS,
+                 sort=KEYSET_SORT, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, np.ndarray]:
+    """
+    Read at most limit documents into one array per field
+
+    Only the requested fields are sent by the server. Numeric fields become
+    float64 arrays (NaN for missing or non-numeric values), timestamps
+    datetime64[ms], everything else object arrays. '_id' is always included.
+    """
+    fields = list(fields)
+    projection = {field: 1 for field in fields}
+    cursor = (collection.find(query, projection)
+              .sort(sort)
+              .limit(limit)
+              .batch_size(max(min(batch_size, limit), 1)))
+
+    columns = {'_id': np.empty(limit, dtype=object)}
+    for field in fields:
+        if field in NUMERIC_FIELDS:
+            columns[field] = np.full(limit, np.nan)
+        elif field == 'timestamp':
+            columns[field] = np.empty(limit, dtype='datetime64[ms]')
+        else:
+            columns[field] = np.empty(limit, dtype=object)
+
+    numeric = [f for f in fields if f in NUMERIC_FIELDS]
+    other = [f for f in fields if f not in NUMERIC_FIELDS]
+
+    count = 0
+    try:
+        for doc in cursor:
+            columns['_id'][count] = doc['_id']
+            for field in other:
+                columns[field][count] = doc.get(field)
+            for field in numeric:
+                value = doc.get(field, FIELD_DEFAULTS.get(field))
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    columns[field][count] = value
+            count += 1
+    finally:
+        cursor.close()
+
+    return {field: array[:count] for field, array in columns.items()}
+
+
+def columns_to_rows(columns: Dict[str, np.ndarray], fields: Iterable[str] = READING_FIELDS) -> List[Dict]:
+    """Turn read_columns output into API rows (formatted timestamps, None for missing)"""
+    fields = [f for f in fields if f in columns]
+    values = {}
+    for field in fields:
+        column = columns[field]
+        if field == 'timestamp':
+            formatted = np.datetime_as_string(column, unit='s')
+            values[field] = np.char.replace(formatted, 'T', ' ').tolist()
+        elif field in NUMERIC_FIELDS:
+            as_objects = column.astype(object)
+            as_objects[np.isnan(column)] = None
+            values[field] = as_objects.tolist()
+        else:
+            values[field] = column.tolist()
+
+    return [dict(zip(fields, row)) for row in zip(*(values[f] for f in fields))]
+
+
+def read_page(collection, query: Dict, limit: int, cursor: Optional[str] = None,
+              fields: Iterable[str] = READING_FIELDS,
+              batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[Dict[str, np.ndarray], Optional[str]]:
+    """
+    Read one newest-first page of documents matching query
+
+    Args:
+        cursor: Token from a previous page (None starts at the newest document)
+
+    Returns:
+        (columns, token for the next page or None when this was the last page)
+
+    Raises:
+        ValueError: If cursor is malformed
+    """
+    fields = list(fields)
+    if 'timestamp' not in fields:
+        fields.insert(0, 'timestamp')
+
+    after = keyset_filter(cursor)
+    if after:
+        query = {'$and': [query, after]} if query else after
+
+    # One extra document tells whether another page exists
+    columns = read_columns(collection, query, limit + 1, fields=fields, batch_size=batch_size)
+    if len(columns['_id']) <= limit:
+        return columns, None
+
+    columns = {field: array[:limit] for field, array in columns.items()}
+    return columns, encode_cursor(columns['timestamp'][-1].astype(object), columns['_id'][-1])
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+CropIoT MongoDB Client Registry
+One shared MongoClient per URI and process, configured in one place, so the
+API server, water balance API, predictors and trainers share a single
+connection pool instead of each opening (and pinging) their own
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from pymongo import MongoClient
+from pymongo.database import Database
+
+logger = logging.getLogger(__name__)
+
+MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
+MONGODB_DATABASE = os.getenv('MONGODB_DATABASE', 'cropiot')
+
+# Pool and timeout settings shared by every client
+MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', '50'))
+MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', '0'))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000'))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '10000'))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '0'))  # 0 waits indefinitely
+MONGODB_READ_PREFERENCE = os.getenv('MONGODB_READ_PREFERENCE', 'primary')
+# Wire compression in order of preference (zstd comes with pymongo[zstd], snappy
+# needs python-snappy); pymongo skips codecs it cannot load with a warning
+MONGODB_COMPRESSORS = os.getenv('MONGODB_COMPRESSORS', 'zstd,zlib')
+MONGODB_APP_NAME = os.getenv('MONGODB_APP_NAME', 'cropiot')
+
+
+_clients: Dict[str, MongoClient] = {}
+_verified = set()
+_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def client_options() -> Dict:
+    """Keyword arguments for MongoClient built from the MONGODB_* settings"""
+    options = {
+        'maxPoolSize': MONGODB_MAX_POOL_SIZE,
+        'minPoolSize': MONGODB_MIN_POOL_SIZE,
+        'maxIdleTimeMS': MONGODB_MAX_IDLE_TIME_MS,
+        'serverSelectionTimeoutMS': MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        'connectTimeoutMS': MONGODB_CONNECT_TIMEOUT_MS,
+        'socketTimeoutMS': MONGODB_SOCKET_TIMEOUT_MS or None,
+        'readPreference': MONGODB_READ_PREFERENCE,
+        'appname': MONGODB_APP_NAME
+    }
+    compressors = [c.strip() for c in MONGODB_COMPRESSORS.split(',') if c.strip()]
+    if compressors:
+        options['compressors'] = ','.join(compressors)
+    return options
+
+
+def _reset_after_fork():
+    """Clients are not fork-safe: a forked child starts with an empty registry"""
+    global _pid
+    if os.getpid() != _pid:
+        _clients.clear()
+        _verified.clear()
+        _pid = os.getpid()
+
+
+def get_client(uri: Optional[str] = None) -> MongoClient:
+    """The shared client for uri (created on first use, connects lazily)"""
+    uri = uri or MONGODB_URI
+    with _lock:
+        _reset_after_fork()
+        client = _clients.get(uri)
+        if client is None:
+            client = MongoClient(uri, **client_options())
+            _clients[uri] = client
+        return client
+
+
+def get_database(name: Optional[str] = None, uri: Optional[str] = None) -> Database:
+    """Database handle on the shared client"""
+    return get_client(uri)[name or MONGODB_DATABASE]
+
+
+def ping(uri: Optional[str] = None) -> MongoClient:
+    """
+    Shared client for uri, verified with one ping per process
+
+    Raises:
+        ConnectionFailure: If the server cannot be reached
+    """
+    client = get_client(uri)
+    key = uri or MONGODB_URI
+    if key not in _verified:
+        client.admin.command('ping')
+        with _lock:
+            _verified.add(key)
+    return client
+
+
+def close_all():
+    """Close every shared client"""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _verified.clear()
+
+
+def get_stats() -> Dict:
+    """Registry settings and open clients (URIs without credentials)"""
+    with _lock:
+        uris = [uri.split('@')[-1] for uri in _clients]
+    options = client_options()
+    return {
+        'clients': len(uris),
+        'hosts': uris,
+        'max_pool_size': options['maxPoolSize'],
+        'read_preference': options['readPreference'],
+        'compressors': options.get('compressors', '')
+    }
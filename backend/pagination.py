@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+CropIoT Keyset Pagination
+Opaque cursor tokens for newest-first listings ordered by (timestamp, _id), so
+every page is one index range scan no matter how deep the client pages
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Sort order every paginated listing uses; the tie-breaker keeps pages stable
+# when several documents share a timestamp
+KEYSET_SORT = [('timestamp', -1), ('_id', -1)]
+
+
+def encode_cursor(timestamp: datetime, object_id: ObjectId) -> str:
+    """Token pointing just past the given document"""
+    payload = json.dumps({'t': timestamp.isoformat(), 'id': str(object_id)}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[datetime, ObjectId]:
+    """
+    Parse a token from encode_cursor
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload['t']), ObjectId(payload['id'])
+    except (ValueError, TypeError, KeyError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+
+def keyset_filter(token: Optional[str]) -> Dict:
+    """Query clause selecting documents after the cursor in KEYSET_SORT order"""
+    if not token:
+        return {}
+
+    timestamp, object_id = decode_cursor(token)
+    return {'$or': [
+        {'timestamp': {'$lt': timestamp}},
+        {'timestamp': timestamp, '_id': {'$lt': object_id}}
+    ]}
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+CropIoT Readings
+Validation and storage documents for sensor readings posted by the LoRa
+bridge, shared by the Flask API and the async ingest service
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_reading_timestamp(value) -> Optional[datetime]:
+    """
+    Parse an optional reading timestamp sent by a gateway
+    Accepts Unix epoch seconds or 'YYYY-MM-DD HH:MM:SS' / ISO 8601 strings
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+        # Stored timestamps are naive local time, like datetime.now()
+        return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+    return None
+
+
+# Marks a key absent from a reading, as None is a valid JSON value
+_MISSING = object()
+
+
+def _id_error(value) -> Optional[str]:
+    """Why a reading's 'id' value is invalid, or None if it is usable"""
+    if value is _MISSING:
+        return "Missing required 'id' field"
+
+    if not value or str(value).strip() == '':
+        return "Sensor ID cannot be empty"
+
+    return None
+
+
+def _map_distinct(column: List, func) -> List:
+    """Apply func to each distinct value of a column once, in column order"""
+    cache = {}
+    results = []
+    for value in column:
+        # Keyed by type too: True == 1 but only the int is a valid timestamp
+        key = (type(value), value)
+        try:
+            if key not in cache:
+                cache[key] = func(value)
+            results.append(cache[key])
+        except TypeError:  # Unhashable value such as a list
+            results.append(func(value))
+    return results
+
+
+def validate_reading(data: Dict) -> Tuple[bool, Optional[str]]:
+    """Validate sensor data structure and required fields"""
+    error = _id_error(data.get('id', _MISSING))
+    return error is None, error
+
+
+def validate_readings(items: List) -> Tuple[List[Tuple[bool, Optional[str]]], List[Optional[datetime]]]:
+    """
+    Validate a list of readings column by column
+    The id and timestamp columns are checked once per distinct value, since a
+    batch repeats a few sensor ids. Returns (is_valid, error) per item and the
+    parsed timestamp per item (None when the reading has none)
+    """
+    records = [item if isinstance(item, dict) else {} for item in items]
+    id_errors = _map_distinct([record.get('id', _MISSING) for record in records], _id_error)
+    timestamps = _map_distinct(
+        [record.get('timestamp', _MISSING) for record in records],
+        lambda value: None if value is _MISSING else parse_reading_timestamp(value))
+
+    results = []
+    for item, record, id_error, timestamp in zip(items, records, id_errors, timestamps):
+        if record is not item:
+            results.append((False, "Reading must be a JSON object"))
+        elif id_error:
+            results.append((False, id_error))
+        elif timestamp is None and 'timestamp' in record:
+            results.append((False, "Invalid 'timestamp' value"))
+        else:
+            results.append((True, None))
+
+    return results, timestamps
+
+
+def build_document(data: Dict, timestamp: Optional[datetime] = None) -> Dict:
+    """Build the storage document for a validated reading"""
+    timestamp = timestamp or datetime.now()
+
+    return {
+        'timestamp': timestamp,
+        'sensor_id': data.get('id', 'Unknown'),
+        'soil_moisture': data.get('soil_moisture', None),
+        'ph': data.get('ph', None),
+        'temperature': data.get('temperature', None),
+        'humidity': data.get('humidity', None),
+        'rssi': data.get('rssi', 0),
+        'snr': data.get('snr', 0),
+        'created_at': timestamp
+    }
+
+
+def parse_ndjson(text: str) -> Tuple[List, Dict[int, str]]:
+    """Readings from an NDJSON body; unparsable lines become None with an error by index"""
+    items = []
+    errors = {}
+    lines = [line for line in text.splitlines() if line.strip()]
+    for index, line in enumerate(lines):
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(None)
+            errors[index] = "Invalid JSON line"
+    return items, errors
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+CropIoT Response Cache
+Keeps rendered GET responses until new data is stored, and answers polling
+clients with 304 Not Modified via ETag / Last-Modified
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Dict, Optional
+from urllib.parse import urlencode
+
+from flask import Response, make_response, request
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """One rendered response body with its validators"""
+
+    __slots__ = ('body', 'mimetype', 'generation', 'etag', 'last_modified', 'created')
+
+    def __init__(self, body: bytes, mimetype: str, generation, last_modified: datetime):
+        self.body = body
+        self.mimetype = mimetype
+        self.generation = generation
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.last_modified = last_modified
+        self.created = time.monotonic()
+
+
+class ResponseCache:
+    """
+    LRU cache of GET responses keyed by route and query string
+
+    Every entry remembers the data generation it was rendered at; a lookup with
+    a newer generation (something was ingested since) is a miss. Entries also
+    expire after ttl seconds because time windows such as "last 24 hours"
+    slide even when nothing new arrives. Memory is bounded by both the number
+    of entries and the total body size.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._entries: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'evictions': 0}
+
+    def get(self, key: str, generation) -> Optional[CachedResponse]:
+        """Entry for key if it was rendered at this generation and is still fresh"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            # Stale entries stay until put() replaces them (see previous)
+            if entry.generation != generation or time.monotonic() - entry.created > self.ttl:
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def put(self, key: str, generation, body: bytes, mimetype: str,
+            previous: Optional[CachedResponse] = None) -> CachedResponse:
+        """
+        Store a rendered body
+
+        Last-Modified carries over from the previous entry for this key when the
+        body is unchanged, so clients revalidating by date still get 304s.
+        """
+        last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        entry = CachedResponse(body, mimetype, generation, last_modified)
+        if previous is not None and previous.etag == entry.etag:
+            entry.last_modified = previous.last_modified
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if len(body) <= self.max_bytes:
+                self._entries[key] = entry
+                self._size += len(body)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats['evictions'] += 1
+
+        return entry
+
+    def peek(self, key: str) -> Optional[CachedResponse]:
+        """Entry for key regardless of freshness (does not count as a hit)"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def record_not_modified(self):
+        with self._lock:
+            self.stats['not_modified'] += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self) -> Dict:
+        """Cache statistics"""
+        with self._lock:
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl
+            }
+
+
+def request_key() -> str:
+    """Cache key for the current request: path plus sorted query string"""
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return f"{request.path}?{query}" if query else request.path
+
+
+def cached_response(cache: Optional[ResponseCache], generation_fn: Callable[[], object]):
+    """
+    Decorator for read-only GET views
+
+    Successful responses are cached until generation_fn() changes. Every
+    response carries an ETag and Last-Modified, and a matching If-None-Match
+    or If-Modified-Since gets an empty 304 without re-running the view when
+    the entry is still valid.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if cache is None:
+                return view(*args, **kwargs)
+
+            key = request_key()
+            generation = generation_fn()
+            entry = cache.get(key, generation)
+
+            if entry is None:
+                previous = cache.peek(key)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = cache.put(key, generation, response.get_data(), response.mimetype, previous)
+
+            response = Response(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            response.last_modified = entry.last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+
+            response = response.make_conditional(request)
+            if response.status_code == 304:
+                cache.record_not_modified()
+            return response
+
+        return wrapper
+    return decorator
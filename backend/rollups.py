@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+"""
+CropIoT Sensor Rollups
+Maintains pre-aggregated per-sensor time buckets (minute/hour/day) so that
+analytics and charts over long windows read a few buckets per day instead
+of scanning every raw reading
+"""
+
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+METRICS = ['soil_moisture', 'ph', 'temperature', 'humidity']
+
+# Supported bucket sizes and their $dateTrunc units
+GRANULARITIES = {
+    'minute': 'minute',
+    'hour': 'hour',
+    'day': 'day'
+}
+
+BUCKET_WIDTHS = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1)
+}
+
+MISSING_VALUE = -999
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its bucket"""
+    if granularity == 'minute':
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+
+def _metric_value(value) -> Optional[float]:
+    """Return a usable numeric metric value, or None for missing/error readings"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if value == MISSING_VALUE or math.isnan(value):
+        return None
+    return float(value)
+
+
+def _usable(metric: str) -> Dict:
+    """Aggregation expression: the field holds a real reading (numeric, not -999)"""
+    return {'$and': [
+        {'$isNumber': f'${metric}'},
+        {'$ne': [f'${metric}', MISSING_VALUE]}
+    ]}
+
+
+def _combine_totals(*totals: Dict) -> Dict:
+    """Add up reading counts and per-metric count/sum from several totals"""
+    combined = {'count': 0, 'metrics': {m: {'count': 0, 'sum': 0.0} for m in METRICS}}
+    for part in totals:
+        combined['count'] += part['count']
+        for metric in METRICS:
+            combined['metrics'][metric]['count'] += part['metrics'][metric]['count']
+            combined['metrics'][metric]['sum'] += part['metrics'][metric]['sum']
+    return combined
+
+
+def _totals_from_group(doc: Optional[Dict]) -> Dict:
+    """Totals dict from a $group result with count/<metric>_count/<metric>_sum fields"""
+    return {
+        'count': doc['count'] if doc else 0,
+        'metrics': {
+            metric: {
+                'count': doc[f'{metric}_count'] if doc else 0,
+                'sum': (doc[f'{metric}_sum'] or 0.0) if doc else 0.0
+            }
+            for metric in METRICS
+        }
+    }
+
+
+def raw_totals(collection, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               sensor_id: Optional[str] = None) -> Dict:
+    """
+    Reading count and per-metric count/sum of raw readings in [start, end)
+
+    Returns:
+        {count, metrics: {metric: {count, sum}}}
+    """
+    match = {}
+    if start or end:
+        match['timestamp'] = {}
+        if start:
+            match['timestamp']['$gte'] = start
+        if end:
+            match['timestamp']['$lt'] = end
+    if sensor_id:
+        match['sensor_id'] = sensor_id
+
+    group = {'_id': None, 'count': {'$sum': 1}}
+    for metric in METRICS:
+        group[f'{metric}_count'] = {'$sum': {'$cond': [_usable(metric), 1, 0]}}
+        group[f'{metric}_sum'] = {'$sum': {'$cond': [_usable(metric), f'${metric}', 0]}}
+
+    return _totals_from_group(next(collection.aggregate([{'$match': match}, {'$group': group}]), None))
+
+
+def summarize_bucket(doc: Dict) -> Dict:
+    """
+    Turn a stored bucket into mean/min/max/std per metric
+
+    Returns:
+        {sensor_id, bucket, count, metrics: {metric: {count, mean, min, max, std} | None}}
+    """
+    metrics = {}
+    for metric in METRICS:
+        m = (doc.get('metrics') or {}).get(metric)
+        n = m.get('count', 0) if m else 0
+        if not n:
+            metrics[metric] = None
+            continue
+
+        mean = m['sum'] / n
+        std = None
+        if n > 1:
+            variance = (m['sum_sq'] - m['sum'] * m['sum'] / n) / (n - 1)
+            std = math.sqrt(max(variance, 0.0))
+
+        metrics[metric] = {
+            'count': n,
+            'mean': mean,
+            'min': m.get('min'),
+            'max': m.get('max'),
+            'std': std
+        }
+
+    return {
+        'sensor_id': doc['sensor_id'],
+        'bucket': doc['bucket'],
+        'count': doc.get('count', 0),
+        'metrics': metrics
+    }
+
+
+class RollupStore:
+    """
+    Per-sensor time-bucket aggregates kept in MongoDB
+
+    One collection per granularity (sensor_rollups_hour, sensor_rollups_day, ...).
+    Each document holds, for one sensor and one bucket, the reading count and
+    count/sum/sum of squares/min/max for every metric, so means and standard
+    deviations of any set of buckets can be combined exactly.
+
+    Live batches are applied with $inc/$min/$max upserts. When an update
+    fails, the buckets it touched are recorded in the meta collection and
+    recomputed from the raw readings once they have closed, since an $inc
+    can neither be dropped nor safely repeated. Readings stored before
+    the store was attached are folded in once by backfill(): the cutoff is
+    recorded once, live updates skip documents whose ObjectId predates it and
+    the backfill reads only those, so nothing is counted twice.
+    """
+
+    def __init__(self, db, granularities: Iterable[str] = ('hour', 'day'),
+                 prefix: str = 'sensor_rollups', repair_interval: float = 60.0):
+        unknown = [g for g in granularities if g not in GRANULARITIES]
+        if unknown:
+            raise ValueError(f"Unknown rollup granularities: {unknown}")
+
+        self.db = db
+        self.granularities = list(granularities)
+        self.collections = {g: db[f'{prefix}_{g}'] for g in self.granularities}
+        self.staging = {g: db[f'{prefix}_{g}_staging'] for g in self.granularities}
+        self.meta = db[f'{prefix}_meta']
+        self.repair_interval = repair_interval
+        self._cutoff: Optional[ObjectId] = None
+        self._ready = False
+        # Failed buckets not yet recorded in the meta collection
+        self._dirty: List[Dict] = []
+        self._dirty_lock = threading.Lock()
+
+    def ensure_indexes(self):
+        """Create the bucket indexes used by upserts and range reads"""
+        for collection in self.collections.values():
+            collection.create_index([('sensor_id', ASCENDING), ('bucket', ASCENDING)], unique=True)
+            collection.create_index([('bucket', ASCENDING)])
+
+    def update(self, documents: List[Dict]):
+        """Apply a batch of stored sensor documents to every granularity"""
+        if self._cutoff is None:
+            # Until start() has loaded the cutoff there is no telling which
+            # documents the backfill will count
+            logger.warning(f"⚠ Rollup update of {len(documents)} readings before start() ignored")
+            return
+
+        # Documents inserted before the cutoff belong to the backfill
+        documents = [doc for doc in documents
+                     if not isinstance(doc.get('_id'), ObjectId) or doc['_id'] >= self._cutoff]
+
+        for granularity, collection in self.collections.items():
+            buckets: Dict[tuple, Dict] = {}
+
+            for doc in documents:
+                key = (doc['sensor_id'], bucket_start(doc['timestamp'], granularity))
+                agg = buckets.setdefault(key, {'count': 0, 'metrics': {}})
+                agg['count'] += 1
+
+                for metric in METRICS:
+                    value = _metric_value(doc.get(metric))
+                    if value is None:
+                        continue
+                    m = agg['metrics'].setdefault(metric, {
+                        'count': 0, 'sum': 0.0, 'sum_sq': 0.0, 'min': value, 'max': value
+                    })
+                    m['count'] += 1
+                    m['sum'] += value
+                    m['sum_sq'] += value * value
+                    m['min'] = min(m['min'], value)
+                    m['max'] = max(m['max'], value)
+
+            operations = []
+            keys = []
+            for (sensor_id, bucket), agg in buckets.items():
+                inc = {'count': agg['count']}
+                set_min = {}
+                set_max = {}
+                for metric, m in agg['metrics'].items():
+                    inc[f'metrics.{metric}.count'] = m['count']
+                    inc[f'metrics.{metric}.sum'] = m['sum']
+                    inc[f'metrics.{metric}.sum_sq'] = m['sum_sq']
+                    set_min[f'metrics.{metric}.min'] = m['min']
+                    set_max[f'metrics.{metric}.max'] = m['max']
+
+                update = {'$inc': inc}
+                if set_min:
+                    update['$min'] = set_min
+                    update['$max'] = set_max
+
+                operations.append(UpdateOne(
+                    {'sensor_id': sensor_id, 'bucket': bucket}, update, upsert=True
+                ))
+                keys.append((sensor_id, bucket))
+
+            if operations:
+                try:
+                    collection.bulk_write(operations, ordered=False)
+                except BulkWriteError as e:
+                    # Only the failed upserts are missing
+                    failed = [keys[err['index']] for err in e.details.get('writeErrors', [])]
+                    logger.error(f"✗ Failed to update {len(failed)} {granularity} rollup buckets")
+                    self._mark_dirty(granularity, failed)
+                except PyMongoError as e:
+                    # Unknown which upserts were applied
+                    logger.error(f"✗ Failed to update {granularity} rollups: {e}")
+                    self._mark_dirty(granularity, keys)
+
+    def _mark_dirty(self, granularity: str, keys: List[tuple]):
+        """Record buckets whose live update failed so repair() recomputes them"""
+        with self._dirty_lock:
+            self._dirty.extend({'granularity': granularity, 'sensor_id': sensor_id, 'bucket': bucket}
+                               for sensor_id, bucket in keys)
+        self._flush_dirty()
+
+    def _flush_dirty(self):
+        """Write buckets marked dirty in this process to the meta collection"""
+        with self._dirty_lock:
+            if not self._dirty:
+                return
+            try:
+                self.meta.update_one({'_id': 'dirty'},
+                                     {'$addToSet': {'buckets': {'$each': self._dirty}}}, upsert=True)
+                logger.warning(f"⚠ {len(self._dirty)} rollup buckets marked for repair")
+                self._dirty = []
+            except PyMongoError as e:
+                logger.error(f"✗ Failed to record rollup buckets for repair: {e}")
+
+    def repair(self, raw_collection) -> int:
+        """
+        Recompute the dirty buckets that have closed from the raw readings
+
+        Open buckets still receive live updates, which a recompute could race
+        with, so they wait for a later pass. Returns the number repaired.
+        """
+        self._flush_dirty()
+        state = self.meta.find_one({'_id': 'dirty'}) or {}
+        now = datetime.now()
+        repaired = 0
+
+        for entry in state.get('buckets', []):
+            granularity = entry['granularity']
+            if granularity not in self.collections:
+                continue
+            end = entry['bucket'] + BUCKET_WIDTHS[granularity]
+            if end > now:
+                continue
+
+            match = {'sensor_id': entry['sensor_id'], 'timestamp': {'$gte': entry['bucket'], '$lt': end}}
+            doc = next(raw_collection.aggregate([{'$match': match}] + self._bucket_stages(granularity)), None)
+            key = {'sensor_id': entry['sensor_id'], 'bucket': entry['bucket']}
+            if doc is None:
+                self.collections[granularity].delete_one(key)
+            else:
+                # Recomputed from every raw reading, so a backfill merge must leave it alone
+                doc['backfilled'] = True
+                self.collections[granularity].replace_one(key, doc, upsert=True)
+
+            self.meta.update_one({'_id': 'dirty'}, {'$pull': {'buckets': entry}})
+            repaired += 1
+
+        if repaired:
+            logger.info(f"✓ Repaired {repaired} rollup buckets from raw readings")
+        return repaired
+
+    def _repair_loop(self, raw_collection):
+        while True:
+            time.sleep(self.repair_interval)
+            try:
+                self.repair(raw_collection)
+            except PyMongoError as e:
+                logger.error(f"✗ Rollup repair failed: {e}")
+
+    def start(self, raw_collection, rebuild: bool = True):
+        """
+        Attach to the raw collection: make sure existing data is rolled up
+
+        Called before live updates begin. The backfill cutoff is recorded by the
+        first process to start and reused by every later one. If no completed
+        backfill is recorded (first start, or a backfill interrupted by a
+        restart) readings inserted before the cutoff are rolled up again in a
+        background thread; live batches cover everything after.
+
+        With rebuild=False (every worker but one under a multi-process server)
+        the store only waits for another process to record the backfill.
+        """
+        self.ensure_indexes()
+
+        state = self.meta.find_one_and_update(
+            {'_id': 'backfill'},
+            {'$setOnInsert': {'status': 'running', 'cutoff': datetime.now(timezone.utc)}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        cutoff = state['cutoff']
+        self._cutoff = ObjectId.from_datetime(cutoff)
+
+        if rebuild:
+            thread = threading.Thread(target=self._repair_loop, args=(raw_collection,),
+                                      name='rollup-repair', daemon=True)
+            thread.start()
+
+        if state.get('status') == 'complete':
+            self._ready = True
+            logger.info(f"✓ Sensor rollups ready ({', '.join(self.granularities)})")
+            return
+
+        if not rebuild:
+            thread = threading.Thread(target=self._wait_for_backfill, name='rollup-backfill-wait', daemon=True)
+            thread.start()
+            logger.info("⚠ Sensor rollups waiting for the backfill in another worker")
+            return
+
+        thread = threading.Thread(target=self.backfill, args=(raw_collection, cutoff),
+                                  name='rollup-backfill', daemon=True)
+        thread.start()
+        logger.info("⚠ Sensor rollups backfilling in the background")
+
+    def backfill(self, raw_collection, cutoff: datetime):
+        """
+        Fold every raw reading inserted before cutoff into the rollups
+
+        Buckets are built from scratch in staging collections and then merged
+        into the live ones, which keep receiving live updates meanwhile. Merged
+        buckets are flagged, so a backfill interrupted anywhere can simply run
+        again with the same cutoff.
+        """
+        try:
+            for granularity, staging in self.staging.items():
+                raw_collection.aggregate(
+                    self._backfill_pipeline(granularity, staging.name, cutoff),
+                    allowDiskUse=True
+                )
+
+            for granularity, staging in self.staging.items():
+                staging.aggregate(self._swap_pipeline(self.collections[granularity].name),
+                                  allowDiskUse=True)
+                staging.drop()
+
+            self.meta.update_one({'_id': 'backfill'},
+                                 {'$set': {'status': 'complete', 'completed_at': datetime.now()}})
+            self._ready = True
+            logger.info("✓ Sensor rollups backfill complete")
+
+        except PyMongoError as e:
+            logger.error(f"✗ Sensor rollups backfill failed: {e}")
+
+    def _wait_for_backfill(self, poll_interval: float = 5.0):
+        """Mark the store ready once the backfill status is complete"""
+        while True:
+            try:
+                state = self.meta.find_one({'_id': 'backfill'})
+                if state and state.get('status') == 'complete':
+                    self._ready = True
+                    logger.info("✓ Sensor rollups ready (backfilled by another worker)")
+                    return
+            except PyMongoError as e:
+                logger.error(f"✗ Failed to read rollup backfill status: {e}")
+            time.sleep(poll_interval)
+
+    def _bucket_stages(self, granularity: str) -> List[Dict]:
+        """Aggregation stages that group raw readings into bucket documents"""
+        group = {
+            '_id': {
+                'sensor_id': '$sensor_id',
+                'bucket': {'$dateTrunc': {'date': '$timestamp', 'unit': GRANULARITIES[granularity]}}
+            },
+            'count': {'$sum': 1}
+        }
+        for metric in METRICS:
+            value = {'$cond': [_usable(metric), f'${metric}', None]}
+            group[f'{metric}_count'] = {'$sum': {'$cond': [_usable(metric), 1, 0]}}
+            group[f'{metric}_sum'] = {'$sum': value}
+            group[f'{metric}_sum_sq'] = {'$sum': {'$cond': [
+                _usable(metric), {'$multiply': [f'${metric}', f'${metric}']}, 0
+            ]}}
+            group[f'{metric}_min'] = {'$min': value}
+            group[f'{metric}_max'] = {'$max': value}
+
+        project = {
+            '_id': 0,
+            'sensor_id': '$_id.sensor_id',
+            'bucket': '$_id.bucket',
+            'count': 1
+        }
+        for metric in METRICS:
+            project[f'metrics.{metric}'] = {'$cond': [
+                {'$gt': [f'${metric}_count', 0]},
+                {
+                    'count': f'${metric}_count',
+                    'sum': f'${metric}_sum',
+                    'sum_sq': f'${metric}_sum_sq',
+                    'min': f'${metric}_min',
+                    'max': f'${metric}_max'
+                },
+                '$$REMOVE'
+            ]}
+
+        return [{'$group': group}, {'$project': project}]
+
+    def _backfill_pipeline(self, granularity: str, target: str, cutoff: datetime) -> List[Dict]:
+        """Aggregation that groups raw readings before cutoff into buckets, replacing target"""
+        return ([{'$match': {'_id': {'$lt': ObjectId.from_datetime(cutoff)}}}] +
+                self._bucket_stages(granularity) +
+                [{'$out': target}])
+
+    def _swap_pipeline(self, target: str) -> List[Dict]:
+        """
+        Aggregation over a staging collection that merges its buckets into target
+
+        Buckets already touched by live updates are combined, not replaced.
+        Merged buckets get backfilled: true and are left alone when the merge
+        runs again.
+        """
+        def unless_merged(old, combined):
+            return {'$cond': [{'$eq': ['$backfilled', True]}, old, combined]}
+
+        combine = {
+            'count': unless_merged('$count', {'$add': [{'$ifNull': ['$count', 0]}, '$$new.count']}),
+            'backfilled': True
+        }
+        for metric in METRICS:
+            old = f'$metrics.{metric}'
+            new = f'$$new.metrics.{metric}'
+            combine[f'metrics.{metric}'] = unless_merged(old, {'$cond': [
+                {'$eq': [{'$type': new}, 'missing']},
+                old,
+                {'$cond': [
+                    {'$eq': [{'$type': old}, 'missing']},
+                    new,
+                    {
+                        'count': {'$add': [f'{old}.count', f'{new}.count']},
+                        'sum': {'$add': [f'{old}.sum', f'{new}.sum']},
+                        'sum_sq': {'$add': [f'{old}.sum_sq', f'{new}.sum_sq']},
+                        'min': {'$min': [f'{old}.min', f'{new}.min']},
+                        'max': {'$max': [f'{old}.max', f'{new}.max']}
+                    }
+                ]}
+            ]})
+
+        return [
+            {'$project': {'_id': 0}},
+            {'$set': {'backfilled': True}},
+            {'$merge': {
+                'into': target,
+                'on': ['sensor_id', 'bucket'],
+                'whenMatched': [{'$set': combine}],
+                'whenNotMatched': 'insert'
+            }}
+        ]
+
+    def is_ready(self, granularity: Optional[str] = None) -> bool:
+        """True once rollups cover all stored data (at the given granularity)"""
+        if granularity is not None and granularity not in self.collections:
+            return False
+        return self._ready
+
+    def query(self, granularity: str, start: Optional[datetime] = None,
+              end: Optional[datetime] = None, sensor_id: Optional[str] = None) -> List[Dict]:
+        """
+        Read buckets in [start, end) ordered by sensor and bucket
+
+        Returns summarized buckets (see summarize_bucket)
+        """
+        if granularity not in self.collections:
+            raise ValueError(f"Rollup granularity not maintained: {granularity}")
+
+        query = {}
+        if start or end:
+            query['bucket'] = {}
+            if start:
+                query['bucket']['$gte'] = bucket_start(start, granularity)
+            if end:
+                query['bucket']['$lt'] = end
+        if sensor_id:
+            query['sensor_id'] = sensor_id
+
+        cursor = self.collections[granularity].find(query, {'_id': 0}).sort(
+            [('sensor_id', ASCENDING), ('bucket', ASCENDING)]
+        )
+        return [summarize_bucket(doc) for doc in cursor]
+
+    def totals(self, granularity: str, start: Optional[datetime] = None,
+               end: Optional[datetime] = None, sensor_id: Optional[str] = None) -> Dict:
+        """
+        Reading count and per-metric count/sum over the buckets in [start, end)
+
+        Returns:
+            {count, metrics: {metric: {count, sum}}}
+        """
+        if granularity not in self.collections:
+            raise ValueError(f"Rollup granularity not maintained: {granularity}")
+
+        match = {}
+        if start or end:
+            match['bucket'] = {}
+            if start:
+                match['bucket']['$gte'] = start
+            if end:
+                match['bucket']['$lt'] = end
+        if sensor_id:
+            match['sensor_id'] = sensor_id
+
+        group = {'_id': None, 'count': {'$sum': '$count'}}
+        for metric in METRICS:
+            group[f'{metric}_count'] = {'$sum': f'$metrics.{metric}.count'}
+            group[f'{metric}_sum'] = {'$sum': f'$metrics.{metric}.sum'}
+
+        cursor = self.collections[granularity].aggregate([{'$match': match}, {'$group': group}])
+        return _totals_from_group(next(cursor, None))
+
+    def sensor_summaries(self, granularity: str = 'day') -> List[Dict]:
+        """
+        All buckets of each sensor combined into one summary
+
+        Returns summarized buckets (see summarize_bucket) with first_bucket and
+        last_bucket in place of bucket
+        """
+        if granularity not in self.collections:
+            raise ValueError(f"Rollup granularity not maintained: {granularity}")
+
+        group = {
+            '_id': '$sensor_id',
+            'count': {'$sum': '$count'},
+            'first_bucket': {'$min': '$bucket'},
+            'last_bucket': {'$max': '$bucket'}
+        }
+        for metric in METRICS:
+            for field in ('count', 'sum', 'sum_sq'):
+                group[f'{metric}_{field}'] = {'$sum': f'$metrics.{metric}.{field}'}
+            group[f'{metric}_min'] = {'$min': f'$metrics.{metric}.min'}
+            group[f'{metric}_max'] = {'$max': f'$metrics.{metric}.max'}
+
+        summaries = []
+        for doc in self.collections[granularity].aggregate([{'$group': group}, {'$sort': {'_id': ASCENDING}}]):
+            summary = summarize_bucket({
+                'sensor_id': doc['_id'],
+                'bucket': doc['last_bucket'],
+                'count': doc['count'],
+                'metrics': {
+                    metric: {field: doc[f'{metric}_{field}'] for field in ('count', 'sum', 'sum_sq', 'min', 'max')}
+                    for metric in METRICS
+                }
+            })
+            del summary['bucket']
+            summary['first_bucket'] = doc['first_bucket']
+            summary['last_bucket'] = doc['last_bucket']
+            summaries.append(summary)
+        return summaries
+
+    def last_bucket(self, granularity: str, sensor_id: str, metric: Optional[str] = None) -> Optional[datetime]:
+        """Start of the newest bucket of a sensor (holding a usable value of metric, if given)"""
+        if granularity not in self.collections:
+            raise ValueError(f"Rollup granularity not maintained: {granularity}")
+
+        query = {'sensor_id': sensor_id}
+        if metric:
+            query[f'metrics.{metric}.count'] = {'$gt': 0}
+        doc = self.collections[granularity].find_one(query, {'_id': 0, 'bucket': 1},
+                                                     sort=[('bucket', DESCENDING)])
+        return doc['bucket'] if doc else None
+
+    def window_totals(self, raw_collection, start: datetime, sensor_id: Optional[str] = None,
+                      granularity: str = 'hour') -> Dict:
+        """
+        Exact totals for every reading since start
+
+        Whole buckets come from the rollups; only the partial bucket at the
+        start of the window is aggregated from raw readings.
+        """
+        first_full = bucket_start(start, granularity)
+        if first_full < start:
+            first_full += BUCKET_WIDTHS[granularity]
+            head = raw_totals(raw_collection, start=start, end=first_full, sensor_id=sensor_id)
+        else:
+            head = _totals_from_group(None)
+
+        return _combine_totals(head, self.totals(granularity, start=first_full, sensor_id=sensor_id))
+
+    def daily_means(self, start: datetime, end: datetime,
+                    sensor_id: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Mean of each metric per day across the selected sensors
+
+        Returns:
+            {'YYYY-MM-DD': {'temperature': float|None, ..., 'readings': int}}
+        """
+        if 'day' not in self.collections:
+            raise ValueError("Daily rollups are not maintained")
+
+        match = {'bucket': {'$gte': bucket_start(start, 'day'), '$lt': end}}
+        if sensor_id:
+            match['sensor_id'] = sensor_id
+
+        group = {'_id': '$bucket', 'readings': {'$sum': '$count'}}
+        for metric in METRICS:
+            group[f'{metric}_sum'] = {'$sum': f'$metrics.{metric}.sum'}
+            group[f'{metric}_count'] = {'$sum': f'$metrics.{metric}.count'}
+
+        daily = {}
+        for doc in self.collections['day'].aggregate([{'$match': match}, {'$group': group}]):
+            day = {'readings': doc['readings']}
+            for metric in METRICS:
+                n = doc[f'{metric}_count']
+                day[metric] = doc[f'{metric}_sum'] / n if n else None
+            daily[doc['_id'].strftime('%Y-%m-%d')] = day
+
+        return dict(sorted(daily.items()))
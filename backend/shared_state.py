@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+CropIoT Shared Worker State
+Counters shared by every worker process of a pre-forking server (gunicorn)
+and a leader lock so singleton background jobs run in exactly one worker
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+COUNTER_NAMES = ('total_received', 'total_saved', 'errors', 'generation', 'disease_generation')
+
+
+class Counters:
+    """
+    Named integer counters
+
+    Shared counters live in anonymous shared memory (multiprocessing.Value),
+    so they must be created in the master process before workers fork; local
+    counters are plain integers guarded by a thread lock.
+    """
+
+    def __init__(self, names: Iterable[str] = COUNTER_NAMES, shared: bool = False):
+        self.shared = shared
+        if shared:
+            self._values = {name: multiprocessing.Value('q', 0) for name in names}
+        else:
+            self._values = {name: 0 for name in names}
+            self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        """Add amount and return the new value"""
+        if self.shared:
+            value = self._values[name]
+            with value.get_lock():
+                value.value += amount
+                return value.value
+
+        with self._lock:
+            self._values[name] += amount
+            return self._values[name]
+
+    def get(self, name: str) -> int:
+        if self.shared:
+            return self._values[name].value
+        return self._values[name]
+
+    def as_dict(self) -> Dict[str, int]:
+        return {name: self.get(name) for name in self._values}
+
+
+_shared_counters: Optional[Counters] = None
+_leader_lock = None
+
+
+def enable_shared_counters():
+    """Create process-shared counters; call in the server master before forking"""
+    global _shared_counters
+    if _shared_counters is None:
+        _shared_counters = Counters(shared=True)
+
+
+def get_counters() -> Counters:
+    """Shared counters when running under a pre-forking server, local ones otherwise"""
+    return _shared_counters if _shared_counters is not None else Counters()
+
+
+def is_multi_worker() -> bool:
+    """True when workers share state through this module"""
+    return _shared_counters is not None
+
+
+def acquire_leader(lock_path: str) -> bool:
+    """
+    Try to become the leader worker (non-blocking)
+
+    The lock is held until the process exits, so when the leader dies a
+    replacement worker can take over. Always True for a single process.
+    """
+    global _leader_lock
+    if not is_multi_worker() or not FCNTL_AVAILABLE:
+        return True
+    if _leader_lock is not None:
+        return True
+
+    lock_file = open(lock_path, 'a')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+
+    _leader_lock = lock_file
+    logger.info(f"✓ Worker {os.getpid()} is the leader (runs background maintenance)")
+    return True
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+CropIoT Subsystems
+Deferred initialization of the API's heavier parts (storage connections,
+ML models, Earth Engine) on background threads, with per-subsystem
+readiness so the server answers /health while they load
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+DISABLED = 'disabled'
+FAILED = 'failed'
+
+
+class Subsystem:
+    """
+    One named part of the server with a loader function
+
+    The loader returns False when the subsystem is intentionally unavailable
+    (e.g. a model that has not been trained yet) and raises on errors.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Optional[bool]], requires: Iterable[str] = ()):
+        self.name = name
+        self.loader = loader
+        self.requires = tuple(requires)
+
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self._done = threading.Event()
+
+    def run(self):
+        """Run the loader in the calling thread"""
+        self.state = LOADING
+        self.started = time.perf_counter()
+        try:
+            result = self.loader()
+            self.state = DISABLED if result is False else READY
+        except Exception as e:
+            self.state = FAILED
+            self.error = str(e)
+            logger.error(f"✗ {self.name} failed to initialize: {e}")
+        finally:
+            self.seconds = round(time.perf_counter() - self.started, 3)
+            self._done.set()
+
+        if self.state == READY:
+            logger.info(f"✓ {self.name} ready in {self.seconds:.2f}s")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until loaded (or timeout); True when the subsystem is ready"""
+        self._done.wait(timeout)
+        return self.state == READY
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def status(self) -> Dict:
+        status = {'state': self.state}
+        if self.seconds is not None:
+            status['seconds'] = self.seconds
+        elif self.started is not None:
+            status['seconds'] = round(time.perf_counter() - self.started, 3)
+        if self.error:
+            status['error'] = self.error
+        return status
+
+
+class SubsystemRegistry:
+    """
+    Starts registered subsystems and reports their readiness
+
+    In background mode every subsystem loads on its own daemon thread, after
+    the subsystems it requires have finished; in eager mode they load one
+    after another in registration order inside start().
+    """
+
+    def __init__(self, background: bool = True):
+        self.background = background
+        self._subsystems: Dict[str, Subsystem] = {}
+
+    def add(self, name: str, loader: Callable[[], Optional[bool]],
+            requires: Iterable[str] = ()) -> Subsystem:
+        subsystem = Subsystem(name, loader, requires)
+        self._subsystems[name] = subsystem
+        return subsystem
+
+    def start(self):
+        """Begin loading every registered subsystem"""
+        for subsystem in self._subsystems.values():
+            if not self.background:
+                subsystem.run()
+                continue
+            thread = threading.Thread(target=self._load, args=(subsystem,),
+                                      name=f'init-{subsystem.name}', daemon=True)
+            thread.start()
+
+    def _load(self, subsystem: Subsystem):
+        for name in subsystem.requires:
+            self._subsystems[name].wait()
+        subsystem.run()
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Wait up to timeout for a subsystem; True when it is ready"""
+        return self._subsystems[name].wait(timeout)
+
+    def is_ready(self, name: str) -> bool:
+        return self._subsystems[name].state == READY
+
+    def state(self, name: str) -> str:
+        return self._subsystems[name].state
+
+    def pending(self) -> List[str]:
+        """Subsystems still loading"""
+        return [name for name, subsystem in self._subsystems.items() if not subsystem.done]
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Readiness of every subsystem"""
+        return {name: subsystem.status() for name, subsystem in self._subsystems.items()}
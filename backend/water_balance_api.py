@@ -19,12 +19,15 @@ Also provides VPD stress calculations and crop growth modeling
 import os
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 import numpy as np
-from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
 
+# Shared MongoDB client registry
+import mongo_registry
+from rollups import MISSING_VALUE
+
 # Import physics layer components
 from ml_pipeline.physics_layer import (
     PhysicsInformedLayer,
@@ -41,7 +44,7 @@ from ml_pipeline.physics_layer import (
 
 # Import GEE service for satellite data
 try:
-    from gee_service import get_gee_service, GEEService
+    from gee_service import get_gee_service, make_plots, GEEService
     GEE_AVAILABLE = True
 except ImportError:
     GEE_AVAILABLE = False
@@ -113,6 +116,9 @@ class WaterBalanceAPI:
         self.mongo_client = None
         self.db = None
         self._init_mongodb()
+
+        # Optional RollupStore; daily sensor means are read from its day buckets
+        self.rollups = None
         
         # Initialize GEE service
         self.gee_service: Optional[GEEService] = None
@@ -129,10 +135,9 @@ class WaterBalanceAPI:
         logger.info("Water Balance API initialized")
     
     def _init_mongodb(self):
-        """Initialize MongoDB connection"""
+        """Initialize MongoDB connection (shared client, pinged once per process)"""
         try:
-            self.mongo_client = MongoClient(self.mongodb_uri, serverSelectionTimeoutMS=5000)
-            self.mongo_client.admin.command('ping')
+            self.mongo_client = mongo_registry.ping(self.mongodb_uri)
             self.db = self.mongo_client[self.db_name]
             logger.info(f"Connected to MongoDB: {self.db_name}")
         except ConnectionFailure as e:
@@ -243,11 +248,10 @@ class WaterBalanceAPI:
         logger.info(f"Calculating water balance for ({lat}, {lng}) "
                    f"from {start_date} to {end_date}")
         
-        # Fetch sensor data
-        sensor_data = self.get_sensor_data(start_date, end_date, sensor_id)
-        
-        # Aggregate sensor data by date
-        daily_sensor_data = self._aggregate_daily_sensor_data(sensor_data)
+        # Fetch sensor data aggregated by date
+        daily_sensor_data, reading_count = self.get_daily_sensor_data(
+            start_date, end_date, sensor_id
+        )
         
         # Fetch GEE data if available
         gee_data = {}
@@ -259,6 +263,63 @@ class WaterBalanceAPI:
             except Exception as e:
                 logger.warning(f"Failed to fetch GEE data: {e}")
         
+        return self._analyze_location(lat, lng, start_date, end_date,
+                                      daily_sensor_data, reading_count, gee_data)
+    
+    def calculate_water_balance_batch(self, plots: List,
+                                      start_date: str, end_date: str,
+                                      sensor_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Calculate water balance for many plots at once
+        
+        Satellite data for all plots comes from one Earth Engine request per
+        product (GEEService.fetch_comprehensive_batch); the sensor data is
+        read once and shared, as the sensors are farm-wide.
+        
+        Args:
+            plots: Dicts with lat, lng and optional id / buffer_m, or (lat, lng[, buffer_m]) tuples
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            sensor_id: Optional sensor ID filter
+            
+        Returns:
+            calculate_water_balance results keyed by plot id
+        """
+        if not self.gee_service:
+            raise RuntimeError("GEE service not available")
+        
+        plots = make_plots(plots)
+        logger.info(f"Calculating water balance for {len(plots)} plots "
+                   f"from {start_date} to {end_date}")
+        
+        daily_sensor_data, reading_count = self.get_daily_sensor_data(
+            start_date, end_date, sensor_id
+        )
+        
+        gee_batch = {}
+        try:
+            gee_batch = self.gee_service.fetch_comprehensive_batch(plots, start_date, end_date)
+        except Exception as e:
+            logger.warning(f"Failed to fetch GEE data: {e}")
+        
+        return {
+            'success': True,
+            'plots': {
+                plot.id: self._analyze_location(plot.lat, plot.lng, start_date, end_date,
+                                                daily_sensor_data, reading_count,
+                                                gee_batch.get(plot.id, {}))
+                for plot in plots
+            },
+            'metadata': {
+                'plotCount': len(plots),
+                'dateRange': {'start': start_date, 'end': end_date}
+            }
+        }
+    
+    def _analyze_location(self, lat: float, lng: float, start_date: str, end_date: str,
+                          daily_sensor_data: Dict[str, Dict], reading_count: int,
+                          gee_data: Dict) -> Dict[str, Any]:
+        """Water balance, crop growth, VPD and stress analysis of one location"""
         # Calculate water balance
         water_balance = self._compute_water_balance(
             daily_sensor_data, gee_data, start_date, end_date
@@ -302,12 +363,41 @@ class WaterBalanceAPI:
                 'location': {'lat': lat, 'lng': lng},
                 'dateRange': {'start': start_date, 'end': end_date},
                 'dataSources': {
-                    'sensors': len(sensor_data),
+                    'sensors': reading_count,
                     'gee': bool(gee_data)
                 }
             }
         }
     
+    def get_daily_sensor_data(self, start_date: str, end_date: str,
+                              sensor_id: Optional[str] = None) -> Tuple[Dict[str, Dict], int]:
+        """
+        Daily sensor averages for a date range
+        
+        Reads one pre-aggregated bucket per sensor per day when rollups are
+        available, otherwise fetches the raw readings and averages them here.
+        
+        Returns:
+            (daily averages keyed by date, number of readings they cover)
+        """
+        if self.rollups is not None and self.rollups.is_ready('day'):
+            try:
+                start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+                end_dt = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
+                
+                daily = {}
+                reading_count = 0
+                for date, day in self.rollups.daily_means(start_dt, end_dt, sensor_id).items():
+                    daily[date] = {key: day[key] for key in ['temperature', 'humidity', 'soil_moisture']}
+                    reading_count += day['readings']
+                
+                return daily, reading_count
+            except Exception as e:
+                logger.warning(f"Failed to read daily rollups, using raw readings: {e}")
+        
+        sensor_data = self.get_sensor_data(start_date, end_date, sensor_id)
+        return self._aggregate_daily_sensor_data(sensor_data), len(sensor_data)
+    
     def _aggregate_daily_sensor_data(self, sensor_data: List[Dict]) -> Dict[str, Dict]:
         """Aggregate sensor readings by date"""
         daily = {}
@@ -321,12 +411,11 @@ class WaterBalanceAPI:
                     'soil_moisture': []
                 }
             
-            if reading.get('temperature') is not None:
-                daily[date]['temperature'].append(reading['temperature'])
-            if reading.get('humidity') is not None:
-                daily[date]['humidity'].append(reading['humidity'])
-            if reading.get('soil_moisture') is not None:
-                daily[date]['soil_moisture'].append(reading['soil_moisture'])
+            for key in ['temperature', 'humidity', 'soil_moisture']:
+                value = reading.get(key)
+                # -999 marks a failed sensor read; the day buckets leave it out too
+                if value is not None and value != MISSING_VALUE:
+                    daily[date][key].append(value)
         
         # Calculate daily averages
         for date in daily:
@@ -338,81 +427,86 @@ class WaterBalanceAPI:
     
     def _compute_water_balance(self, daily_sensor: Dict, gee_data: Dict,
                                 start_date: str, end_date: str) -> List[Dict]:
-        """Compute daily water balance"""
-        water_balance = []
-        
-        # Get data arrays
-        rainfall_data = {d['date']: d['value'] for d in gee_data.get('rainfall', [])}
-        et_data = {d['date']: d['value'] for d in gee_data.get('et', [])}
-        kc_data = {d['date']: d['value'] for d in gee_data.get('kc', [])}
+        """
+        Compute daily water balance
         
-        # Generate date range
+        Sensor and GEE series are aligned onto the dense date range and every
+        term (VPD, ET0, ETc, runoff, ΔS, balance) is computed for the whole
+        range in array operations.
+        """
         dates = self._generate_date_range(start_date, end_date)
-        
-        prev_soil_moisture = None
-        
-        for date in dates:
-            sensor = daily_sensor.get(date, {})
-            
-            # Get values with fallbacks
-            temperature = sensor.get('temperature') or 25.0
-            humidity = sensor.get('humidity') or 60.0
-            soil_moisture = sensor.get('soil_moisture')
-            
-            precipitation = rainfall_data.get(date, 0)
-            et_value = et_data.get(date, 0)
-            kc = kc_data.get(date, 0.8)
-            
-            # Calculate VPD
-            vpd = calculate_vpd_numpy(np.array([temperature]), np.array([humidity]))[0]
-            
-            # Calculate ET0 (reference ET)
-            et0 = calculate_et0_numpy(np.array([temperature]), np.array([humidity]))[0]
-            
-            # Calculate ETc (crop ET)
-            etc = et0 * kc
-            
-            # Calculate delta S (change in soil moisture)
-            if soil_moisture is not None and prev_soil_moisture is not None:
-                # Convert soil moisture % to mm (assuming 100mm root zone)
-                delta_s = (soil_moisture - prev_soil_moisture) * 1.0
-            else:
-                delta_s = 0
-            
-            prev_soil_moisture = soil_moisture
-            
-            # Estimate runoff (simplified SCS-CN)
-            runoff = self._estimate_runoff(precipitation)
-            
-            # Water balance: Balance = P + I - ET - R - ΔS
-            irrigation = 0  # TODO: Get from irrigation sensors
-            balance = precipitation + irrigation - etc - runoff - delta_s
-            
-            # VPD stress factor
-            vpd_stress = self._calculate_vpd_stress(vpd)
-            
-            water_balance.append({
+        if not dates:
+            return []
+        index = {date: i for i, date in enumerate(dates)}
+        
+        # Sensor values with fallbacks (missing or zero temperature / humidity)
+        sensors = [daily_sensor.get(date, {}) for date in dates]
+        temperature = np.array([sensor.get('temperature') or 25.0 for sensor in sensors], dtype=float)
+        humidity = np.array([sensor.get('humidity') or 60.0 for sensor in sensors], dtype=float)
+        has_soil_moisture = np.array([sensor.get('soil_moisture') is not None for sensor in sensors])
+        soil_moisture = np.array([sensor['soil_moisture'] if has else np.nan
+                                  for sensor, has in zip(sensors, has_soil_moisture)], dtype=float)
+        
+        # GEE series on the date index
+        precipitation = self._align_series(gee_data.get('rainfall', []), index, 0.0)
+        kc = self._align_series(gee_data.get('kc', []), index, 0.8)
+        
+        # VPD, reference ET (ET0) and crop ET (ETc)
+        vpd = np.asarray(calculate_vpd_numpy(temperature, humidity), dtype=float)
+        et0 = np.asarray(calculate_et0_numpy(temperature, humidity), dtype=float)
+        etc = et0 * kc
+        
+        # Delta S (change in soil moisture) between consecutive days that both
+        # have a reading; soil moisture % to mm, assuming 100mm root zone
+        delta_s = np.zeros(len(dates))
+        both = has_soil_moisture[1:] & has_soil_moisture[:-1]
+        delta_s[1:][both] = (soil_moisture[1:] - soil_moisture[:-1])[both] * 1.0
+        
+        # Estimate runoff (simplified SCS-CN)
+        runoff = self._estimate_runoff_array(precipitation)
+        
+        # Water balance: Balance = P + I - ET - R - ΔS
+        irrigation = np.zeros(len(dates))  # TODO: Get from irrigation sensors
+        balance = precipitation + irrigation - etc - runoff - delta_s
+        
+        # VPD stress factor
+        vpd_stress = self._calculate_vpd_stress_array(vpd)
+        
+        return [
+            {
                 'date': date,
-                'et0': float(et0),
-                'etc': float(etc),
-                'precipitation': float(precipitation),
-                'irrigation': float(irrigation),
-                'runoff': float(runoff),
-                'deltaS': float(delta_s),
-                'value': float(balance),  # For chart compatibility
-                'vpd': float(vpd),
-                'vpdStress': float(vpd_stress),
-                'kc': float(kc),
+                'et0': day_et0,
+                'etc': day_etc,
+                'precipitation': day_p,
+                'irrigation': day_i,
+                'runoff': day_r,
+                'deltaS': day_ds,
+                'value': day_balance,  # For chart compatibility
+                'vpd': day_vpd,
+                'vpdStress': day_stress,
+                'kc': day_kc,
                 'components': {
-                    'p': float(precipitation),
-                    'i': float(irrigation),
-                    'et': float(etc),
-                    'r': float(runoff),
-                    'ds': float(delta_s)
+                    'p': day_p,
+                    'i': day_i,
+                    'et': day_etc,
+                    'r': day_r,
+                    'ds': day_ds
                 }
-            })
-        
-        return water_balance
+            }
+            for date, day_et0, day_etc, day_p, day_i, day_r, day_ds, day_balance, day_vpd, day_stress, day_kc in zip(
+                dates, et0.tolist(), etc.tolist(), precipitation.tolist(), irrigation.tolist(), runoff.tolist(),
+                delta_s.tolist(), balance.tolist(), vpd.tolist(), vpd_stress.tolist(), kc.tolist()
+            )
+        ]
+    
+    def _align_series(self, series: List[Dict], index: Dict[str, int], default: float) -> np.ndarray:
+        """Values of a {date, value} series on a date index, default on days without a value"""
+        values = np.full(len(index), default, dtype=float)
+        for item in series:
+            position = index.get(item['date'])
+            if position is not None:
+                values[position] = item['value']
+        return values
     
     def _compute_crop_growth(self, daily_sensor: Dict, gee_data: Dict,
                               start_date: str, end_date: str) -> List[Dict]:
@@ -578,6 +672,16 @@ class WaterBalanceAPI:
         
         return ((precipitation - Ia) ** 2) / (precipitation + 0.8 * S)
     
+    def _estimate_runoff_array(self, precipitation: np.ndarray, cn: float = 70.0) -> np.ndarray:
+        """_estimate_runoff for an array of daily precipitation"""
+        S = (25400 / cn) - 254
+        Ia = 0.2 * S
+        
+        runoff = np.zeros_like(precipitation)
+        wet = ~(precipitation <= Ia)  # like the scalar version, NaN propagates
+        runoff[wet] = ((precipitation[wet] - Ia) ** 2) / (precipitation[wet] + 0.8 * S)
+        return runoff
+    
     def _calculate_vpd_stress(self, vpd: float) -> float:
         """Calculate VPD stress factor (0-1, where 1 = no stress)"""
         vpd_min = self.physics_constants.TOBACCO_VPD_MIN
@@ -590,6 +694,18 @@ class WaterBalanceAPI:
         else:
             return max(0.1, np.exp(-0.5 * (vpd - vpd_max)))
     
+    def _calculate_vpd_stress_array(self, vpd: np.ndarray) -> np.ndarray:
+        """_calculate_vpd_stress for an array of VPD values"""
+        vpd_min = self.physics_constants.TOBACCO_VPD_MIN
+        vpd_max = self.physics_constants.TOBACCO_VPD_MAX
+        
+        stress = np.ones_like(vpd)
+        low = vpd < vpd_min
+        stress[low] = 0.9 + 0.1 * (vpd[low] / vpd_min)
+        high = ~low & ~(vpd <= vpd_max)
+        stress[high] = np.fmax(0.1, np.exp(-0.5 * (vpd[high] - vpd_max)))
+        return stress
+    
     def _get_growth_stage(self, accumulated_gdd: float) -> str:
         """Determine tobacco growth stage from accumulated GDD"""
         if accumulated_gdd < 200:
@@ -610,13 +726,8 @@ class WaterBalanceAPI:
         start = datetime.strptime(start_date, '%Y-%m-%d')
         end = datetime.strptime(end_date, '%Y-%m-%d')
         
-        dates = []
-        current = start
-        while current <= end:
-            dates.append(current.strftime('%Y-%m-%d'))
-            current += timedelta(days=1)
-        
-        return dates
+        days = np.arange(np.datetime64(start.date()), np.datetime64(end.date()) + 1, dtype='datetime64[D]')
+        return days.astype(str).tolist()
     
     def _generate_summary(self, water_balance: List[Dict],
                           crop_growth: List[Dict],
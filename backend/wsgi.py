@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+CropIoT WSGI Entry Point
+Production serving of the Flask API with a pre-forking worker pool:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+See gunicorn.conf.py for worker settings. `python api_server.py` remains
+the single-process development server.
+"""
+
+from api_server import app
+
+__all__ = ['app']
@@ -101,6 +101,7 @@ export interface SensorDetail {
   avg_humidity: number | null
   avg_soil_moisture: number | null
   readings: SensorReading[]
+  next_cursor: string | null
 }
 
 export interface YieldPrediction {
@@ -454,8 +455,9 @@ class ApiClient {
     return this.fetch("/api/analytics/sensor-stats", "sensor")
   }
 
-  async getSensorData(sensorId: string, hours = 24, limit = 100): Promise<SensorDetail> {
-    return this.fetch<SensorDetail>(`/api/sensor/${sensorId}?hours=${hours}&limit=${limit}`, "sensor")
+  async getSensorData(sensorId: string, hours = 24, limit = 100, cursor?: string): Promise<SensorDetail> {
+    const page = cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""
+    return this.fetch<SensorDetail>(`/api/sensor/${sensorId}?hours=${hours}&limit=${limit}${page}`, "sensor")
   }
 
   async detectDisease(file: File, sensorId?: string): Promise<any> {
@@ -632,6 +634,26 @@ class ApiClient {
     })
     return this.fetch(`/api/gee/data?${qs}`, "sensor")
   }
+
+  // Live push of new readings/detections; replaces polling /api/latest and /api/chart-data.
+  // The browser reconnects automatically and resumes from the last event it saw.
+  openLiveStream(params: {
+    sensorIds?: string[]
+    types?: ("reading" | "disease")[]
+    onReading?: (reading: SensorReading) => void
+    onDisease?: (detection: Record<string, unknown>) => void
+    onOverflow?: (dropped: number) => void
+  }): EventSource {
+    const qs = new URLSearchParams({
+      ...(params.sensorIds?.length && { sensor_id: params.sensorIds.join(",") }),
+      ...(params.types?.length && { types: params.types.join(",") }),
+    })
+    const source = new EventSource(`${this.sensorApiUrl}/api/stream${qs.toString() ? `?${qs}` : ""}`)
+    source.addEventListener("reading", (e) => params.onReading?.(JSON.parse((e as MessageEvent).data)))
+    source.addEventListener("disease", (e) => params.onDisease?.(JSON.parse((e as MessageEvent).data)))
+    source.addEventListener("overflow", (e) => params.onOverflow?.(JSON.parse((e as MessageEvent).data).dropped))
+    return source
+  }
 }
 
 export const api = new ApiClient()